@@ -0,0 +1,875 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the MCP server and multi-agent system.
+
+Each benchmark runs offline against the in-process tools (with injected latency
+where a real transport or backend would add it), so results are reproducible
+without an OpenAI key or network access.
+
+Usage:
+    python benchmark.py audit [--skus 10000] [--latency-ms 2] [--concurrency 16,64,256]
+    python benchmark.py prompt [--skus 10000] [--chunk-size 200]
+    python benchmark.py singleflight [--users 50] [--latency-ms 100]
+    python benchmark.py executor [--calls 500] [--concurrency 32] [--port 8765]
+    python benchmark.py fastpath [--checks 2000] [--llm-latency-ms 800]
+    python benchmark.py replay --cassette workflows.jsonl [--latency-scale 1] [--runs 5]
+    python benchmark.py campaign [--customers 5000] [--latency-ms 20] [--concurrency 1,64] [--workers 0,4]
+    python benchmark.py llm [--calls 300] [--concurrency 16] [--latency lognormal:300:0.4] [--rate-429 0.1]
+    python benchmark.py tools [--runs 200] [--audit-skus 200]
+    python benchmark.py templates [--records 100000] [--recommendations 3] [--repeat 5]
+    python benchmark.py rules [--rules 100,1000,5000] [--records 20000]
+    python benchmark.py dashboard [--products 20000] [--customers 20000] [--ticks 20] [--writes-per-tick 200]
+    python benchmark.py downsample [--points 3650,87600,1000000] [--width 1200] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+# Per-request INFO logs from the MCP/HTTP clients would drown the result tables
+os.environ.setdefault("MCP_LOG_LEVEL", "WARNING")
+
+import campaign
+import main
+import templates
+import mcp_executor
+import multi_agent_demo
+import workflows
+from fast_path import TieredRouter
+from prompt_encoding import INVENTORY_COLUMNS, encode_table, estimate_tokens, parse_tool_result
+from rule_engine import RULES_PATH, RuleEngine
+from tool_results import to_text
+
+
+def print_header(title: str):
+    print("=" * 70)
+    print(title)
+    print("=" * 70)
+
+
+def add_synthetic_products(count: int) -> list:
+    """Pad INVENTORY_DB with synthetic products and return `count` SKUs to audit."""
+    template = list(main.INVENTORY_DB.values())
+    skus = []
+    for i in range(count):
+        sku = f"BENCH{i:06d}"
+        base = template[i % len(template)]
+        main.upsert_product({**base, "sku": sku, "name": f"{base['name']} #{i}"})
+        skus.append(sku)
+    return skus
+
+
+def add_synthetic_customers(count: int):
+    """Pad CUSTOMERS_DB with `count` synthetic customers across all segments."""
+    segments = ["VIP", "Gold", "Regular"]
+    for i in range(count):
+        customer_id = f"BENCH{i:06d}"
+        main.upsert_customer({
+            "customer_id": customer_id, "name": f"Customer {i}", "email": f"customer{i}@example.com",
+            "total_orders": i % 40, "lifetime_value": float(i % 6000), "segment": segments[i % 3]
+        })
+
+
+def inject_tool_latency(latency_s: float, tool_name: str = "check_inventory_status"):
+    """Make an in-process tool behave like a remote tool backend."""
+    original = getattr(main, tool_name)
+
+    async def slow_tool(*args, **kwargs) -> str:
+        await asyncio.sleep(latency_s)
+        return await original(*args, **kwargs)
+
+    setattr(main, tool_name, slow_tool)
+
+
+async def bench_audit(skus_count: int, latency_ms: float, levels: list, baseline_sample: int):
+    """Sequential vs bounded-concurrency inventory audit."""
+    print_header(f"INVENTORY AUDIT FAN-OUT | {skus_count} SKUs | {latency_ms}ms tool latency")
+
+    skus = add_synthetic_products(skus_count)
+    inject_tool_latency(latency_ms / 1000)
+    agent = multi_agent_demo.InventoryAgent()
+    agent.log = lambda message: None
+
+    # Sequential baseline (max_concurrency=1), extrapolated from a sample when large
+    sample = skus[:min(baseline_sample, skus_count)]
+    start = time.perf_counter()
+    await agent.audit_inventory(sample, max_concurrency=1)
+    sequential = (time.perf_counter() - start) * skus_count / len(sample)
+    note = "" if len(sample) == skus_count else f" (extrapolated from {len(sample)} SKUs)"
+    print(f"{'concurrency':>12} | {'seconds':>9} | {'SKUs/s':>9} | speedup")
+    print("-" * 70)
+    print(f"{1:>12} | {sequential:>9.2f} | {skus_count / sequential:>9.0f} | 1.0x{note}")
+
+    for level in levels:
+        start = time.perf_counter()
+        report = await agent.audit_inventory(skus, max_concurrency=level)
+        elapsed = time.perf_counter() - start
+        print(f"{level:>12} | {elapsed:>9.2f} | {skus_count / elapsed:>9.0f} | {sequential / elapsed:.1f}x")
+
+    assert report.index("BENCH000000") < report.index(f"BENCH{skus_count - 1:06d}"), "audit order changed"
+    print()
+
+
+async def bench_prompt(skus_count: int, chunk_size: int):
+    """Audit prompt size: indented JSON per SKU vs compact table (single and map-reduce)."""
+    print_header(f"AUDIT PROMPT ENCODING | {skus_count} SKUs | chunk size {chunk_size}")
+
+    skus = add_synthetic_products(skus_count)
+    results = [await main.check_inventory_status(sku) for sku in skus]
+
+    json_prompt = "\n\n".join(f"SKU {sku}: {result}" for sku, result in zip(skus, results))
+    rows = [parse_tool_result(result) for result in results]
+    table_prompt = encode_table(rows, INVENTORY_COLUMNS)
+    chunk_prompts = [encode_table(rows[i:i + chunk_size], INVENTORY_COLUMNS) for i in range(0, len(rows), chunk_size)]
+
+    json_tokens = estimate_tokens(json_prompt)
+    table_tokens = estimate_tokens(table_prompt)
+    largest_chunk = max(estimate_tokens(prompt) for prompt in chunk_prompts)
+
+    print(f"{'encoding':<22} | {'tokens':>10} | {'tokens/SKU':>10} | largest prompt")
+    print("-" * 70)
+    print(f"{'indented JSON':<22} | {json_tokens:>10} | {json_tokens / skus_count:>10.1f} | {json_tokens}")
+    print(f"{'compact table':<22} | {table_tokens:>10} | {table_tokens / skus_count:>10.1f} | {table_tokens}")
+    print(f"{'table, map-reduce':<22} | {table_tokens:>10} | {table_tokens / skus_count:>10.1f} | "
+          f"{largest_chunk} ({len(chunk_prompts)} parallel map calls)")
+    print(f"\nToken reduction: {json_tokens / table_tokens:.1f}x")
+    print()
+
+
+async def bench_single_flight(users: int, latency_ms: float):
+    """Many users running Daily Business Review at once against slow tools."""
+    print_header(f"SINGLE-FLIGHT COALESCING | {users} concurrent users | {latency_ms}ms tool latency")
+
+    for tool_name in ("generate_sales_report", "check_inventory_status"):
+        inject_tool_latency(latency_ms / 1000, tool_name)
+    analytics_agent = multi_agent_demo.AnalyticsAgent()
+    inventory_agent = multi_agent_demo.InventoryAgent()
+    analytics_agent.log = inventory_agent.log = lambda message: None
+
+    async def daily_business_review():
+        await analytics_agent.generate_business_report("week")
+        await inventory_agent.check_stock("PROD004")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(daily_business_review() for _ in range(users)))
+    elapsed = time.perf_counter() - start
+
+    stats = multi_agent_demo.tool_flight.stats()
+    print(f"Tool calls requested: {stats['calls']}")
+    print(f"Tool calls executed:  {stats['executed']}")
+    print(f"Tool calls coalesced: {stats['coalesced']} ({stats['coalesced'] / stats['calls']:.0%})")
+    print(f"Wall time: {elapsed * 1000:.0f}ms (vs ~{2 * latency_ms:.0f}ms for a single user)")
+    print()
+
+
+async def start_server(args: list, port: int, name: str, env: dict = None):
+    """Launch a local server process and wait until it accepts connections on `port`."""
+    server = await asyncio.create_subprocess_exec(
+        sys.executable, *args,
+        env={**os.environ, **(env or {})},
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    for _ in range(50):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return server
+        except OSError:
+            await asyncio.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"{name} did not start on port {port}")
+
+
+async def start_http_server(port: int):
+    """Launch `python main.py` on streamable HTTP and wait until it answers."""
+    return await start_server(
+        [str(mcp_executor.SERVER_SCRIPT)], port, "MCP HTTP server",
+        {"MCP_TRANSPORT": "streamable-http", "MCP_PORT": str(port), "MCP_LOG_LEVEL": "WARNING"}
+    )
+
+
+async def bench_executor(calls: int, concurrency: int, port: int, spawn_calls: int):
+    """Per-call overhead of the in-process, pooled stdio and HTTP keep-alive executors."""
+    print_header(f"MCP EXECUTOR OVERHEAD | {calls} calls | concurrency {concurrency}")
+    parameters = {"sku": "PROD001"}
+
+    server = await start_http_server(port)
+    backends = [
+        ("inprocess", mcp_executor.InProcessBackend()),
+        ("stdio pool", mcp_executor.StdioPoolBackend(1)),
+        ("http keep-alive", mcp_executor.HTTPBackend(f"http://127.0.0.1:{port}/mcp")),
+    ]
+
+    print(f"{'executor':<18} | {'p50 ms':>8} | {'p99 ms':>8} | {'concurrent calls/s':>18}")
+    print("-" * 70)
+    try:
+        # What pooling avoids: a fresh stdio server for every call
+        latencies = []
+        for _ in range(spawn_calls):
+            start = time.perf_counter()
+            backend = mcp_executor.StdioPoolBackend(1)
+            await backend.call("check_inventory_status", parameters)
+            await backend.close()
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{'stdio per call':<18} | {statistics.median(latencies):>8.2f} | {max(latencies):>8.2f} | "
+              f"{'-':>18} ({spawn_calls} calls)")
+
+        for label, backend in backends:
+            await backend.call("check_inventory_status", parameters)  # connect / warm up
+
+            latencies = []
+            for _ in range(calls):
+                start = time.perf_counter()
+                await backend.call("check_inventory_status", parameters)
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+
+            start = time.perf_counter()
+            for i in range(0, calls, concurrency):
+                batch = min(concurrency, calls - i)
+                await asyncio.gather(*(backend.call("check_inventory_status", parameters) for _ in range(batch)))
+            throughput = calls / (time.perf_counter() - start)
+
+            print(f"{label:<18} | {latencies[len(latencies) // 2]:>8.3f} | "
+                  f"{latencies[int(len(latencies) * 0.99) - 1]:>8.3f} | {throughput:>18.0f}")
+            await backend.close()
+    finally:
+        server.terminate()
+        await server.wait()
+    print()
+
+
+async def bench_fast_path(checks: int, llm_latency_ms: float, concurrency: int):
+    """Routine inventory/order checks: LLM for everything vs rule fast path with escalation."""
+    print_header(f"TIERED INFERENCE | {checks} routine checks | {llm_latency_ms}ms simulated LLM latency")
+
+    # Realistic spread of stock levels (the template catalog alone has no borderline items)
+    rng = random.Random(42)
+    skus = add_synthetic_products(checks // 2)
+    for sku in skus:
+        main.set_stock(sku, rng.randint(0, 60))
+    order_ids = list(main.ORDERS_DB)
+    workload = [("Inventory Agent", "inventory", await main.check_inventory_status(sku)) for sku in skus]
+    workload += [("Customer Service Agent", "order", await main.process_order(order_ids[i % len(order_ids)], "retrieve"))
+                 for i in range(checks - len(skus))]
+
+    print(f"{'tier':<14} | {'p50 ms':>8} | {'p95 ms':>8} | {'LLM calls':>9} | {'prompt tokens':>13}")
+    print("-" * 70)
+    for label, router in (("LLM only", TieredRouter(enabled=False)), ("fast path", TieredRouter())):
+        latencies = []
+        llm_calls = 0
+        prompt_tokens = 0
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def check(agent: str, kind: str, data: str):
+            nonlocal llm_calls, prompt_tokens
+
+            async def simulated_llm() -> str:
+                nonlocal llm_calls, prompt_tokens
+                llm_calls += 1
+                prompt_tokens += estimate_tokens(data)
+                await asyncio.sleep(llm_latency_ms / 1000)
+                return "assessment"
+
+            async with semaphore:
+                start = time.perf_counter()
+                await router.route(agent, kind, data, simulated_llm)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(*(check(*item) for item in workload))
+        latencies.sort()
+        print(f"{label:<14} | {statistics.median(latencies):>8.2f} | {latencies[int(len(latencies) * 0.95) - 1]:>8.2f} | "
+              f"{llm_calls:>9} | {prompt_tokens:>13}")
+
+    for agent, stats in router.summary().items():
+        print(f"  {agent}: {stats['rules']} by rules, {stats['escalated']} escalated "
+              f"({stats['escalation_rate']:.0%} escalation)")
+    print()
+
+
+async def bench_replay(cassette: str, latency_scale: float, runs: int):
+    """OpenAI-backed workflows replayed from a recorded cassette: sequential vs concurrent."""
+    print_header(f"WORKFLOW REPLAY | {cassette} | latency x{latency_scale} | {runs} runs")
+
+    # The LLM client is configured at import time, so the cassette settings go in first
+    os.environ.update(LLM_CASSETTE_MODE="replay", LLM_CASSETTE=cassette, LLM_CASSETTE_LATENCY=str(latency_scale),
+                      LLM_CACHE="off", LLM_TELEMETRY_PATH="")
+    import multi_agent_system as system
+    system.BaseAgent.log = lambda self, message: None
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    databases = (main.INVENTORY_DB, main.ORDERS_DB, main.CUSTOMERS_DB)
+    snapshot = copy.deepcopy(databases)
+
+    def build_workflows() -> list:
+        # Fresh data each time: order fulfillment ships ORD002, which changes the next run's prompts
+        for database, saved in zip(databases, snapshot):
+            database.clear()
+            database.update(copy.deepcopy(saved))
+        coordinator = system.CoordinatorAgent()
+        return [
+            workflows.vip_customer_upsell(coordinator.customer_service_agent, coordinator.analytics_agent),
+            workflows.inventory_audit(coordinator.inventory_agent),
+            workflows.daily_business_review(coordinator.analytics_agent, coordinator.inventory_agent),
+            workflows.order_fulfillment(coordinator.customer_service_agent, coordinator.inventory_agent,
+                                        system.MCPToolExecutor),
+        ]
+
+    for workflow in build_workflows():  # warm-up: first-call client setup is not workflow overhead
+        await workflow.run()
+
+    timings = {}
+    sequential, concurrent = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for workflow in build_workflows():
+            outcome = await workflow.run()
+            timings.setdefault(workflow.name, []).append(outcome.elapsed)
+        sequential.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(workflow.run() for workflow in build_workflows()))
+        concurrent.append(time.perf_counter() - start)
+
+    print(f"{'workflow':<28} | {'median ms':>10} | {'min ms':>8} | {'max ms':>8}")
+    print("-" * 70)
+    for name, elapsed in timings.items():
+        print(f"{name:<28} | {statistics.median(elapsed) * 1000:>10.1f} | {min(elapsed) * 1000:>8.1f} | "
+              f"{max(elapsed) * 1000:>8.1f}")
+    print(f"{'all four, one at a time':<28} | {statistics.median(sequential) * 1000:>10.1f} | "
+          f"{min(sequential) * 1000:>8.1f} | {max(sequential) * 1000:>8.1f}")
+    print(f"{'all four, concurrently':<28} | {statistics.median(concurrent) * 1000:>10.1f} | "
+          f"{min(concurrent) * 1000:>8.1f} | {max(concurrent) * 1000:>8.1f}")
+
+    stats = system.llm_cassette.stats()
+    print(f"\nLLM responses replayed: {stats['replayed']}, not in cassette: {stats['misses']}")
+    if not latency_scale:
+        print("(latency scale 0: times are orchestration, tool and client overhead only)")
+    print()
+
+
+async def bench_llm_load(calls: int, concurrency: int, port: int, server_options: list):
+    """OpenAI-backed agents against the local fake LLM server: throughput, latency, retries."""
+    print_header(f"LLM LOAD | {calls} calls | client concurrency {concurrency} | server {' '.join(server_options)}")
+
+    server = await start_server(["fake_llm_server.py", "--port", str(port), *server_options], port, "Fake LLM server")
+    try:
+        # The LLM client is configured at import time, so point it at the fake server first
+        os.environ.update(OPENAI_BASE_URL=f"http://127.0.0.1:{port}/v1", OPENAI_API_KEY="fake",
+                          LLM_MAX_CONCURRENCY=str(concurrency), LLM_CACHE="off", LLM_TELEMETRY_PATH="",
+                          LLM_CASSETTE_MODE="off")
+        import multi_agent_system as system
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        agents = [system.InventoryAgent(), system.CustomerServiceAgent(), system.AnalyticsAgent()]
+
+        latencies = []
+
+        async def one_call(i: int) -> bool:
+            start = time.perf_counter()
+            # Distinct prompts, so single-flight coalescing doesn't hide the load
+            result = await agents[i % len(agents)].call_llm(f"Load test request {i}: summarize today's operations.")
+            latencies.append(time.perf_counter() - start)
+            return not result.startswith("❌")
+
+        start = time.perf_counter()
+        succeeded = sum(await asyncio.gather(*(one_call(i) for i in range(calls))))
+        elapsed = time.perf_counter() - start
+
+        async with system.httpx.AsyncClient() as http:
+            served = (await http.get(f"http://127.0.0.1:{port}/stats")).json()
+        limits = system.llm_limiter.stats()
+        latencies.sort()
+
+        print(f"Succeeded:   {succeeded}/{calls} in {elapsed:.2f}s ({calls / elapsed:.1f} calls/s)")
+        print(f"Latency:     p50 {statistics.median(latencies) * 1000:.0f}ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}ms (including queueing and retries)")
+        print(f"Retries:     {limits['retries']} ({limits['rate_limited']} x 429), {limits['failures']} gave up")
+        print(f"Concurrency: client limit ended at {limits['concurrency_limit']}/{limits['max_concurrency']}, "
+              f"server saw at most {served['max_in_flight']} in flight")
+        print(f"Server:      {served['requests']} requests, {served['rate_limited'] + served['quota_limited']} x 429, "
+              f"{served['server_errors']} x 500")
+    finally:
+        server.terminate()
+        await server.wait()
+    print()
+
+
+async def bench_campaign(customers: int, latency_ms: float, levels: list, worker_counts: list):
+    """Bulk recommendation campaign: customers/s by concurrency and render processes."""
+    print_header(f"RECOMMENDATION CAMPAIGN | {customers} customers | {latency_ms}ms tool latency")
+
+    add_synthetic_customers(customers)
+    for tool_name in ("get_customer_analytics", "generate_product_recommendations"):
+        inject_tool_latency(latency_ms / 1000, tool_name)
+    agent = campaign.create_agent("demo")
+
+    print(f"{'concurrency':>12} | {'render workers':>14} | {'seconds':>8} | {'customers/s':>11}")
+    print("-" * 70)
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "campaign.jsonl")
+        for level in levels:
+            for workers in worker_counts:
+                # Sequential runs are slow, so they only process a sample
+                limit = min(customers, 200) if level == 1 else None
+                # pool_min_chars=0 sends every email to the pool, to measure what it costs
+                summary = await campaign.run_campaign(agent, output, concurrency=level, render_workers=workers,
+                                                      limit=limit, restart=True, progress_every=0, pool_min_chars=0)
+                print(f"{level:>12} | {workers:>14} | {summary['elapsed_s']:>8.2f} | "
+                      f"{summary['customers_per_s']:>11.0f}{'' if limit is None else f' ({limit} customers)'}")
+    print()
+
+
+class JSONRoundTripBackend(mcp_executor.InProcessBackend):
+    """In-process tools the way they used to be called: JSON text out, parsed again by the caller."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def call(self, tool_name: str, parameters: dict):
+        self.calls += 1
+        return to_text(await super().call(tool_name, parameters))
+
+
+async def bench_tool_results(runs: int, audit_skus: int):
+    """CPU per workflow run: typed in-process tool results vs a JSON dump/parse per tool call."""
+    print_header(f"TOOL RESULTS | {runs} runs per workflow | demo agents | audit over {audit_skus} SKUs")
+
+    skus = add_synthetic_products(audit_skus)
+    databases = (main.INVENTORY_DB, main.ORDERS_DB, main.CUSTOMERS_DB)
+    snapshot = copy.deepcopy(databases)
+
+    def build_workflows() -> list:
+        for database, saved in zip(databases, snapshot):  # order fulfillment ships ORD002
+            database.clear()
+            database.update(copy.deepcopy(saved))
+        inventory_agent = multi_agent_demo.InventoryAgent()
+        cs_agent = multi_agent_demo.CustomerServiceAgent()
+        analytics_agent = multi_agent_demo.AnalyticsAgent()
+        inventory_agent.log = cs_agent.log = analytics_agent.log = lambda message: None
+        return [
+            workflows.vip_customer_upsell(cs_agent, analytics_agent),
+            workflows.inventory_audit(inventory_agent, skus),
+            workflows.daily_business_review(analytics_agent, inventory_agent),
+            workflows.order_fulfillment(cs_agent, inventory_agent, mcp_executor.MCPToolExecutor),
+        ]
+
+    json_backend = JSONRoundTripBackend()
+    modes = {"JSON round trip": json_backend, "typed": mcp_executor.InProcessBackend()}
+    cpu = {}
+    tool_calls = {}
+    for run in range(runs + 1):
+        for mode, backend in modes.items():
+            mcp_executor.set_tool_backend(backend)
+            for workflow in build_workflows():
+                calls = json_backend.calls
+                start = time.process_time()
+                await workflow.run()
+                elapsed = time.process_time() - start
+                if run:  # the first round is warm-up
+                    cpu.setdefault(workflow.name, {}).setdefault(mode, []).append(elapsed)
+                if backend is json_backend:
+                    tool_calls[workflow.name] = json_backend.calls - calls
+
+    print(f"{'workflow':<24} | {'tool calls':>10} | {'JSON ms':>8} | {'typed ms':>8} | {'saved':>6} | µs/call")
+    print("-" * 78)
+    totals = {mode: 0.0 for mode in modes}
+    for name, timings in cpu.items():
+        json_s, typed_s = (statistics.median(timings[mode]) for mode in modes)
+        totals["JSON round trip"] += json_s
+        totals["typed"] += typed_s
+        print(f"{name:<24} | {tool_calls[name]:>10} | {json_s * 1000:>8.3f} | {typed_s * 1000:>8.3f} | "
+              f"{1 - typed_s / json_s:>6.0%} | {(json_s - typed_s) / tool_calls[name] * 1e6:>7.1f}")
+    json_s, typed_s = totals.values()
+    print(f"{'all four':<24} | {sum(tool_calls.values()):>10} | {json_s * 1000:>8.3f} | {typed_s * 1000:>8.3f} | "
+          f"{1 - typed_s / json_s:>6.0%} |")
+    print("\n(CPU time per run, median; \"JSON\" = every result dumped by the tool and parsed by the caller)")
+    print()
+
+
+def fstring_recommendations_email(cust: dict, recs: dict) -> str:
+    """The recommendation email as CustomerServiceAgent built it before recommendations_email (+= per item)."""
+    email = f"""
+📧 PERSONALIZED PRODUCT RECOMMENDATIONS
+========================================
+
+Dear {cust.get('name')},
+
+As one of our valued {cust.get('customer_segment')} customers, we've handpicked
+some exclusive recommendations just for you:
+
+"""
+    for idx, rec in enumerate(recs.get('recommendations', []), 1):
+        email += f"""
+{idx}. {rec.get('product_name')}
+   Price: {rec.get('price')}
+   Match Score: {rec.get('relevance_score')}
+   Why: {rec.get('reason')}
+"""
+
+    email += f"""
+These selections are based on your purchase history and preferences.
+Shop now and enjoy your {cust.get('customer_segment')} benefits!
+
+Best regards,
+Your Personal Shopping Team
+"""
+    return email
+
+
+def bench_templates(records: int, recommendations: int, repeat: int):
+    """Recommendation emails: the old += assembly vs the render function, joined once or streamed in chunks."""
+    print_header(f"TEMPLATES | {records} recommendation emails | {recommendations} products each")
+
+    products = list(main.INVENTORY_DB.values())
+    contexts = []
+    for i in range(records):
+        recs = [{
+            "product_name": product["name"],
+            "price": f"${product['price']:.2f}",
+            "relevance_score": f"{0.95 - 0.05 * rank:.2f}",
+            "reason": f"Popular in {product['category']}",
+        } for rank, product in enumerate(products[i % len(products):][:recommendations])]
+        contexts.append({
+            "customer": {"name": f"Customer {i}", "customer_segment": ("VIP", "Gold", "Regular")[i % 3]},
+            "recommendations": recs,
+        })
+
+    def render(c: dict) -> str:
+        return multi_agent_demo.recommendations_email(c["customer"], c["recommendations"])
+
+    def fstring_bulk() -> str:
+        out = ""  # one growing string, the way a batch of emails was usually assembled
+        for c in contexts:
+            out += fstring_recommendations_email(c["customer"], c)
+        return out
+
+    def render_each() -> str:
+        return "".join([render(c) for c in contexts])
+
+    def render_batch() -> str:
+        return templates.render_many(render, contexts)
+
+    chunks = []
+
+    def stream() -> int:
+        chunks.clear()
+        size = 0
+        for chunk in templates.stream(render, contexts):
+            size += len(chunk)  # a real caller writes the chunk to a file or response and drops it
+            chunks.append(len(chunk))
+        return size
+
+    expected = fstring_bulk()
+    modes = {
+        "old email, += all emails": fstring_bulk,
+        "render function per email": render_each,
+        "render_many": render_batch,
+        "stream (64 KB chunks)": stream,
+    }
+    print(f"{'mode':<26} | {'seconds':>8} | {'emails/s':>10} | {'µs/email':>8} | peak buffer")
+    print("-" * 74)
+    baseline = None
+    for mode, run in modes.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = run()
+            timings.append(time.perf_counter() - start)
+        elapsed = min(timings)
+        baseline = baseline or elapsed
+        if isinstance(output, str):
+            assert output == expected, f"{mode} output differs from the f-string email"
+            peak = f"{len(output) / 1e6:.1f} MB"
+        else:
+            assert output == len(expected), f"{mode} output differs from the f-string email"
+            peak = f"{max(chunks) / 1e3:.0f} KB ({len(chunks)} chunks)"
+        print(f"{mode:<26} | {elapsed:>8.3f} | {records / elapsed:>10,.0f} | {elapsed / records * 1e6:>8.2f} | "
+              f"{peak}  ({baseline / elapsed:.1f}x)")
+    print(f"\n(best of {repeat}; all modes produce the same text; peak buffer = largest string held at once)")
+    print()
+
+
+def synthetic_rules(count: int, skus: list) -> list:
+    """rules.json plus `count` generated rules: per-SKU restock thresholds, per-category and per-warehouse alerts."""
+    with open(RULES_PATH, encoding="utf-8") as f:
+        rules = json.load(f)["rules"]
+    for i in range(count):
+        kind = i % 4
+        if kind < 2:
+            rules.append({"name": f"restock_{i}", "priority": 45,
+                          "when": {"sku": skus[i // 2 % len(skus)], "stock_quantity": {"lt": 25 + i % 10}},
+                          "then": "🔁 Reorder {{product_name}}: {{stock_quantity}} units left"})
+        elif kind == 2:
+            rules.append({"name": f"category_{i}", "priority": 5,
+                          "when": {"category": f"Category {i}", "status": {"ne": "✅ In Stock"}},
+                          "then": "Category alert"})
+        else:
+            rules.append({"name": f"warehouse_{i}", "priority": 5,
+                          "when": {"warehouse_location": {"in": [f"WH-{i:04d}", f"WH-{i + 1:04d}"]}},
+                          "then": "Warehouse alert"})
+    return rules
+
+
+async def bench_rules(rule_counts: list, records: int):
+    """SimulatedAgent.analyze rules: every rule checked in priority order vs the indexed engine."""
+    print_header(f"RULES | {records} inventory records | rule sets of {', '.join(map(str, rule_counts))}")
+
+    skus = add_synthetic_products(records)
+    results = [parse_tool_result(await main.check_inventory_status(sku)) for sku in skus]
+
+    print(f"{'rules':>6} | {'scan records/s':>14} | {'indexed records/s':>17} | {'speedup':>7} | rules checked/record")
+    print("-" * 80)
+    for count in rule_counts:
+        engine = RuleEngine.from_config({"rules": synthetic_rules(count, skus)})
+
+        start = time.perf_counter()
+        scanned = [next((rule for rule in engine.rules if rule.matches(record)), None) for record in results]
+        scan_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed = [engine.match(record) for record in results]
+        indexed_s = time.perf_counter() - start
+        assert scanned == indexed, "indexed engine picked a different rule than the full scan"
+
+        checked = statistics.mean(len(engine.candidates(record)) for record in results)
+        print(f"{len(engine):>6} | {records / scan_s:>14,.0f} | {records / indexed_s:>17,.0f} | "
+              f"{scan_s / indexed_s:>6.1f}x | {checked:.1f}")
+    print("\n(scan = each rule's conditions tested in priority order until one matches)")
+    print()
+
+
+async def bench_dashboard(products: int, customers: int, ticks: int, writes_per_tick: int):
+    """Dashboard refresh under write load: rebuilding every view per tick vs change-feed LiveViews."""
+    import web_ui  # imports gradio; only this benchmark needs it
+
+    print_header(f"DASHBOARD | {products} products, {customers} customers | {ticks} ticks x {writes_per_tick} writes")
+    skus = add_synthetic_products(products)
+    add_synthetic_customers(customers)
+    rng = random.Random(7)
+
+    def write_load(tick: int):
+        """Mostly stock changes, some order updates; customers only every few ticks."""
+        for _ in range(writes_per_tick):
+            main.set_stock(rng.choice(skus), rng.randint(0, 60))
+        if tick % 2:
+            main.record_order({"order_id": f"BENCH-ORD{tick}", "customer_id": "CUST001", "items": [skus[tick]],
+                               "total": 19.99, "status": "pending", "date": f"2025-09-{tick % 28 + 1:02d}"})
+        if tick % 5 == 0:
+            main.upsert_customer({**main.CUSTOMERS_DB["CUST002"], "segment": "Gold"})
+
+    def rebuild_all():
+        return [web_ui.create_metric_cards(), web_ui.create_inventory_chart(), web_ui.create_sales_chart(),
+                web_ui.create_customer_segment_chart()]
+
+    rows = {}
+    for mode in ("rebuild every tick", "LiveView (changed only)"):
+        seen = {}
+        timings = []
+        sent = 0
+        for tick in range(ticks + 1):
+            write_load(tick)
+            start = time.perf_counter()
+            if mode == "rebuild every tick":
+                rebuild_all()
+                sent += 7
+            else:
+                updates = await web_ui.refresh_dashboard(seen)
+                seen = updates[-1]
+                sent += sum(not (isinstance(u, dict) and u.get("__type__") == "update") for u in updates[:-1])
+            if tick:  # the first tick builds everything either way
+                timings.append(time.perf_counter() - start)
+        rows[mode] = (statistics.median(timings), max(timings), sent)
+
+    print(f"{'mode':<24} | {'p50 tick ms':>11} | {'max tick ms':>11} | outputs sent")
+    print("-" * 66)
+    for mode, (p50, worst, sent) in rows.items():
+        print(f"{mode:<24} | {p50 * 1000:>11.1f} | {worst * 1000:>11.1f} | {sent}")
+    views = web_ui.DASHBOARD_VIEWS
+    print("\nLiveView work: " + ", ".join(f"{name} {view.rebuilds} rebuilds/{view.patches} patches"
+                                         for name, view in views.items()))
+    print()
+
+
+def synthetic_sales_series(points: int) -> list:
+    """Gap-filled daily buckets: a seasonal trend with day-to-day noise and rare one-day spikes."""
+    rng = np.random.default_rng(7)
+    day = np.arange(points)
+    revenue = 2000 + 800 * np.sin(day * 2 * np.pi / 365) + rng.normal(0, 300, points)
+    revenue[rng.random(points) < 0.001] *= 4
+    start = date(2000, 1, 1).toordinal()
+    return [{"period": date.fromordinal(start + i).isoformat(), "revenue": value, "orders": 40, "units": 95}
+            for i, value in enumerate(revenue.round(2).tolist())]
+
+
+def bench_downsample(point_counts: list, width: int, repeat: int):
+    """Sales chart build for long histories: every bucket vs min/max and LTTB downsampling."""
+    import plotly.graph_objects as go
+    from downsample import downsample, point_budget
+    from web_ui import sales_line
+
+    budget = point_budget(width)
+    print_header(f"DOWNSAMPLE | {', '.join(f'{count:,}' for count in point_counts)} buckets | "
+                 f"{width}px chart -> {budget} points")
+    print(f"{'buckets':>9} | {'method':<6} | {'points':>6} | {'downsample ms':>13} | {'chart ms':>8} | "
+          f"{'payload KB':>10} | column peaks")
+    print("-" * 82)
+    for count in point_counts:
+        series = synthetic_sales_series(count)
+        # Highest bucket under each pixel column: what a full-resolution line would show as its peak there
+        revenue = np.array([bucket["revenue"] for bucket in series])
+        edges = np.linspace(0, count, min(width, count) + 1).astype(int)
+        peaks = [lo + int(revenue[lo:hi].argmax()) for lo, hi in zip(edges[:-1], edges[1:])]
+        for method in ("none", "minmax", "lttb"):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                shown = downsample(series, "revenue", budget, method)
+                sampled = time.perf_counter() - start
+                fig = go.Figure(go.Scatter(mode="lines+markers"))
+                fig.data[0].update(sales_line(shown))
+                payload = fig.to_json()
+                total = time.perf_counter() - start
+                if best is None or total < best[1]:
+                    best = (sampled, total)
+            kept = {id(bucket) for bucket in shown}
+            covered = sum(id(series[i]) in kept for i in peaks) / len(peaks)
+            print(f"{count:>9,} | {method:<6} | {len(shown):>6} | {best[0] * 1000:>13.1f} | {best[1] * 1000:>8.1f} | "
+                  f"{len(payload) / 1024:>10,.0f} | {covered:>11.0%}")
+    print("\n(chart ms = downsampling + building the figure + serializing it for the browser;"
+          " column peaks = pixel columns whose highest bucket is plotted)")
+    print()
+
+
+def parse_levels(value: str) -> list:
+    return [int(level) for level in value.split(",") if level]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="E-commerce multi-agent benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    audit = subparsers.add_parser("audit", help="inventory audit fan-out")
+    audit.add_argument("--skus", type=int, default=10_000)
+    audit.add_argument("--latency-ms", type=float, default=2.0)
+    audit.add_argument("--concurrency", type=parse_levels, default=[16, 64, 256])
+    audit.add_argument("--baseline-sample", type=int, default=1_000)
+
+    prompt = subparsers.add_parser("prompt", help="audit prompt encoding size")
+    prompt.add_argument("--skus", type=int, default=10_000)
+    prompt.add_argument("--chunk-size", type=int, default=200)
+
+    single_flight = subparsers.add_parser("singleflight", help="coalescing of concurrent identical calls")
+    single_flight.add_argument("--users", type=int, default=50)
+    single_flight.add_argument("--latency-ms", type=float, default=100.0)
+
+    executor = subparsers.add_parser("executor", help="per-call overhead of the MCP executor backends")
+    executor.add_argument("--calls", type=int, default=500)
+    executor.add_argument("--concurrency", type=int, default=32)
+    executor.add_argument("--port", type=int, default=8765)
+    executor.add_argument("--spawn-calls", type=int, default=5)
+
+    fast_path = subparsers.add_parser("fastpath", help="rule fast path vs LLM for routine checks")
+    fast_path.add_argument("--checks", type=int, default=2_000)
+    fast_path.add_argument("--llm-latency-ms", type=float, default=800.0)
+    fast_path.add_argument("--concurrency", type=int, default=64)
+
+    replay = subparsers.add_parser("replay", help="OpenAI-backed workflows replayed from an LLM cassette")
+    replay.add_argument("--cassette", default=os.getenv("LLM_CASSETTE", "llm_cassette.jsonl"))
+    replay.add_argument("--latency-scale", type=float, default=0.0)
+    replay.add_argument("--runs", type=int, default=5)
+
+    campaign_bench = subparsers.add_parser("campaign", help="bulk recommendation campaign throughput")
+    campaign_bench.add_argument("--customers", type=int, default=5_000)
+    campaign_bench.add_argument("--latency-ms", type=float, default=20.0)
+    campaign_bench.add_argument("--concurrency", type=parse_levels, default=[1, 64])
+    campaign_bench.add_argument("--workers", type=parse_levels, default=[0, 4])
+
+    llm = subparsers.add_parser("llm", help="agent LLM calls against the local fake LLM server")
+    llm.add_argument("--calls", type=int, default=300)
+    llm.add_argument("--concurrency", type=int, default=16)
+    llm.add_argument("--port", type=int, default=8766)
+    llm.add_argument("--latency", default="lognormal:300:0.4")
+    llm.add_argument("--token-ms", default="0")
+    llm.add_argument("--rate-429", default="0.1")
+    llm.add_argument("--rate-500", default="0.02")
+    llm.add_argument("--retry-after", default="0.5")
+    llm.add_argument("--server-concurrency", default="0")
+    llm.add_argument("--rpm", default="0")
+
+    tools = subparsers.add_parser("tools", help="CPU per workflow: typed tool results vs JSON round trips")
+    tools.add_argument("--runs", type=int, default=200)
+    tools.add_argument("--audit-skus", type=int, default=200)
+
+    templates_bench = subparsers.add_parser("templates", help="email rendering: += assembly vs render functions")
+    templates_bench.add_argument("--records", type=int, default=100_000)
+    templates_bench.add_argument("--recommendations", type=int, default=3)
+    templates_bench.add_argument("--repeat", type=int, default=5)
+
+    rules = subparsers.add_parser("rules", help="indexed rule engine vs a full rule scan")
+    rules.add_argument("--rules", type=parse_levels, default=[100, 1_000, 5_000])
+    rules.add_argument("--records", type=int, default=20_000)
+
+    dashboard = subparsers.add_parser("dashboard", help="live dashboard refresh under write load")
+    dashboard.add_argument("--products", type=int, default=20_000)
+    dashboard.add_argument("--customers", type=int, default=20_000)
+    dashboard.add_argument("--ticks", type=int, default=20)
+    dashboard.add_argument("--writes-per-tick", type=int, default=200)
+
+    downsample_bench = subparsers.add_parser("downsample", help="sales chart size and build time for long histories")
+    downsample_bench.add_argument("--points", type=parse_levels, default=[3_650, 87_600, 1_000_000])
+    downsample_bench.add_argument("--width", type=int, default=1200)
+    downsample_bench.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "audit":
+        asyncio.run(bench_audit(args.skus, args.latency_ms, args.concurrency, args.baseline_sample))
+    elif args.benchmark == "prompt":
+        asyncio.run(bench_prompt(args.skus, args.chunk_size))
+    elif args.benchmark == "singleflight":
+        asyncio.run(bench_single_flight(args.users, args.latency_ms))
+    elif args.benchmark == "executor":
+        asyncio.run(bench_executor(args.calls, args.concurrency, args.port, args.spawn_calls))
+    elif args.benchmark == "fastpath":
+        asyncio.run(bench_fast_path(args.checks, args.llm_latency_ms, args.concurrency))
+    elif args.benchmark == "replay":
+        asyncio.run(bench_replay(args.cassette, args.latency_scale, args.runs))
+    elif args.benchmark == "campaign":
+        asyncio.run(bench_campaign(args.customers, args.latency_ms, args.concurrency, args.workers))
+    elif args.benchmark == "llm":
+        server_options = ["--latency", args.latency, "--token-ms", args.token_ms, "--rate-429", args.rate_429,
+                          "--rate-500", args.rate_500, "--retry-after", args.retry_after,
+                          "--max-concurrency", args.server_concurrency, "--rpm", args.rpm]
+        asyncio.run(bench_llm_load(args.calls, args.concurrency, args.port, server_options))
+    elif args.benchmark == "tools":
+        asyncio.run(bench_tool_results(args.runs, args.audit_skus))
+    elif args.benchmark == "templates":
+        bench_templates(args.records, args.recommendations, args.repeat)
+    elif args.benchmark == "rules":
+        asyncio.run(bench_rules(args.rules, args.records))
+    elif args.benchmark == "dashboard":
+        asyncio.run(bench_dashboard(args.products, args.customers, args.ticks, args.writes_per_tick))
+    elif args.benchmark == "downsample":
+        bench_downsample(args.points, args.width, args.repeat)
+
+
+if __name__ == "__main__":
+    try:
+        main_cli()
+        sys.exit(0)
+    except Exception as e:
+        print(f"❌ Benchmark failed with error: {e}")
+        sys.exit(1)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Bulk Recommendation Campaign
+============================
+Personalized recommendation emails for every customer, as one resumable batch
+job (e.g. overnight).
+
+- Customers are streamed from the customer store in ID order
+- A bounded pool of async workers runs CustomerServiceAgent.recommend_products
+  (two tool calls + one LLM call per customer, all I/O)
+- Each email is rendered to its final text/HTML form on the event loop. A
+  process pool (--workers, off by default) only takes bodies of at least
+  CAMPAIGN_POOL_MIN_CHARS characters: shipping an email to a worker costs more
+  than rendering it (2 workers, one email per task: 41us inline vs 145us
+  pooled at 750 characters, 10ms vs 14ms at 750 KB), so the pool never adds
+  throughput; it only keeps a very large render from stalling the other
+  customers' I/O
+- Results are appended to a JSONL file in customer order as they finish, and a
+  checkpoint (last customer written + file offset) is saved every few results,
+  so an interrupted run resumes exactly where it stopped
+
+Usage:
+    python campaign.py run [--output campaign.jsonl] [--category Electronics] [--concurrency 32] [--workers 0]
+    python campaign.py status [--output campaign.jsonl]
+
+AGENT_BACKEND=llm uses the OpenAI-backed agent (default: the simulated one).
+"""
+
+import argparse
+import asyncio
+import html
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, Optional
+
+import main
+
+CAMPAIGN_CONCURRENCY = int(os.getenv("CAMPAIGN_CONCURRENCY", "32"))
+CAMPAIGN_RENDER_WORKERS = int(os.getenv("CAMPAIGN_RENDER_WORKERS", "0"))
+# Smallest body (characters) worth a worker process; about 3ms of inline rendering
+CAMPAIGN_POOL_MIN_CHARS = int(os.getenv("CAMPAIGN_POOL_MIN_CHARS", "250000"))
+CAMPAIGN_CHECKPOINT_EVERY = int(os.getenv("CAMPAIGN_CHECKPOINT_EVERY", "100"))
+
+SUBJECTS = {
+    "VIP": "{name}, your exclusive early-access picks",
+    "Gold": "{name}, new rewards picked for you",
+}
+DEFAULT_SUBJECT = "{name}, we think you'll love these"
+
+
+def iter_customers(after: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Customer records from the store in ID order, starting after `after`."""
+    for customer_id in sorted(main.CUSTOMERS_DB):
+        if after is None or customer_id > after:
+            yield main.CUSTOMERS_DB[customer_id]
+
+
+def render_email(customer: Dict[str, Any], body: str) -> Dict[str, Any]:
+    """Final email for one customer: subject, plain text and HTML."""
+    name = customer["name"]
+    subject = SUBJECTS.get(customer["segment"], DEFAULT_SUBJECT).format(name=name.split()[0])
+    paragraphs = [p.strip() for p in body.strip().split("\n\n") if p.strip()]
+    html_body = "".join(f"<p>{html.escape(p).replace(chr(10), '<br>')}</p>" for p in paragraphs)
+    return {
+        "customer_id": customer["customer_id"],
+        "status": "ok",
+        "to": f"{name} <{customer['email']}>",
+        "segment": customer["segment"],
+        "subject": subject,
+        "text": "\n\n".join(paragraphs),
+        "html": f"<html><body><h2>{html.escape(subject)}</h2>{html_body}</body></html>",
+    }
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]):
+    # Write-then-rename, so a crash never leaves a half-written checkpoint
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+async def run_campaign(agent, output: str = "campaign.jsonl", category: Optional[str] = None,
+                       concurrency: int = CAMPAIGN_CONCURRENCY, render_workers: int = CAMPAIGN_RENDER_WORKERS,
+                       limit: Optional[int] = None, restart: bool = False,
+                       progress_every: float = 5.0,
+                       pool_min_chars: int = CAMPAIGN_POOL_MIN_CHARS) -> Dict[str, Any]:
+    """
+    Generate recommendation emails for every customer not yet in `output`.
+
+    Args:
+        agent: CustomerServiceAgent (simulated or OpenAI-backed)
+        output: JSONL results file; its checkpoint is `output`.checkpoint
+        category: Optional product category for the recommendations
+        concurrency: Customers processed at once
+        render_workers: Processes rendering large emails (0 = render everything on the event loop)
+        limit: Stop after this many customers (e.g. a trial run)
+        restart: Ignore the checkpoint and start over
+        progress_every: Seconds between progress lines (0 = quiet)
+        pool_min_chars: Smallest body rendered in the pool (0 = every body)
+
+    Returns:
+        Run summary: processed, errors, elapsed_s, customers_per_s, resumed_after, total
+    """
+    checkpoint_path = output + ".checkpoint"
+    state = {} if restart else load_checkpoint(checkpoint_path)
+    resumed_after = state.get("last_customer_id")
+
+    # Lines written after the last checkpoint are redone, so the output never holds duplicates
+    with open(output, "ab") as out:
+        out.truncate(state.get("offset", 0))
+
+    customers = iter_customers(after=resumed_after)
+    if limit is not None:
+        customers = islice(customers, limit)
+
+    loop = asyncio.get_running_loop()
+    pool = ProcessPoolExecutor(render_workers) if render_workers > 0 else None
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def process(customer: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            body = await agent.recommend_products(customer["customer_id"], category)
+        if body.startswith("❌"):
+            return {"customer_id": customer["customer_id"], "status": "error", "error": body}
+        if pool is None or len(body) < pool_min_chars:
+            return render_email(customer, body)
+        return await loop.run_in_executor(pool, render_email, customer, body)
+
+    # Results are written in customer order (so the checkpoint is a single position); the
+    # window lets later customers finish while an earlier slow one is still running
+    window = max(1, concurrency) * 4
+    in_flight: deque = deque()
+
+    def schedule(count: int):
+        for customer in islice(customers, count):
+            in_flight.append((customer, asyncio.ensure_future(process(customer))))
+
+    processed = errors = 0
+    started = last_progress = time.perf_counter()
+    state.setdefault("processed", 0)
+    state.setdefault("errors", 0)
+
+    try:
+        with open(output, "ab") as out:
+            def checkpoint(completed: bool = False):
+                out.flush()
+                state.update(offset=out.tell(), completed=completed, updated_at=time.time())
+                save_checkpoint(checkpoint_path, state)
+
+            schedule(window)
+            while in_flight:
+                customer, task = in_flight.popleft()
+                try:
+                    result = await task
+                except asyncio.CancelledError:
+                    checkpoint()  # interrupted: keep everything written so far
+                    raise
+                schedule(1)
+
+                out.write((json.dumps(result) + "\n").encode("utf-8"))
+                processed += 1
+                errors += result["status"] != "ok"
+                state.update(last_customer_id=customer["customer_id"],
+                             processed=state["processed"] + 1,
+                             errors=state["errors"] + (result["status"] != "ok"))
+                if processed % CAMPAIGN_CHECKPOINT_EVERY == 0:
+                    checkpoint()
+
+                now = time.perf_counter()
+                if progress_every and now - last_progress >= progress_every:
+                    last_progress = now
+                    print(f"📧 {state['processed']} customers done ({processed / (now - started):.0f}/s, "
+                          f"{state['errors']} errors)")
+
+            checkpoint(completed=limit is None)
+    finally:
+        for _, task in in_flight:
+            task.cancel()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "processed": processed,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "customers_per_s": round(processed / elapsed, 1) if elapsed else 0.0,
+        "resumed_after": resumed_after,
+        "total": state["processed"],
+    }
+
+
+def create_agent(backend: str):
+    """CustomerServiceAgent for AGENT_BACKEND (demo or llm), with per-call logging muted."""
+    if backend == "llm":
+        from multi_agent_system import CustomerServiceAgent
+    else:
+        from multi_agent_demo import CustomerServiceAgent
+    agent = CustomerServiceAgent()
+    agent.log = lambda message: None  # one line per customer would drown the progress report
+    return agent
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Recommendation emails for every customer (resumable)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="run or resume the campaign")
+    run.add_argument("--output", default="campaign.jsonl")
+    run.add_argument("--category")
+    run.add_argument("--concurrency", type=int, default=CAMPAIGN_CONCURRENCY)
+    run.add_argument("--workers", type=int, default=CAMPAIGN_RENDER_WORKERS, help="render processes for very large emails (0 = inline)")
+    run.add_argument("--limit", type=int, help="stop after N customers")
+    run.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    run.add_argument("--backend", default=os.getenv("AGENT_BACKEND", "demo").lower(), choices=["demo", "llm"])
+
+    status = subparsers.add_parser("status", help="show campaign progress")
+    status.add_argument("--output", default="campaign.jsonl")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        print(f"🚀 Campaign over {len(main.CUSTOMERS_DB)} customers ({args.backend} agent, "
+              f"concurrency {args.concurrency}, {args.workers} render workers)")
+        summary = asyncio.run(run_campaign(
+            create_agent(args.backend), args.output, args.category, args.concurrency, args.workers,
+            args.limit, args.restart
+        ))
+        if summary["resumed_after"]:
+            print(f"↪️  Resumed after {summary['resumed_after']}")
+        print(f"✅ {summary['processed']} customers in {summary['elapsed_s']:.2f}s "
+              f"({summary['customers_per_s']:.1f} customers/s), {summary['errors']} errors")
+        print(f"📁 Results: {args.output} ({summary['total']} customers so far)")
+    elif args.command == "status":
+        state = load_checkpoint(args.output + ".checkpoint")
+        if not state:
+            print(f"No campaign checkpoint for {args.output}")
+            return
+        print(f"{'✅ Complete' if state.get('completed') else '⏸️  In progress'}: {state['processed']} of "
+              f"{len(main.CUSTOMERS_DB)} customers, {state['errors']} errors, "
+              f"last {state.get('last_customer_id')} "
+              f"({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(state['updated_at']))})")
+
+
+if __name__ == "__main__":
+    try:
+        main_cli()
+        sys.exit(0)
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted; run again to resume from the last checkpoint")
+        sys.exit(130)
+    except Exception as e:
+        print(f"❌ Campaign failed with error: {e}")
+        sys.exit(1)
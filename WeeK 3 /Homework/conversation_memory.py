@@ -0,0 +1,142 @@
+"""
+Conversation Memory
+===================
+Bounded multi-turn context for agent conversations (e.g. the web UI chat).
+
+Recent turns are kept verbatim up to a token budget. Turns pushed out of that
+window are folded into a rolling summary by a background task, so the context
+sent with each LLM call stays roughly constant in size (summary budget + window
+budget) however long the conversation runs, and the user never waits for the
+summarization.
+
+Agents pick up the memory of the conversation they are serving through a
+context variable, the same way token streaming works:
+
+    memory = ConversationMemory(summarize=summarize_turns)
+    result = await remembering(memory, inventory_agent.check_stock("PROD001"))
+    memory.add_turn("Check PROD001", reply_text)
+"""
+
+import asyncio
+import contextvars
+import os
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from prompt_encoding import estimate_tokens
+
+MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "600"))
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "150"))
+
+# (previous summary, turns to fold in, token budget) -> new summary
+Summarizer = Callable[[str, List[Dict[str, str]], int], Awaitable[str]]
+
+# Memory of the conversation the current task is serving (None = stateless call)
+active_memory: contextvars.ContextVar[Optional["ConversationMemory"]] = contextvars.ContextVar(
+    "active_memory", default=None
+)
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    """Cut text to roughly `max_tokens` (same 4 chars/token estimate as prompt_encoding)."""
+    limit = max_tokens * 4
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+async def extractive_summary(summary: str, turns: List[Dict[str, str]], max_tokens: int) -> str:
+    """LLM-free summarizer: first line of each turn, newest kept when over budget."""
+    lines = [line for line in summary.split("\n") if line]
+    for turn in turns:
+        first_line = turn["content"].strip().split("\n", 1)[0]
+        lines.append(f"{turn['role']}: {_clip(first_line, 40)}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return _clip("\n".join(lines), max_tokens)
+
+
+class ConversationMemory:
+    """Token-budgeted window of recent turns plus a rolling summary of older ones."""
+
+    def __init__(self, summarize: Summarizer = extractive_summary,
+                 max_tokens: int = MEMORY_MAX_TOKENS, summary_tokens: int = MEMORY_SUMMARY_TOKENS):
+        """
+        Args:
+            summarize: Coroutine folding evicted turns into the summary
+            max_tokens: Budget for verbatim recent turns
+            summary_tokens: Budget for the rolling summary
+        """
+        self.summarize = summarize
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self.turns: deque = deque()
+        self._window_tokens = 0
+        self._evicted: List[Dict[str, str]] = []
+        self._summarizing: Optional[asyncio.Task] = None
+
+    def add_turn(self, user_message: str, reply: str):
+        """Record one exchange; turns that no longer fit are summarized in the background."""
+        for role, content in (("user", user_message), ("assistant", reply)):
+            # A single turn never takes more than half the window (e.g. long emails)
+            content = _clip(content, self.max_tokens // 2)
+            self.turns.append({"role": role, "content": content})
+            self._window_tokens += estimate_tokens(content)
+
+        while self._window_tokens > self.max_tokens and len(self.turns) > 2:
+            turn = self.turns.popleft()
+            self._window_tokens -= estimate_tokens(turn["content"])
+            self._evicted.append(turn)
+
+        if self._evicted and (self._summarizing is None or self._summarizing.done()):
+            # Fresh context: the summary call must not stream into the chat or read this memory
+            self._summarizing = asyncio.create_task(self._fold(), context=contextvars.Context())
+
+    async def _fold(self):
+        while self._evicted:
+            turns, self._evicted = self._evicted, []
+            try:
+                summary = await self.summarize(self.summary, turns, self.summary_tokens)
+            except Exception:
+                summary = await extractive_summary(self.summary, turns, self.summary_tokens)
+            if summary.startswith("❌"):  # agents report LLM failures as text
+                summary = await extractive_summary(self.summary, turns, self.summary_tokens)
+            self.summary = _clip(summary, self.summary_tokens)
+
+    async def settle(self):
+        """Wait for pending summarization (tests, shutdown)."""
+        while self._summarizing is not None and not self._summarizing.done():
+            await self._summarizing
+
+    def context_messages(self) -> List[Dict[str, str]]:
+        """Chat messages to place between the system prompt and the new user message."""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        messages.extend(self.turns)
+        return messages
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+
+@contextmanager
+def use_memory(memory: Optional[ConversationMemory]):
+    """Give LLM calls made inside this block the context of `memory`."""
+    reset = active_memory.set(memory)
+    try:
+        yield memory
+    finally:
+        active_memory.reset(reset)
+
+
+async def remembering(memory: Optional[ConversationMemory], awaitable: Awaitable[Any]) -> Any:
+    """Await an agent call with `memory` active (scoped to the awaiting task, safe inside generators)."""
+    with use_memory(memory):
+        return await awaitable
+
+
+def conversation_context() -> List[Dict[str, str]]:
+    """Context messages of the active conversation ([] outside one)."""
+    memory = active_memory.get()
+    return memory.context_messages() if memory is not None else []
@@ -0,0 +1,93 @@
+"""
+Request Deadlines
+=================
+A time budget for one user request, carried through all the work it starts.
+
+The deadline is a context variable, like the token sink and the current
+workflow, so it flows from the UI handler through workflow steps and agent
+methods down to MCPToolExecutor and the LLM calls without extra parameters.
+Those I/O points await through `within_deadline`: once the budget is spent the
+pending call is cancelled (releasing its LLM slot, connection or tool session)
+and DeadlineExceeded is raised. The workflow engine turns that into a
+"timed_out" step and returns the results finished so far.
+
+Usage:
+    result = await run_with_deadline(inventory_agent.check_stock("PROD001"), seconds=30)
+"""
+
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Optional
+
+# Default budget for one UI request or CLI workflow run, in seconds (0 = no deadline)
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "120"))
+
+# time.monotonic() by which the current request must finish (None = no deadline)
+current_deadline: ContextVar[Optional[float]] = ContextVar("current_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out."""
+
+
+def deadline_after(seconds: Optional[float]) -> Optional[float]:
+    """Absolute deadline `seconds` from now, never later than the current one."""
+    deadline = current_deadline.get()
+    if seconds:
+        ends = time.monotonic() + seconds
+        deadline = ends if deadline is None else min(deadline, ends)
+    return deadline
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget (None = unlimited)."""
+    deadline = current_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Give the code inside this block (and tasks it creates) at most `seconds`."""
+    reset = current_deadline.set(deadline_after(seconds))
+    try:
+        yield
+    finally:
+        current_deadline.reset(reset)
+
+
+async def within_deadline(awaitable: Awaitable[Any]) -> Any:
+    """Await `awaitable`, cancelling it and raising DeadlineExceeded when the budget runs out."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()  # never started
+        raise DeadlineExceeded("Deadline exceeded before the call started")
+    try:
+        async with asyncio.timeout(left) as budget:
+            return await awaitable
+    except TimeoutError:
+        if budget.expired():
+            raise DeadlineExceeded(f"Deadline exceeded (budget ran out after waiting {left:.1f}s)") from None
+        raise
+
+
+async def iterate_within_deadline(iterator: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """Re-yield `iterator` (e.g. an LLM token stream), each item subject to the deadline."""
+    iterator = iterator.__aiter__()
+    while True:
+        try:
+            item = await within_deadline(iterator.__anext__())
+        except StopAsyncIteration:
+            return
+        yield item
+
+
+async def run_with_deadline(awaitable: Awaitable[Any], seconds: Optional[float] = REQUEST_TIMEOUT) -> Any:
+    """Run one request under a budget of `seconds` (scoped to the awaiting task)."""
+    with deadline(seconds):
+        return await within_deadline(awaitable)
@@ -0,0 +1,127 @@
+"""
+Chart Downsampling
+==================
+Reduces a time series to the points a chart can actually show before it is
+sent to the browser.
+
+A chart a few hundred pixels wide cannot draw years of daily (or hourly)
+buckets as separate points; sending them all only grows the figure payload
+and Plotly's render time. `downsample` keeps at most `point_budget()` points
+per series: two per pixel column of the plot area (UI_CHART_WIDTH), never more
+than UI_MAX_POINTS, and never fewer than 4 (both ends plus one bucket's min and
+max; a smaller UI_MAX_POINTS counts as 4). The first and last points are always
+kept, and no method returns more points than it is given.
+
+Methods (UI_DOWNSAMPLE):
+    minmax   one bucket per pixel column; keep each bucket's lowest and
+             highest point, so every peak and dip stays visible (default)
+    lttb     Largest-Triangle-Three-Buckets: one point per bucket, the one
+             that best preserves the line's visual shape
+    none     send every point
+
+Buckets are formed by position, which matches the x axis because rollup
+series are gap-filled (one bucket per day, week or month).
+
+Usage:
+    series = downsample(SALES_ROLLUP.query(granularity="day"), "revenue")
+"""
+
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Width of a dashboard chart's plot area, in pixels
+CHART_WIDTH = int(os.getenv("UI_CHART_WIDTH", "1200"))
+
+# Most points sent for one series, whatever the width (at least MIN_POINTS)
+MAX_POINTS = int(os.getenv("UI_MAX_POINTS", "5000"))
+
+DOWNSAMPLE_METHOD = os.getenv("UI_DOWNSAMPLE", "minmax").lower()
+
+# Smallest budget point_budget() gives: both ends plus the min and max of one bucket
+MIN_POINTS = 4
+
+
+def point_budget(width: Optional[int] = None, max_points: Optional[int] = None) -> int:
+    """Points worth sending for a chart `width` pixels wide (a min and a max per pixel column, both ends), capped."""
+    return max(MIN_POINTS, min(2 * (width or CHART_WIDTH) + 2, max_points or MAX_POINTS))
+
+
+def _ends(n: int, points: int) -> np.ndarray:
+    """First and last position, or just the first for a budget of 1 (too few points for any bucket)."""
+    return np.array([0, n - 1][:max(1, points)])
+
+
+def minmax_indices(y: np.ndarray, points: int) -> np.ndarray:
+    """Positions of the lowest and highest value in each of (points - 2) / 2 equal buckets, plus both ends."""
+    n = len(y)
+    if n <= points:
+        return np.arange(n)
+    buckets = (points - 2) // 2
+    if buckets < 1:
+        return _ends(n, points)
+    # Equal shares of the x range, i.e. one bucket per pixel column at the budget's width
+    starts = np.linspace(0, n, buckets + 1).astype(int)[:-1]
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.append(starts, n)))
+
+    picked = [[0], [n - 1]]
+    for extreme in (np.minimum, np.maximum):
+        hits = np.flatnonzero(y == extreme.reduceat(y, starts)[bucket_of])
+        # First hit per bucket (ties in a flat bucket would otherwise keep all of it)
+        picked.append(hits[np.flatnonzero(np.diff(bucket_of[hits], prepend=-1))])
+    return np.unique(np.concatenate(picked))  # sorted, and a bucket whose min is its max counts once
+
+
+def lttb_indices(y: np.ndarray, points: int) -> np.ndarray:
+    """Positions chosen by Largest-Triangle-Three-Buckets (x = position)."""
+    n = len(y)
+    if n <= points:
+        return np.arange(n)
+    if points < 3:
+        return _ends(n, points)
+    # points - 2 buckets over the interior; the last edge doubles as the final point's bucket
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    next_edges = np.append(edges[1:], n)
+    # Average of each following bucket (the third corner of the triangle)
+    sums = np.add.reduceat(y, edges)
+    next_x = (edges + next_edges - 1) / 2.0
+    next_y = sums / (next_edges - edges)
+
+    picked = np.empty(points, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cx, cy = next_x[i + 1], next_y[i + 1]
+        bx = np.arange(lo, hi)
+        area = np.abs((a - cx) * (y[lo:hi] - y[a]) - (a - bx) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+METHODS: Dict[str, Callable[[np.ndarray, int], np.ndarray]] = {
+    "minmax": minmax_indices,
+    "lttb": lttb_indices,
+}
+
+
+def downsample(series: List[Dict], key: str, points: Optional[int] = None,
+               method: Optional[str] = None) -> List[Dict]:
+    """
+    The buckets of `series` worth plotting, judged by their `key` values.
+
+    Returns the series itself when it already fits in `points` (default:
+    point_budget()); otherwise a subset of its buckets, in order and unchanged,
+    so hover details still describe real buckets.
+    """
+    method = method or DOWNSAMPLE_METHOD
+    if method != "none" and method not in METHODS:
+        raise ValueError(f"Invalid downsampling method '{method}'. Valid options: none, {', '.join(METHODS)}")
+    points = points or point_budget()
+    if method == "none" or len(series) <= points:
+        return series
+
+    y = np.fromiter((bucket[key] for bucket in series), dtype=float, count=len(series))
+    return [series[i] for i in METHODS[method](y, points).tolist()]
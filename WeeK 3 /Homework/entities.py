@@ -0,0 +1,54 @@
+"""
+Chat Entity Extraction
+======================
+Finds every product SKU, order ID and customer ID mentioned in a chat message.
+
+One precompiled pattern scans the message once and matches all three kinds,
+in any case and with an optional separator ("prod 14", "ord-002"), so
+"compare PROD001, PROD014 and PROD233" yields three SKUs. IDs are normalized
+to the stores' form, upper-case prefix and a number of at least 3 digits
+("prod 14" -> PROD014), and returned in the order they were first mentioned,
+without repeats.
+
+Usage:
+    found = extract_entities("Is ORD001 shipped? Also check prod 4 and PROD004")
+    found.orders  # ['ORD001']
+    found.skus    # ['PROD004']
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# ID prefix -> Entities field
+ENTITY_KINDS: Dict[str, str] = {"PROD": "skus", "ORD": "orders", "CUST": "customers"}
+
+# Not preceded by a word character or "-", so "WORD12" and "BENCH-ORD3" are not IDs
+ENTITY_PATTERN = re.compile(
+    r"(?<![\w-])(?P<prefix>" + "|".join(ENTITY_KINDS) + r")[-_ ]?(?P<number>\d+)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Entities:
+    """IDs found in one message, each list in order of first mention."""
+
+    skus: List[str] = field(default_factory=list)
+    orders: List[str] = field(default_factory=list)
+    customers: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.skus) + len(self.orders) + len(self.customers)
+
+
+def extract_entities(message: str) -> Entities:
+    found = Entities()
+    seen = set()
+    for match in ENTITY_PATTERN.finditer(message):
+        prefix = match["prefix"].upper()
+        entity_id = f"{prefix}{int(match['number']):03d}"
+        if entity_id not in seen:
+            seen.add(entity_id)
+            getattr(found, ENTITY_KINDS[prefix]).append(entity_id)
+    return found
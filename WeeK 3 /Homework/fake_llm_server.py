@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Fake LLM Server
+===============
+Local OpenAI-compatible chat completions endpoint for load-testing the
+OpenAI-backed agents without a network or API key.
+
+- Plain and streaming (SSE) completions, including `stream_options.include_usage`
+- Configurable latency: time to first token from a distribution, plus a delay per streamed token
+- Throughput caps: server-side concurrency (excess requests queue), RPM and TPM
+  quotas answered with 429 + Retry-After, like a real provider
+- Injected 429 / 500 failures at configurable rates
+- Deterministic output: the same prompt always gets the same text, and canned
+  responses (text or tool calls) can be matched by regex
+
+Point the agents at it with OPENAI_BASE_URL:
+
+    python fake_llm_server.py --port 8001 --latency lognormal:400:0.5 --token-ms 10 --rate-429 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=fake uv run python multi_agent_system.py
+
+Canned responses (--canned canned.json) are tried in order against the last user message:
+
+    [{"match": "ORD00[1-4]", "content": "Your order is on its way."},
+     {"match": "Daily report", "tool_calls": [{"name": "generate_sales_report", "arguments": {"period": "week"}}]}]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from prompt_encoding import estimate_tokens
+
+FILLER_WORDS = (
+    "inventory orders customers revenue stock restock priority trend segment growth margin "
+    "forecast demand supplier warehouse shipment premium loyalty insight recommend review"
+).split()
+
+
+class LatencyDistribution:
+    """Time-to-first-token sampler parsed from "fixed:MS", "uniform:LO:HI", "normal:MEAN:SD",
+    "lognormal:MEDIAN:SIGMA" or "exp:MEAN" (milliseconds)."""
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, *values = spec.split(":")
+        try:
+            params = [float(value) for value in values]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec '{spec}'") from None
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+        if expected.get(kind) != len(params):
+            raise ValueError(f"Invalid latency spec '{spec}' (e.g. fixed:200, uniform:100:400, normal:300:50, "
+                             f"lognormal:300:0.5, exp:200)")
+        self.spec = spec
+        self.kind = kind
+        self.params = params
+
+    def sample(self, rng: random.Random) -> float:
+        """Latency in seconds (never negative)."""
+        p = self.params
+        if self.kind == "fixed":
+            ms = p[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            ms = rng.gauss(p[0], p[1])
+        elif self.kind == "lognormal":
+            ms = p[0] * math.exp(rng.gauss(0, p[1]))
+        else:
+            ms = rng.expovariate(1 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, ms) / 1000
+
+
+@dataclass
+class FakeLLMProfile:
+    """Behaviour of the fake endpoint."""
+
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    token_ms: float = 0.0
+    completion_tokens: int = 60
+    max_concurrency: int = 0  # 0 = unlimited
+    rpm: int = 0
+    tpm: int = 0
+    rate_429: float = 0.0
+    rate_500: float = 0.0
+    retry_after: float = 1.0
+    canned: List[Dict[str, Any]] = field(default_factory=list)
+    seed: int = 0
+
+
+class FakeLLM:
+    """Request handling, quotas and counters behind the HTTP routes."""
+
+    def __init__(self, profile: FakeLLMProfile):
+        self.profile = profile
+        self.rng = random.Random(profile.seed)
+        self.slots = asyncio.Semaphore(profile.max_concurrency) if profile.max_concurrency > 0 else None
+        self.window: deque = deque()  # (timestamp, tokens) of requests admitted in the last minute
+        self.canned = [(re.compile(entry["match"]), entry) for entry in profile.canned]
+        self.counts = {"requests": 0, "streamed": 0, "completed": 0, "rate_limited": 0, "quota_limited": 0,
+                       "server_errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    # ---------- responses ----------
+
+    def _reply(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Deterministic assistant message for a request: canned match or generated text."""
+        messages = body.get("messages") or []
+        last_user = next((str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), "")
+        # After a tool round the model must answer, otherwise a coordinator would loop
+        may_call_tools = bool(body.get("tools")) and body.get("tool_choice") != "none" \
+            and not (messages and messages[-1].get("role") == "tool")
+
+        for pattern, entry in self.canned:
+            if not pattern.search(last_user):
+                continue
+            if "tool_calls" in entry:
+                if not may_call_tools:
+                    continue
+                return {"role": "assistant", "content": None, "tool_calls": [
+                    {"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                     "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))}}
+                    for call in entry["tool_calls"]
+                ]}
+            return {"role": "assistant", "content": entry["content"]}
+
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True, default=str).encode()).hexdigest()
+        words = random.Random(digest).choices(FILLER_WORDS, k=max(1, self.profile.completion_tokens - 4))
+        return {"role": "assistant", "content": f"Simulated response {digest[:8]}: " + " ".join(words) + "."}
+
+    @staticmethod
+    def _pieces(text: str) -> List[str]:
+        """Split text into stream deltas of about one token each."""
+        return re.findall(r"\S+\s*", text) or [text]
+
+    # ---------- quotas ----------
+
+    def _error(self, status: int, message: str, kind: str, retry_after: Optional[float] = None) -> JSONResponse:
+        headers = {"retry-after": f"{retry_after:.2f}"} if retry_after is not None else None
+        return JSONResponse({"error": {"message": message, "type": kind}}, status_code=status, headers=headers)
+
+    def _admit(self, tokens: int) -> Optional[JSONResponse]:
+        """Apply failure injection and RPM/TPM quotas; a response here rejects the request."""
+        roll = self.rng.random()
+        if roll < self.profile.rate_429:
+            self.counts["rate_limited"] += 1
+            return self._error(429, "Rate limit reached (injected)", "rate_limit_error", self.profile.retry_after)
+        if roll < self.profile.rate_429 + self.profile.rate_500:
+            self.counts["server_errors"] += 1
+            return self._error(500, "The server had an error processing your request (injected)", "server_error")
+
+        now = time.monotonic()
+        while self.window and now - self.window[0][0] >= 60:
+            self.window.popleft()
+        over_rpm = self.profile.rpm and len(self.window) >= self.profile.rpm
+        over_tpm = self.profile.tpm and sum(t for _, t in self.window) + tokens > self.profile.tpm
+        if over_rpm or over_tpm:
+            self.counts["quota_limited"] += 1
+            wait = 60 - (now - self.window[0][0]) if self.window else 1.0
+            return self._error(429, f"Rate limit reached for {'requests' if over_rpm else 'tokens'} per min",
+                               "rate_limit_error", wait)
+        self.window.append((now, tokens))
+        return None
+
+    # ---------- routes ----------
+
+    async def chat_completions(self, request: Request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return self._error(400, "Request body must be JSON", "invalid_request_error")
+        if not body.get("messages"):
+            return self._error(400, "'messages' is required", "invalid_request_error")
+
+        self.counts["requests"] += 1
+        prompt_tokens = estimate_tokens(json.dumps(body["messages"], default=str))
+        rejected = self._admit(prompt_tokens + int(body.get("max_tokens") or self.profile.completion_tokens))
+        if rejected is not None:
+            return rejected
+
+        message = self._reply(body)
+        full = self._pieces(message["content"]) if message.get("content") else []
+        pieces = full[:body["max_tokens"]] if body.get("max_tokens") else full
+        finish_reason = "tool_calls" if message.get("tool_calls") else ("length" if len(pieces) < len(full) else "stop")
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces),
+                 "total_tokens": prompt_tokens + len(pieces)}
+        meta = {"id": f"chatcmpl-{uuid.uuid4().hex[:16]}", "created": int(time.time()),
+                "model": body.get("model", "fake-model")}
+
+        if body.get("stream"):
+            self.counts["streamed"] += 1
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return StreamingResponse(self._stream(meta, message, pieces, finish_reason, usage, include_usage),
+                                     media_type="text/event-stream")
+
+        async with self._slot():
+            await asyncio.sleep(self.profile.latency.sample(self.rng) + len(pieces) * self.profile.token_ms / 1000)
+        if message.get("content"):
+            message = {**message, "content": "".join(pieces).rstrip()}
+        self.counts["completed"] += 1
+        return JSONResponse({**meta, "object": "chat.completion", "usage": usage, "choices": [
+            {"index": 0, "message": message, "finish_reason": finish_reason}
+        ]})
+
+    async def _stream(self, meta: Dict[str, Any], message: Dict[str, Any], pieces: List[str],
+                      finish_reason: str, usage: Dict[str, int], include_usage: bool):
+        def event(choices: List[Dict[str, Any]], **extra) -> str:
+            return f"data: {json.dumps({**meta, 'object': 'chat.completion.chunk', 'choices': choices, **extra})}\n\n"
+
+        async with self._slot():
+            await asyncio.sleep(self.profile.latency.sample(self.rng))
+            yield event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            if message.get("tool_calls"):
+                calls = [{**call, "index": i} for i, call in enumerate(message["tool_calls"])]
+                yield event([{"index": 0, "delta": {"tool_calls": calls}, "finish_reason": None}])
+            for piece in pieces:
+                if self.profile.token_ms:
+                    await asyncio.sleep(self.profile.token_ms / 1000)
+                yield event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+            yield event([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+            if include_usage:
+                yield event([], usage=usage)
+            yield "data: [DONE]\n\n"
+        self.counts["completed"] += 1
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of the server's request slots (requests beyond --max-concurrency queue here)."""
+        if self.slots is not None:
+            await self.slots.acquire()
+        self.counts["in_flight"] += 1
+        self.counts["max_in_flight"] = max(self.counts["max_in_flight"], self.counts["in_flight"])
+        try:
+            yield
+        finally:
+            self.counts["in_flight"] -= 1
+            if self.slots is not None:
+                self.slots.release()
+
+    async def models(self, request: Request):
+        return JSONResponse({"object": "list", "data": [{"id": "fake-model", "object": "model", "owned_by": "local"}]})
+
+    async def stats(self, request: Request):
+        return JSONResponse(self.counts)
+
+
+def create_app(profile: FakeLLMProfile) -> Starlette:
+    """ASGI app serving /v1/chat/completions, /v1/models and /stats for `profile`."""
+    fake = FakeLLM(profile)
+    return Starlette(routes=[
+        Route("/v1/chat/completions", fake.chat_completions, methods=["POST"]),
+        Route("/v1/models", fake.models, methods=["GET"]),
+        Route("/stats", fake.stats, methods=["GET"]),
+    ])
+
+
+def load_canned(path: Optional[str]) -> List[Dict[str, Any]]:
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as f:
+        canned = json.load(f)
+    for entry in canned:
+        if "match" not in entry or ("content" not in entry and "tool_calls" not in entry):
+            raise ValueError(f"Canned response needs 'match' and 'content' or 'tool_calls': {entry}")
+    return canned
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="time to first token: fixed:MS, uniform:LO:HI, normal:MEAN:SD, lognormal:MEDIAN:SIGMA, exp:MEAN")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="delay per completion token")
+    parser.add_argument("--completion-tokens", type=int, default=60, help="length of generated responses")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="requests served at once (0 = unlimited)")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="tokens per minute before 429s (0 = unlimited)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on injected 429s")
+    parser.add_argument("--canned", help="JSON file of canned responses")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profile = FakeLLMProfile(
+        latency=LatencyDistribution(args.latency),
+        token_ms=args.token_ms,
+        completion_tokens=args.completion_tokens,
+        max_concurrency=args.max_concurrency,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        rate_429=args.rate_429,
+        rate_500=args.rate_500,
+        retry_after=args.retry_after,
+        canned=load_canned(args.canned),
+        seed=args.seed
+    )
+    print(f"🧪 Fake LLM server on http://{args.host}:{args.port}/v1 (latency {args.latency}, "
+          f"429 {args.rate_429:.0%}, 500 {args.rate_500:.0%})")
+    uvicorn.run(create_app(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    try:
+        main_cli()
+        sys.exit(0)
+    except Exception as e:
+        print(f"❌ Fake LLM server failed with error: {e}")
+        sys.exit(1)
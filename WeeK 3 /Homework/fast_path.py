@@ -0,0 +1,113 @@
+"""
+Tiered Inference Fast Path
+==========================
+Deterministic answers for clear-cut agent inputs, in front of the LLM.
+
+Routine checks ("PROD004 is out of stock", "ORD001 has shipped") have one
+correct answer that a rule produces in microseconds. Stock answers come from
+the same business rules as the simulated agents (rules.json, see
+rule_engine.py), applied to the status the inventory tool derives from
+main.LOW_STOCK_LEVEL, so there is one copy of the stock thresholds and messages. The router asks the rule
+for the input's kind first and only escalates to the LLM when no rule is
+confident (borderline stock levels, unknown order states, unparseable data).
+Per-agent counts show how often each agent still needs the LLM.
+
+Usage:
+    analysis = await router.route("Inventory Agent", "inventory", tool_result,
+                                  escalate=lambda: agent.call_llm(prompt))
+"""
+
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from main import LOW_STOCK_LEVEL
+from prompt_encoding import parse_tool_result
+from rule_engine import RuleEngine
+from tool_results import ToolOutput, is_error
+
+# In-stock levels at or above this are unremarkable; from LOW_STOCK_LEVEL up to it the LLM judges
+HEALTHY_STOCK_LEVEL = max(LOW_STOCK_LEVEL, int(os.getenv("FAST_PATH_HEALTHY_STOCK", "20")))
+
+STOCK_RULES = RuleEngine.from_file()
+# Rules in rules.json whose answer needs no judgement
+CONFIDENT_STOCK_RULES = {"out_of_stock", "low_stock"}
+
+ORDER_STATUS_MESSAGES = {
+    "pending": "We're preparing your order for shipment.",
+    "processing": "Your order is being processed by our warehouse team.",
+    "shipped": "You should receive tracking information shortly.",
+    "delivered": "Your order has been successfully delivered!",
+    "cancelled": "The order was cancelled; any payment will be refunded.",
+}
+
+
+def assess_inventory(data: ToolOutput) -> Optional[str]:
+    """Assessment of a check_inventory_status result, or None when it needs judgement."""
+    if is_error(data):
+        return data  # lookup failed: nothing for a model to analyze
+    item = parse_tool_result(data)
+    if item is None or not isinstance(item.get("stock_quantity"), int):
+        return None
+
+    stock = item["stock_quantity"]
+    name = f"{item.get('product_name', 'Item')} ({item.get('sku', '?')})"
+    rule = STOCK_RULES.match(item)
+    if rule is not None and rule.name in CONFIDENT_STOCK_RULES:
+        return f"{name}: {rule.render(item)}"
+    if stock >= HEALTHY_STOCK_LEVEL:
+        return (f"✅ {name}: {stock} units in stock at {item.get('warehouse_location', 'the warehouse')}. "
+                f"Status nominal, no action needed.")
+    return None
+
+
+def assess_order(data: ToolOutput) -> Optional[str]:
+    """Customer reply for a retrieved order in a standard state, or None otherwise."""
+    if is_error(data):
+        return data
+    order = parse_tool_result(data)
+    if order is None:
+        return None
+    message = ORDER_STATUS_MESSAGES.get(str(order.get("status", "")).lower())
+    if message is None:
+        return None
+    return (f"Thank you for contacting us about order {order.get('order_id')}. "
+            f"Your order of {order.get('item_count')} item(s) totalling {order.get('total_amount')}, "
+            f"placed on {order.get('order_date')}, is currently {order['status']}. {message}")
+
+
+# Input kind -> rule producing a confident answer or None
+RULES: Dict[str, Callable[[ToolOutput], Optional[str]]] = {
+    "inventory": assess_inventory,
+    "order": assess_order,
+}
+
+
+class TieredRouter:
+    """Answer with a rule when one is confident; otherwise escalate to the LLM."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    async def route(self, agent: str, kind: str, data: ToolOutput, escalate: Callable[[], Awaitable[str]]) -> str:
+        rule = RULES.get(kind)
+        answer = rule(data) if self.enabled and rule is not None else None
+
+        counts = self.counts.setdefault(agent, {"rules": 0, "escalated": 0})
+        if answer is not None:
+            counts["rules"] += 1
+            return answer
+        counts["escalated"] += 1
+        return await escalate()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-agent rule answers, escalations and escalation rate."""
+        return {
+            agent: {**counts, "escalation_rate": counts["escalated"] / (counts["rules"] + counts["escalated"])}
+            for agent, counts in self.counts.items()
+        }
+
+
+def router_from_env() -> TieredRouter:
+    """Router configured by FAST_PATH (on by default; off sends everything to the LLM)."""
+    return TieredRouter(enabled=os.getenv("FAST_PATH", "on").lower() not in ("0", "off", "false", "no"))
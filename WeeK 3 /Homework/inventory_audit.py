@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Streaming Inventory Audit
+=========================
+Inventory audits as a stream of per-SKU results with running totals, for
+catalogs too large to collect into one report.
+
+`stream_audit` turns an agent's (sku, inventory result) stream into
+AuditProgress updates as the checks finish (in SKU order, with the checks
+running concurrently underneath). Nothing is kept per SKU: an update carries
+that SKU's line and the counts so far, so the CLI below and the web UI can show
+progress for a million-SKU catalog in constant memory. The agents'
+audit_inventory report is built on the same stream.
+
+Usage:
+    python inventory_audit.py [--skus PROD001,PROD004] [--concurrency 64] [--all-lines]
+
+    async for progress in inventory_agent.stream_audit(iter_catalog_skus()):
+        print(progress.line, progress.summary())
+
+AGENT_BACKEND=llm uses the OpenAI-backed agent (default: the simulated one).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+import main
+from prompt_encoding import parse_tool_result
+from tool_results import ToolOutput
+
+# Kinds of audit result; everything except "ok" needs attention
+OK, LOW_STOCK, OUT_OF_STOCK, ERROR = "ok", "low_stock", "out_of_stock", "error"
+
+
+@dataclass
+class AuditProgress:
+    """One audited SKU and the audit's running totals up to and including it."""
+
+    sku: str
+    result: ToolOutput
+    kind: str
+    audited: int
+    out_of_stock: int
+    low_stock: int
+    errors: int
+
+    @property
+    def line(self) -> str:
+        """One-line finding for this SKU."""
+        data = parse_tool_result(self.result)
+        if data is None:
+            return f"{self.sku}: {self.result}"
+        return f"{data.get('sku')}: {data.get('status')} - {data.get('product_name')} ({data.get('stock_quantity')} units)"
+
+    @property
+    def needs_attention(self) -> bool:
+        return self.kind != OK
+
+    def summary(self, total: Optional[int] = None) -> str:
+        done = f"{self.audited}/{total}" if total else str(self.audited)
+        return (f"📋 {done} audited | ⛔ {self.out_of_stock} out of stock | "
+                f"⚠️ {self.low_stock} low stock | ❌ {self.errors} errors")
+
+
+def classify(result: ToolOutput) -> str:
+    data = parse_tool_result(result)
+    if data is None:
+        return ERROR
+    status = str(data.get("status", ""))
+    if "Out of Stock" in status:
+        return OUT_OF_STOCK
+    if "Low Stock" in status:
+        return LOW_STOCK
+    return OK
+
+
+async def stream_audit(results: AsyncIterator[Tuple[str, ToolOutput]]) -> AsyncIterator[AuditProgress]:
+    """Running audit over an agent's stream_inventory_status results."""
+    counts = {OK: 0, LOW_STOCK: 0, OUT_OF_STOCK: 0, ERROR: 0}
+    audited = 0
+    async for sku, result in results:
+        kind = classify(result)
+        counts[kind] += 1
+        audited += 1
+        yield AuditProgress(sku, result, kind, audited, counts[OUT_OF_STOCK], counts[LOW_STOCK], counts[ERROR])
+
+
+def iter_catalog_skus() -> Iterator[str]:
+    """Every SKU in the inventory store, in order (a snapshot of the keys, so writes during the audit are safe)."""
+    return iter(sorted(main.INVENTORY_DB))
+
+
+def create_agent(backend: str):
+    """InventoryAgent for AGENT_BACKEND (demo or llm), with per-call logging muted."""
+    if backend == "llm":
+        from multi_agent_system import InventoryAgent
+    else:
+        from multi_agent_demo import InventoryAgent
+    agent = InventoryAgent()
+    agent.log = lambda message: None
+    return agent
+
+
+async def run_audit(agent, skus: Optional[list] = None, concurrency: Optional[int] = None,
+                    all_lines: bool = False, progress_every: float = 2.0) -> Optional[AuditProgress]:
+    """Print each finding (every SKU with all_lines) and the running totals as the audit streams."""
+    total = len(skus) if skus else len(main.INVENTORY_DB)
+    started = last_progress = time.perf_counter()
+    progress = None
+    async for progress in agent.stream_audit(skus or iter_catalog_skus(), concurrency):
+        if all_lines or progress.needs_attention:
+            print(progress.line)
+        now = time.perf_counter()
+        if progress_every and now - last_progress >= progress_every:
+            last_progress = now
+            print(f"   {progress.summary(total)} ({progress.audited / (now - started):,.0f} SKUs/s)")
+    return progress
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Streaming inventory audit over the catalog")
+    parser.add_argument("--skus", help="comma-separated SKUs (default: the whole catalog)")
+    parser.add_argument("--concurrency", type=int, help="checks in flight at once (default: TOOL_MAX_CONCURRENCY)")
+    parser.add_argument("--all-lines", action="store_true", help="print every SKU, not only the ones needing attention")
+    parser.add_argument("--progress-every", type=float, default=2.0, help="seconds between running totals (0 = off)")
+    parser.add_argument("--backend", default=os.getenv("AGENT_BACKEND", "demo").lower(), choices=["demo", "llm"])
+    args = parser.parse_args()
+
+    skus = [sku.strip().upper() for sku in args.skus.split(",") if sku.strip()] if args.skus else None
+    print(f"🚀 Auditing {len(skus) if skus else len(main.INVENTORY_DB)} SKUs ({args.backend} agent)")
+    started = time.perf_counter()
+    final = asyncio.run(run_audit(create_agent(args.backend), skus, args.concurrency,
+                                  args.all_lines, args.progress_every))
+    if final is None:
+        print("Nothing to audit")
+        return
+    print(f"✅ Audit complete in {time.perf_counter() - started:.2f}s: {final.summary()}")
+
+
+if __name__ == "__main__":
+    try:
+        main_cli()
+        sys.exit(0)
+    except KeyboardInterrupt:
+        print("\n⏸️  Audit interrupted")
+        sys.exit(130)
+    except Exception as e:
+        print(f"❌ Audit failed with error: {e}")
+        sys.exit(1)
@@ -0,0 +1,238 @@
+"""
+LLM Response Cache
+==================
+Two-tier cache for chat completion responses used by the multi-agent system.
+
+- Memory tier: small LRU (OrderedDict) for the hottest prompts
+- Disk tier: SQLite file that survives restarts, bounded by total size; read
+  in worker threads and written by one background thread, off the event loop
+
+Entries are keyed on everything that determines a completion (model, system
+prompt, user message and generation parameters), expire after a TTL, and record
+how long the original LLM call took so hits can report the latency they saved.
+"""
+
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for one agent."""
+
+    hits: int = 0
+    misses: int = 0
+    latency_saved: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "latency_saved_s": round(self.latency_saved, 3),
+        }
+
+
+class LLMResponseCache:
+    """
+    In-memory LRU in front of an on-disk SQLite store, both with TTL expiry.
+
+    Only the memory tier runs on the event loop. A memory miss reads the disk in
+    a worker thread (`await get`), and every disk write (stores, access times,
+    evictions) goes to one background writer thread that applies whatever has
+    queued up in a single transaction, so agents never wait on SQLite or fsync.
+    """
+
+    # Most queued writes applied in one transaction
+    WRITE_BATCH = 256
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 3600.0,
+                 max_memory_entries: int = 512, max_disk_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.stats: Dict[str, CacheStats] = {}
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (response, latency, created)
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()  # disk reads (worker threads) vs the writer thread
+        self._writes: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._disk_bytes = 0
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, latency REAL NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._db.commit()
+            self._writes.put(("prune", time.time()))
+            threading.Thread(target=self._write_loop, name="llm-cache-writer", daemon=True).start()
+            atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_message: str, params: Dict[str, Any]) -> str:
+        """Stable key over every input that determines a completion."""
+        payload = json.dumps([model, system_prompt, user_message, params], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _agent_stats(self, agent: str) -> CacheStats:
+        stats = self.stats.get(agent)
+        if stats is None:
+            stats = self.stats[agent] = CacheStats()
+        return stats
+
+    def _remember(self, key: str, entry: tuple):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str, agent: str = "default") -> Optional[str]:
+        """Return the cached response for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        stats = self._agent_stats(agent)
+
+        entry = self._memory.get(key)
+        if entry is not None and now - entry[2] > self.ttl:
+            del self._memory[key]
+            entry = None
+        if entry is not None:
+            self._memory.move_to_end(key)
+        elif self._db is not None:
+            entry = await asyncio.to_thread(self._disk_get, key, now)
+            if entry is not None:
+                self._remember(key, entry)
+                self._writes.put(("touch", key, now))
+
+        if entry is None:
+            stats.misses += 1
+            return None
+
+        stats.hits += 1
+        stats.latency_saved += entry[1]
+        return entry[0]
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT response, latency, created FROM responses WHERE key = ? AND created >= ?",
+                (key, now - self.ttl)
+            ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def set(self, key: str, response: str, latency: float):
+        """Store a fresh response along with the latency it took to produce (written to disk in the background)."""
+        now = time.time()
+        self._remember(key, (response, latency, now))
+        if self._db is not None:
+            self._writes.put(("store", key, response, latency, now))
+
+    def _write_loop(self):
+        """Background writer: apply queued writes in batches, one commit per batch."""
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < self.WRITE_BATCH:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            done = [op[1] for op in batch if op[0] == "flush"]
+            with self._db_lock:
+                try:
+                    for op in batch:
+                        self._apply(op)
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    # The memory tier still has these entries; only their persistence is lost
+                    self._db.rollback()
+                    print(f"⚠️  LLM cache: disk write failed ({e}); {len(batch)} queued writes dropped")
+            for event in done:
+                event.set()
+
+    def _apply(self, op: tuple):
+        kind = op[0]
+        if kind == "store":
+            _, key, response, latency, now = op
+            size = len(key) + len(response.encode("utf-8"))
+            previous = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, latency, created, accessed, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, latency, now, now, size)
+            )
+            self._disk_bytes += size - (previous[0] if previous else 0)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune_disk(now)
+        elif kind == "touch":
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (op[2], op[1]))
+        elif kind == "prune":
+            self._prune_disk(op[1])
+        elif kind == "clear":
+            self._db.execute("DELETE FROM responses")
+            self._disk_bytes = 0
+
+    def _prune_disk(self, now: float):
+        """Drop expired rows, then least recently used rows until under the size cap."""
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+
+        # Evict down to 90% of the cap so we don't prune on every insert
+        target = self.max_disk_bytes * 0.9
+        evicted = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if self._disk_bytes <= target:
+                break
+            evicted.append((key,))
+            self._disk_bytes -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def flush(self, timeout: Optional[float] = 10.0):
+        """Block until the writes queued so far are committed (used at exit and in tests)."""
+        if self._db is None:
+            return
+        done = threading.Event()
+        self._writes.put(("flush", done))
+        done.wait(timeout)
+
+    def clear(self):
+        """Remove every cached response from both tiers."""
+        self._memory.clear()
+        if self._db is not None:
+            self._writes.put(("clear",))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-agent hit rate and latency saved."""
+        return {agent: stats.to_dict() for agent, stats in self.stats.items()}
+
+
+def cache_from_env() -> Optional[LLMResponseCache]:
+    """Build the cache configured by LLM_CACHE_* environment variables (None when disabled)."""
+    if os.getenv("LLM_CACHE", "on").lower() in ("0", "off", "false", "no"):
+        return None
+    return LLMResponseCache(
+        path=os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3") or None,
+        ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+        max_memory_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512")),
+        max_disk_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024),
+    )
@@ -0,0 +1,213 @@
+"""
+LLM Record / Replay
+===================
+Cassettes of chat completion traffic, so the OpenAI-backed agents and
+workflows can run offline (CI, benchmarks) with deterministic responses.
+
+- record: requests go to the real endpoint and every request/response pair is
+  appended to the cassette (JSONL) together with its timing
+- replay: responses come from the cassette, with no network access or API
+  key, and can optionally take the recorded time (LLM_CASSETTE_LATENCY=1)
+
+The cassette sits in the HTTP client's transport, so plain and streaming
+completions, coordinator tool calls and retried 429s are all captured the
+same way. Identical requests are replayed in the order they were recorded.
+
+Usage:
+    LLM_CASSETTE_MODE=record LLM_CASSETTE=workflows.jsonl uv run python multi_agent_system.py
+    LLM_CASSETTE_MODE=replay LLM_CASSETTE=workflows.jsonl uv run python multi_agent_system.py
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+CASSETTE_MODES = ("off", "record", "replay")
+CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.getenv("LLM_CASSETTE", "llm_cassette.jsonl")
+
+if CASSETTE_MODE not in CASSETTE_MODES:
+    raise ValueError(f"Unknown LLM_CASSETTE_MODE '{CASSETTE_MODE}' (expected one of: {', '.join(CASSETTE_MODES)})")
+
+# Timestamps tools embed in their results (e.g. a sales report's generated_at) would make
+# every re-run of a workflow a different request, so they are ignored when matching
+TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?")
+
+# Response headers worth keeping: the body type and the retry hints the rate limiter honours
+RECORDED_HEADERS = ("content-type", "retry-after", "retry-after-ms")
+
+
+def request_key(method: str, path: str, body: bytes) -> str:
+    """Stable identity of a request (JSON bodies compared with sorted keys, timestamps masked)."""
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True)
+    except ValueError:
+        canonical = body.decode("utf-8", "replace")
+    canonical = TIMESTAMP.sub("<timestamp>", canonical)
+    return hashlib.sha256(f"{method} {path}\n{canonical}".encode()).hexdigest()
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Pass a response body through while keeping a copy; saved once fully read."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_complete):
+        self._stream = stream
+        self._on_complete = on_complete
+        self._chunks: List[bytes] = []
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._chunks.append(chunk)
+            yield chunk
+        # Bodies abandoned half way (client gave up) are not worth replaying
+        self._on_complete(b"".join(self._chunks))
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    """Recorded body, streamed event by event with an optional pause between events."""
+
+    def __init__(self, events: List[bytes], pause_s: float):
+        self._events = events
+        self._pause_s = pause_s
+
+    async def __aiter__(self):
+        for i, event in enumerate(self._events):
+            if i and self._pause_s:
+                await asyncio.sleep(self._pause_s)
+            yield event
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records LLM traffic to, or replays it from, a JSONL cassette."""
+
+    def __init__(self, path: str, mode: str, inner: Optional[httpx.AsyncBaseTransport] = None,
+                 latency_scale: float = 0.0):
+        """
+        Args:
+            path: Cassette file (JSONL, one request/response pair per line)
+            mode: "record" or "replay"
+            inner: Transport that reaches the real endpoint (record mode)
+            latency_scale: Replay delay as a multiple of the recorded latency (0 = instant)
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected record or replay)")
+        self.path = path
+        self.mode = mode
+        self.inner = inner or httpx.AsyncHTTPTransport()
+        self.latency_scale = latency_scale
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.entries.setdefault(entry["key"], []).append(entry)
+                    except (KeyError, ValueError):
+                        continue  # damaged line from an interrupted recording
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"LLM cassette '{self.path}' not found (record one with LLM_CASSETTE_MODE=record)"
+            ) from None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        key = request_key(request.method, request.url.path, body)
+        if self.mode == "replay":
+            return await self._replay(key, request)
+        return await self._record(key, request, body)
+
+    async def _record(self, key: str, request: httpx.Request, body: bytes) -> httpx.Response:
+        # Uncompressed bodies, so the cassette stays readable and replays without decoding
+        request.headers["Accept-Encoding"] = "identity"
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        first_byte_s = time.perf_counter() - started
+
+        def save(content: bytes):
+            entry = {
+                "key": key,
+                "method": request.method,
+                "path": request.url.path,
+                "request": json.loads(body) if body else None,
+                "status": response.status_code,
+                "headers": {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+                "body": content.decode("utf-8", "replace"),
+                "first_byte_s": round(first_byte_s, 4),
+                "latency_s": round(time.perf_counter() - started, 4),
+                "recorded_at": time.time(),
+            }
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self.recorded += 1
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, save),
+            extensions=response.extensions
+        )
+
+    async def _replay(self, key: str, request: httpx.Request) -> httpx.Response:
+        entries = self.entries.get(key)
+        if not entries:
+            self.misses += 1
+            # 404 is not retried, so a miss surfaces at once as the agent's "❌ Error calling LLM"
+            return httpx.Response(404, request=request, json={"error": {
+                "message": f"No recorded response for this request in cassette '{self.path}'",
+                "type": "cassette_miss"
+            }})
+
+        # Repeated identical requests get the recorded responses in order (the last one repeats)
+        index = self._served.get(key, 0)
+        self._served[key] = index + 1
+        entry = entries[min(index, len(entries) - 1)]
+        self.replayed += 1
+
+        content = entry["body"].encode()
+        events = [content]
+        if entry["headers"].get("content-type", "").startswith("text/event-stream"):
+            events = [event + b"\n\n" for event in content.split(b"\n\n") if event.strip()]
+
+        pause_s = 0.0
+        if self.latency_scale:
+            await asyncio.sleep(entry["first_byte_s"] * self.latency_scale)
+            if len(events) > 1:
+                pause_s = (entry["latency_s"] - entry["first_byte_s"]) * self.latency_scale / (len(events) - 1)
+
+        return httpx.Response(entry["status"], headers=entry["headers"], stream=_ReplayStream(events, pause_s),
+                              request=request)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "recorded": self.recorded, "replayed": self.replayed, "misses": self.misses}
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+def cassette_from_env(inner: httpx.AsyncBaseTransport) -> Optional[CassetteTransport]:
+    """Build the transport configured by LLM_CASSETTE_MODE / LLM_CASSETTE / LLM_CASSETTE_LATENCY (None when off)."""
+    if CASSETTE_MODE == "off":
+        return None
+    return CassetteTransport(
+        CASSETTE_PATH,
+        CASSETTE_MODE,
+        inner=inner,
+        latency_scale=float(os.getenv("LLM_CASSETTE_LATENCY", "0"))
+    )
@@ -9,17 +9,41 @@ This MCP server provides enterprise-level tools for:
 - Customer analytics and segmentation
 - Product recommendations
 - Sales reporting and analytics
+- Sales time-series rollups for dashboards
+- Change notifications and running aggregates for live dashboards
+
+Tool functions return typed results (tool_results.py) to in-process callers;
+the MCP server serializes them to JSON text only when answering a client.
 
 Author: Mohammed (AI Agent Engineering - Week 3 Homework)
 """
 
 from mcp.server.fastmcp import FastMCP
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
-import json
-
-# Initialize MCP server
-mcp = FastMCP("ecommerce-mcp-server")
+from typing import Dict, List, Optional, Set, Union
+from collections import deque
+from datetime import date, datetime, timedelta
+import bisect
+import functools
+import inspect
+import os
+
+from tool_results import (
+    CustomerAnalytics,
+    InventoryStatus,
+    OrderDetails,
+    ProductRecommendations,
+    SalesReport,
+    SalesSeries,
+    to_text,
+)
+
+# Initialize MCP server (transport settings only matter for `python main.py`)
+mcp = FastMCP(
+    "ecommerce-mcp-server",
+    host=os.getenv("MCP_HOST", "127.0.0.1"),
+    port=int(os.getenv("MCP_PORT", "8000")),
+    log_level=os.getenv("MCP_LOG_LEVEL", "INFO")
+)
 
 # Mock database - In production, these would connect to real databases
 INVENTORY_DB = {
@@ -44,8 +68,288 @@ CUSTOMERS_DB = {
 }
 
 
-@mcp.tool()
-async def check_inventory_status(sku: str) -> str:
+@functools.lru_cache(maxsize=4096)
+def _period_label(day: int) -> str:
+    """ISO label for a date ordinal (cached for ~11 years of days; charts re-render the same days constantly)."""
+    return date.fromordinal(day).isoformat()
+
+
+class SalesRollup:
+    """
+    Incrementally maintained time-series rollup of sales.
+
+    Keeps revenue, order count and units sold per day, both per product category
+    and across all categories. Orders are folded in as they are recorded (and
+    backed out when cancelled), so time-series queries never rescan ORDERS_DB.
+    Days are stored as date ordinals in a sorted index, which turns a range lookup
+    into two binary searches over at most a few thousand entries for years of history.
+    """
+
+    GRANULARITIES = ("day", "week", "month")
+
+    def __init__(self, inventory: Optional[Dict[str, Dict]] = None):
+        self.inventory = inventory if inventory is not None else INVENTORY_DB
+        self._days: List[int] = []
+        self._totals: Dict[int, List[float]] = {}
+        self._by_category: Dict[int, Dict[str, List[float]]] = {}
+        self._grand = [0.0, 0, 0]  # revenue, orders, units over all days
+
+    def _bucket(self, table: Dict, key) -> List[float]:
+        bucket = table.get(key)
+        if bucket is None:
+            bucket = table[key] = [0.0, 0, 0]
+        return bucket
+
+    def _apply(self, order: Dict, sign: int):
+        day = date.fromisoformat(order["date"]).toordinal()
+        if day not in self._totals:
+            bisect.insort(self._days, day)
+            self._by_category[day] = {}
+
+        # Split the order total across categories by list price so per-category
+        # revenue always adds up to the order total.
+        category_units: Dict[str, int] = {}
+        category_value: Dict[str, float] = {}
+        for sku in order["items"]:
+            product = self.inventory.get(sku, {})
+            category = product.get("category", "Unknown")
+            category_units[category] = category_units.get(category, 0) + 1
+            category_value[category] = category_value.get(category, 0.0) + product.get("price", 0.0)
+
+        list_value = sum(category_value.values())
+        totals = self._bucket(self._totals, day)
+        totals[0] += sign * order["total"]
+        totals[1] += sign
+        totals[2] += sign * len(order["items"])
+        self._grand[0] += sign * order["total"]
+        self._grand[1] += sign
+        self._grand[2] += sign * len(order["items"])
+
+        for category, units in category_units.items():
+            share = category_value[category] / list_value if list_value else units / len(order["items"])
+            bucket = self._bucket(self._by_category[day], category)
+            bucket[0] += sign * order["total"] * share
+            bucket[1] += sign
+            bucket[2] += sign * units
+
+    def add_order(self, order: Dict):
+        """Fold a new order into the rollup."""
+        self._apply(order, 1)
+
+    def remove_order(self, order: Dict):
+        """Back an order out of the rollup (e.g. when it is cancelled)."""
+        self._apply(order, -1)
+
+    def totals(self) -> Dict:
+        """Revenue, order count and units over all recorded (non-cancelled) orders."""
+        revenue, orders, units = self._grand
+        return {"revenue": round(revenue, 2), "orders": orders, "units": units}
+
+    @staticmethod
+    def _bucket_start(day: int, granularity: str) -> int:
+        if granularity == "week":
+            return day - (day + 6) % 7  # Monday of that week
+        if granularity == "month":
+            return date.fromordinal(day).replace(day=1).toordinal()
+        return day
+
+    @staticmethod
+    def _next_bucket(start: int, granularity: str) -> int:
+        if granularity == "week":
+            return start + 7
+        if granularity == "month":
+            d = date.fromordinal(start)
+            return (date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)).toordinal()
+        return start + 1
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None,
+              granularity: str = "day", category: Optional[str] = None) -> List[Dict]:
+        """
+        Return a gap-filled series of buckets between two ISO dates (inclusive).
+
+        Each bucket is {"period", "revenue", "orders", "units"}, where period is the
+        ISO date the bucket starts on. Missing bounds default to the first/last day
+        with sales.
+        """
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"Invalid granularity '{granularity}'. Valid options: {', '.join(self.GRANULARITIES)}")
+        if not self._days and (start is None or end is None):
+            return []
+
+        first = date.fromisoformat(start).toordinal() if start else self._days[0]
+        last = date.fromisoformat(end).toordinal() if end else self._days[-1]
+        if first > last:
+            return []
+
+        buckets: Dict[int, List[float]] = {}
+        lo = bisect.bisect_left(self._days, first)
+        hi = bisect.bisect_right(self._days, last)
+        for day in self._days[lo:hi]:
+            values = self._totals[day] if category is None else self._by_category[day].get(category)
+            if not values:
+                continue
+            key = self._bucket_start(day, granularity)
+            acc = buckets.get(key)
+            if acc is None:
+                buckets[key] = list(values)
+            else:
+                acc[0] += values[0]
+                acc[1] += values[1]
+                acc[2] += values[2]
+
+        series = []
+        empty = (0.0, 0, 0)
+        key = self._bucket_start(first, granularity)
+        while key <= last:
+            revenue, orders, units = buckets.get(key, empty)
+            series.append({
+                "period": _period_label(key),
+                "revenue": round(revenue, 2),
+                "orders": orders,
+                "units": units,
+            })
+            key = self._next_bucket(key, granularity)
+
+        return series
+
+
+SALES_ROLLUP = SalesRollup()
+for _order in ORDERS_DB.values():
+    if _order["status"] != "cancelled":
+        SALES_ROLLUP.add_order(_order)
+
+
+# Below this stock level a product is "Low Stock" (see check_inventory_status)
+LOW_STOCK_LEVEL = 10
+
+
+def stock_status(stock: int) -> str:
+    """Stock status key of a stock level: out_of_stock, low_stock or in_stock."""
+    if stock == 0:
+        return "out_of_stock"
+    return "low_stock" if stock < LOW_STOCK_LEVEL else "in_stock"
+
+
+class ChangeFeed:
+    """
+    Change notifications for the data store.
+
+    Every write bumps its table's version and logs the key it touched. Readers
+    such as the dashboard compare versions to see whether anything changed since
+    they last looked (an O(1) check), and ask which records changed so they can
+    update only those. The log is bounded: a reader that falls further behind
+    than `log_size` changes is told to rebuild instead.
+    """
+
+    def __init__(self, log_size: int = 10_000):
+        self._versions: Dict[str, int] = {}
+        self._log: Dict[str, deque] = {}  # table -> (version, key), oldest first
+        self.log_size = log_size
+
+    def changed(self, table: str, key: Optional[str] = None):
+        version = self._versions[table] = self._versions.get(table, 0) + 1
+        log = self._log.get(table)
+        if log is None:
+            log = self._log[table] = deque(maxlen=self.log_size)
+        log.append((version, key))
+
+    def version(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    def changes_since(self, table: str, version: int) -> Optional[Set[str]]:
+        """Keys changed after `version`, or None when the log no longer reaches back that far."""
+        if version >= self.version(table):
+            return set()
+        log = self._log.get(table)
+        if not log or log[0][0] > version + 1:
+            return None  # the changes right after `version` were already dropped
+        keys = set()
+        for logged, key in reversed(log):
+            if logged <= version:
+                break
+            if key is None:
+                return None  # a table-wide change
+            keys.add(key)
+        return keys
+
+
+class StoreStats:
+    """Products per stock status and customers per segment, kept current on every write."""
+
+    def __init__(self):
+        self.stock_status: Dict[str, int] = {"in_stock": 0, "low_stock": 0, "out_of_stock": 0}
+        self.segments: Dict[str, int] = {}
+
+    def count_product(self, product: Dict, sign: int = 1):
+        self.stock_status[stock_status(product["stock"])] += sign
+
+    def count_customer(self, customer: Dict, sign: int = 1):
+        self.segments[customer["segment"]] = self.segments.get(customer["segment"], 0) + sign
+
+
+STORE_CHANGES = ChangeFeed()
+STORE_STATS = StoreStats()
+for _product in INVENTORY_DB.values():
+    STORE_STATS.count_product(_product)
+for _customer in CUSTOMERS_DB.values():
+    STORE_STATS.count_customer(_customer)
+
+
+def upsert_product(product: Dict):
+    """Insert or replace a product, keeping the stock aggregates and change feed in sync."""
+    previous = INVENTORY_DB.get(product["sku"])
+    if previous is not None:
+        STORE_STATS.count_product(previous, -1)
+    INVENTORY_DB[product["sku"]] = product
+    STORE_STATS.count_product(product)
+    STORE_CHANGES.changed("inventory", product["sku"])
+
+
+def set_stock(sku: str, stock: int):
+    """Change a product's stock level."""
+    upsert_product({**INVENTORY_DB[sku], "stock": stock})
+
+
+def upsert_customer(customer: Dict):
+    """Insert or replace a customer, keeping the segment counts and change feed in sync."""
+    previous = CUSTOMERS_DB.get(customer["customer_id"])
+    if previous is not None:
+        STORE_STATS.count_customer(previous, -1)
+    CUSTOMERS_DB[customer["customer_id"]] = customer
+    STORE_STATS.count_customer(customer)
+    STORE_CHANGES.changed("customers", customer["customer_id"])
+
+
+def record_order(order: Dict):
+    """Insert or replace an order and keep the sales rollup in sync."""
+    previous = ORDERS_DB.get(order["order_id"])
+    if previous is not None and previous["status"] != "cancelled":
+        SALES_ROLLUP.remove_order(previous)
+    ORDERS_DB[order["order_id"]] = order
+    if order["status"] != "cancelled":
+        SALES_ROLLUP.add_order(order)
+    STORE_CHANGES.changed("orders", order["order_id"])
+
+
+def mcp_tool(func):
+    """
+    Register `func` as an MCP tool that answers clients with JSON text.
+
+    The function itself (main.<tool> for in-process callers) keeps returning its
+    typed result; only the registered wrapper serializes it. The wrapper
+    publishes the same name, docstring and parameters, with a text result.
+    """
+    @functools.wraps(func)
+    async def respond(*args, **kwargs) -> str:
+        return to_text(await func(*args, **kwargs))
+
+    respond.__signature__ = inspect.signature(func).replace(return_annotation=str)
+    mcp.tool()(respond)
+    return func
+
+
+@mcp_tool
+async def check_inventory_status(sku: str) -> Union[InventoryStatus, str]:
     """
     Check the current inventory status for a product.
 
@@ -76,12 +380,12 @@ async def check_inventory_status(sku: str) -> str:
         stock_level = product["stock"]
         if stock_level == 0:
             status = "⛔ Out of Stock"
-        elif stock_level < 10:
+        elif stock_level < LOW_STOCK_LEVEL:
             status = "⚠️  Low Stock"
         else:
             status = "✅ In Stock"
 
-        result = {
+        return InventoryStatus({
             "product_name": product["name"],
             "sku": product["sku"],
             "stock_quantity": stock_level,
@@ -89,16 +393,14 @@ async def check_inventory_status(sku: str) -> str:
             "category": product["category"],
             "warehouse_location": product["warehouse"],
             "status": status
-        }
-
-        return json.dumps(result, indent=2)
+        })
 
     except Exception as e:
         return f"❌ Error checking inventory: {str(e)}"
 
 
-@mcp.tool()
-async def process_order(order_id: str, action: str) -> str:
+@mcp_tool
+async def process_order(order_id: str, action: str) -> Union[OrderDetails, str]:
     """
     Process and manage e-commerce orders with various actions.
 
@@ -132,7 +434,7 @@ async def process_order(order_id: str, action: str) -> str:
         action = action.lower()
 
         if action == "retrieve":
-            result = {
+            return OrderDetails({
                 "order_id": order["order_id"],
                 "customer_id": order["customer_id"],
                 "items": order["items"],
@@ -140,25 +442,32 @@ async def process_order(order_id: str, action: str) -> str:
                 "total_amount": f"${order['total']:.2f}",
                 "status": order["status"],
                 "order_date": order["date"]
-            }
-            return json.dumps(result, indent=2)
+            })
 
         elif action == "ship":
             if order["status"] in ["shipped", "delivered"]:
                 return f"⚠️  Order {order_id} has already been {order['status']}"
+            if order["status"] == "cancelled":
+                return f"❌ Cannot ship order {order_id}. Order has been cancelled"
             order["status"] = "shipped"
+            STORE_CHANGES.changed("orders", order["order_id"])
             return f"✅ Order {order_id} has been shipped successfully. Customer {order['customer_id']} will be notified."
 
         elif action == "cancel":
             if order["status"] in ["shipped", "delivered"]:
                 return f"❌ Cannot cancel order {order_id}. Order has already been {order['status']}"
+            if order["status"] == "cancelled":
+                return f"⚠️  Order {order_id} has already been cancelled"
             order["status"] = "cancelled"
+            SALES_ROLLUP.remove_order(order)
+            STORE_CHANGES.changed("orders", order["order_id"])
             return f"✅ Order {order_id} has been cancelled. Refund will be processed within 3-5 business days."
 
         elif action == "complete":
             if order["status"] != "shipped":
                 return f"⚠️  Order {order_id} must be shipped before it can be completed. Current status: {order['status']}"
             order["status"] = "delivered"
+            STORE_CHANGES.changed("orders", order["order_id"])
             return f"✅ Order {order_id} marked as delivered. Thank you for your business!"
 
         else:
@@ -168,8 +477,8 @@ async def process_order(order_id: str, action: str) -> str:
         return f"❌ Error processing order: {str(e)}"
 
 
-@mcp.tool()
-async def get_customer_analytics(customer_id: str) -> str:
+@mcp_tool
+async def get_customer_analytics(customer_id: str) -> Union[CustomerAnalytics, str]:
     """
     Retrieve comprehensive customer analytics and segmentation data.
 
@@ -214,7 +523,7 @@ async def get_customer_analytics(customer_id: str) -> str:
         else:
             engagement = "Low"
 
-        result = {
+        return CustomerAnalytics({
             "customer_id": customer["customer_id"],
             "name": customer["name"],
             "email": customer["email"],
@@ -223,16 +532,15 @@ async def get_customer_analytics(customer_id: str) -> str:
             "customer_segment": segment,
             "engagement_level": engagement,
             "recommendation": recommendation
-        }
-
-        return json.dumps(result, indent=2)
+        })
 
     except Exception as e:
         return f"❌ Error retrieving customer analytics: {str(e)}"
 
 
-@mcp.tool()
-async def generate_product_recommendations(customer_id: str, category: Optional[str] = None) -> str:
+@mcp_tool
+async def generate_product_recommendations(customer_id: str,
+                                           category: Optional[str] = None) -> Union[ProductRecommendations, str]:
     """
     Generate AI-powered product recommendations for customers.
 
@@ -290,21 +598,19 @@ async def generate_product_recommendations(customer_id: str, category: Optional[
         if not recommendations:
             return f"⚠️  No products currently available for recommendation"
 
-        result = {
+        return ProductRecommendations({
             "customer": customer["name"],
             "customer_id": customer_id,
             "recommendations": recommendations,
             "total_recommendations": len(recommendations)
-        }
-
-        return json.dumps(result, indent=2)
+        })
 
     except Exception as e:
         return f"❌ Error generating recommendations: {str(e)}"
 
 
-@mcp.tool()
-async def generate_sales_report(period: str = "week") -> str:
+@mcp_tool
+async def generate_sales_report(period: str = "week") -> Union[SalesReport, str]:
     """
     Generate comprehensive sales analytics and reports.
 
@@ -353,7 +659,7 @@ async def generate_sales_report(period: str = "week") -> str:
         low_stock_items = [p["name"] for p in INVENTORY_DB.values() if 0 < p["stock"] < 10]
         out_of_stock_items = [p["name"] for p in INVENTORY_DB.values() if p["stock"] == 0]
 
-        result = {
+        return SalesReport({
             "report_period": period.capitalize(),
             "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "sales_metrics": {
@@ -375,14 +681,65 @@ async def generate_sales_report(period: str = "week") -> str:
                 f"{len(low_stock_items)} items need restocking soon",
                 f"Order fulfillment rate: {(status_counts.get('delivered', 0) / total_orders * 100):.1f}%"
             ]
-        }
-
-        return json.dumps(result, indent=2)
+        })
 
     except Exception as e:
         return f"❌ Error generating sales report: {str(e)}"
 
 
-# Run the MCP server
+@mcp_tool
+async def get_sales_timeseries(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                               granularity: str = "day", category: Optional[str] = None) -> Union[SalesSeries, str]:
+    """
+    Return a bucketed revenue/orders/units time series for charts and trend analysis.
+
+    This tool reads from the incrementally maintained daily sales rollup, so a query
+    over years of history touches one pre-aggregated row per day instead of every
+    order. Buckets with no sales are included with zero values.
+
+    Args:
+        start_date: First day of the range as YYYY-MM-DD (default: first day with sales)
+        end_date: Last day of the range as YYYY-MM-DD (default: last day with sales)
+        granularity: Bucket size - 'day', 'week', or 'month' (default: 'day')
+        category: Optional product category filter (e.g., 'Electronics')
+
+    Returns:
+        Time series with one entry per bucket plus range totals
+
+    Example:
+        >>> await get_sales_timeseries("2025-09-01", "2025-09-30", "week")
+        "Sales Series (Week) | 5 buckets | Revenue: $1735.94 | Orders: 4 | Units: 6"
+    """
+    try:
+        granularity = granularity.lower()
+
+        if category:
+            categories = {p["category"].lower(): p["category"] for p in INVENTORY_DB.values()}
+            if category.lower() not in categories:
+                return f"❌ No products found in category '{category}'"
+            category = categories[category.lower()]
+
+        series = SALES_ROLLUP.query(start_date, end_date, granularity, category)
+
+        return SalesSeries({
+            "granularity": granularity,
+            "category": category or "All",
+            "start_date": start_date or (series[0]["period"] if series else None),
+            "end_date": end_date or (series[-1]["period"] if series else None),
+            "totals": {
+                "revenue": f"${sum(b['revenue'] for b in series):.2f}",
+                "orders": sum(b["orders"] for b in series),
+                "units": sum(b["units"] for b in series)
+            },
+            "series": series
+        })
+
+    except ValueError as e:
+        return f"❌ {str(e)}"
+    except Exception as e:
+        return f"❌ Error generating sales time series: {str(e)}"
+
+
+# Run the MCP server (MCP_TRANSPORT=streamable-http serves http://MCP_HOST:MCP_PORT/mcp)
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
+    mcp.run(transport=os.getenv("MCP_TRANSPORT", "stdio"))
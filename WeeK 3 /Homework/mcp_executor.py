@@ -0,0 +1,297 @@
+"""
+MCP Tool Executor
+=================
+How agents reach the MCP tools, shared by multi_agent_demo.py,
+multi_agent_system.py and the web UI.
+
+The transport is picked by configuration (MCP_EXECUTOR):
+- inprocess (default): await the tool coroutines from main.py directly
+- stdio: a pool of long-lived `python main.py` client sessions, started once per
+  event loop and reused for every call (never one subprocess per call)
+- http: one streamable-HTTP client session with keep-alive connections to a
+  separately running server (`MCP_TRANSPORT=streamable-http python main.py`)
+
+Every backend takes a tool name plus arguments and returns the tool's typed
+result (tool_results.py) or its text message, so agents and workflows behave
+the same wherever the tools run. In process the result object is handed over
+as is; the session backends rebuild it from the JSON text the server sends.
+
+Note: the mock databases live in each server process. With MCP_POOL_SIZE > 1,
+an order shipped through one stdio session is not visible to the others.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import weakref
+from abc import ABC, abstractmethod
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+import main
+from deadlines import within_deadline
+from single_flight import SingleFlight
+from tool_results import ToolOutput, from_text
+
+MCP_EXECUTOR = os.getenv("MCP_EXECUTOR", "inprocess").lower()
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://127.0.0.1:8000/mcp")
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "1"))
+EXECUTOR_KINDS = ("inprocess", "stdio", "http")
+
+if MCP_EXECUTOR not in EXECUTOR_KINDS:
+    raise ValueError(f"Unknown MCP_EXECUTOR '{MCP_EXECUTOR}' (expected one of: {', '.join(EXECUTOR_KINDS)})")
+
+# Maximum number of tool calls a fan-out (e.g. an inventory audit) keeps in flight
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "32"))
+
+SERVER_SCRIPT = Path(__file__).with_name("main.py")
+
+# Coalesces concurrent identical tool calls (e.g. several users running the same report)
+tool_flight = SingleFlight("tool")
+
+
+class InProcessBackend:
+    """Call the tool coroutines in main.py directly (no transport at all)."""
+
+    kind = "inprocess"
+
+    def __init__(self):
+        self._tool_names: Optional[set] = None
+
+    async def list_tools(self) -> list:
+        return await main.mcp.list_tools()
+
+    async def call(self, tool_name: str, parameters: Dict[str, Any]) -> ToolOutput:
+        if self._tool_names is None:
+            self._tool_names = {tool.name for tool in await self.list_tools()}
+        if tool_name not in self._tool_names:
+            return f"❌ Unknown tool: {tool_name}"
+        # Looked up per call so the benchmarks can swap in slowed-down tools; no JSON round trip
+        return await getattr(main, tool_name)(**parameters)
+
+    async def close(self):
+        pass
+
+
+class SessionBackend(ABC):
+    """Base for backends that keep MCP client sessions open and spread calls across them."""
+
+    kind = ""
+
+    def __init__(self, size: int = 1):
+        self.size = max(1, size)
+        self._sessions: List[ClientSession] = []
+        self._next = 0
+        self._starting: Optional[asyncio.Future] = None
+        self._closing = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+
+    @abstractmethod
+    def _connect(self):
+        """Async context manager yielding the (read, write, ...) streams of one connection."""
+
+    async def _hold_session(self, ready: asyncio.Future):
+        # Transport contexts must be entered and exited by the same task, so each
+        # session lives in its own task until the backend closes.
+        session = None
+        try:
+            async with self._connect() as streams:
+                async with ClientSession(streams[0], streams[1]) as session:
+                    await session.initialize()
+                    self._sessions.append(session)
+                    ready.set_result(None)
+                    await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+        finally:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+    async def _start(self):
+        loop = asyncio.get_running_loop()
+        readies = [loop.create_future() for _ in range(self.size)]
+        self._workers = [asyncio.create_task(self._hold_session(ready)) for ready in readies]
+        await asyncio.gather(*readies)
+
+    async def _session(self) -> ClientSession:
+        if not self._sessions:
+            # First call (or every connection dropped): (re)connect once for all waiters
+            if self._starting is None or self._starting.done():
+                self._starting = asyncio.ensure_future(self._start())
+            try:
+                await asyncio.shield(self._starting)
+            except Exception:
+                self._starting = None
+                raise
+        session = self._sessions[self._next % len(self._sessions)]
+        self._next += 1
+        return session
+
+    async def list_tools(self) -> list:
+        return (await (await self._session()).list_tools()).tools
+
+    async def call(self, tool_name: str, parameters: Dict[str, Any]) -> ToolOutput:
+        # Sessions multiplex requests, so concurrent calls don't wait for each other
+        result = await (await self._session()).call_tool(tool_name, parameters)
+        text = "\n".join(item.text for item in result.content if getattr(item, "text", None) is not None)
+        if result.isError:
+            return f"❌ {text}"  # server already says which tool failed and why
+        return from_text(tool_name, text)
+
+    async def close(self):
+        self._closing.set()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+class StdioPoolBackend(SessionBackend):
+    """A pool of long-lived `python main.py` stdio sessions."""
+
+    kind = "stdio"
+
+    def _connect(self):
+        return stdio_client(StdioServerParameters(
+            command=sys.executable,
+            args=[str(SERVER_SCRIPT)],
+            cwd=str(SERVER_SCRIPT.parent),
+            env={"MCP_LOG_LEVEL": "WARNING"}  # one INFO line per request would flood the console
+        ))
+
+
+class HTTPBackend(SessionBackend):
+    """One streamable-HTTP session (keep-alive connection pool) to a running MCP server."""
+
+    kind = "http"
+
+    def __init__(self, url: str = MCP_SERVER_URL):
+        super().__init__(1)
+        self.url = url
+
+    def _connect(self):
+        return streamablehttp_client(self.url)
+
+
+def create_backend(kind: Optional[str] = None):
+    """Build the tool backend for `kind` (default: MCP_EXECUTOR)."""
+    kind = (kind or MCP_EXECUTOR).lower()
+    if kind == "inprocess":
+        return InProcessBackend()
+    if kind == "stdio":
+        return StdioPoolBackend(MCP_POOL_SIZE)
+    if kind == "http":
+        return HTTPBackend(MCP_SERVER_URL)
+    raise ValueError(f"Unknown MCP executor '{kind}' (expected one of: {', '.join(EXECUTOR_KINDS)})")
+
+
+# Sessions are bound to the event loop that opened them, so keep one backend per loop
+_backends: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def tool_backend():
+    """Return the configured backend for the current event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    backend = _backends.get(loop)
+    if backend is None:
+        backend = _backends[loop] = create_backend()
+    return backend
+
+
+def set_tool_backend(backend):
+    """Route this loop's tool calls through `backend` (benchmarks, tests)."""
+    _backends[asyncio.get_running_loop()] = backend
+
+
+class MCPToolExecutor:
+    """Wrapper to execute MCP tools and format results for AI agents."""
+
+    _schemas: Optional[List[Dict[str, Any]]] = None
+
+    @staticmethod
+    async def tool_schemas() -> List[Dict[str, Any]]:
+        """OpenAI function-calling schemas for every tool in the MCP registry.
+
+        Generated from the same signatures and docstrings the MCP server
+        publishes, so a tool added to main.py is callable by the model as is.
+        """
+        if MCPToolExecutor._schemas is None:
+            MCPToolExecutor._schemas = [
+                {
+                    "type": "function",
+                    "function": {
+                        "name": tool.name,
+                        "description": (tool.description or "").strip(),
+                        "parameters": tool.inputSchema
+                    }
+                }
+                for tool in await tool_backend().list_tools()
+            ]
+        return MCPToolExecutor._schemas
+
+    @staticmethod
+    async def execute_tool(tool_name: str, parameters: Dict[str, Any]) -> ToolOutput:
+        """Execute an MCP tool and return the result.
+
+        Concurrent identical read-only calls share one in-flight execution.
+        Raises DeadlineExceeded when the request's deadline passes first; a shared
+        execution keeps running while other callers still wait for it.
+        """
+        if tool_name == "process_order" and str(parameters.get("action", "")).lower() != "retrieve":
+            # state change: never coalesce
+            return await within_deadline(MCPToolExecutor._execute_tool(tool_name, parameters))
+
+        key = (tool_name, json.dumps(parameters, sort_keys=True, default=str))
+        return await within_deadline(
+            tool_flight.do(key, lambda: MCPToolExecutor._execute_tool(tool_name, parameters))
+        )
+
+    @staticmethod
+    async def _execute_tool(tool_name: str, parameters: Dict[str, Any]) -> ToolOutput:
+        try:
+            return await tool_backend().call(tool_name, parameters)
+        except Exception as e:
+            return f"❌ Error executing {tool_name}: {str(e)}"
+
+    @staticmethod
+    async def execute_many(tool_name: str, parameter_sets: Iterable[Dict[str, Any]],
+                           max_concurrency: Optional[int] = None) -> AsyncIterator[Tuple[Dict[str, Any], ToolOutput]]:
+        """Execute one tool over many parameter sets with bounded parallelism.
+
+        At most ``max_concurrency`` calls are in flight at once. Results are
+        yielded as ``(parameters, result)`` in input order as soon as they are
+        ready, so large batches stream partial results without holding every
+        pending call in memory. A window of 4x ``max_concurrency`` calls is
+        scheduled ahead, so calls behind a slow one keep finishing (and freeing
+        their slots) while it runs.
+        """
+        limit = max(1, max_concurrency or TOOL_MAX_CONCURRENCY)
+        semaphore = asyncio.Semaphore(limit)
+        pending_parameters = iter(parameter_sets)
+        in_flight = deque()
+
+        async def bounded(parameters: Dict[str, Any]) -> ToolOutput:
+            async with semaphore:
+                return await MCPToolExecutor.execute_tool(tool_name, parameters)
+
+        def schedule(count: int):
+            for parameters in islice(pending_parameters, count):
+                in_flight.append((parameters, asyncio.ensure_future(bounded(parameters))))
+
+        # Results are yielded in input order; the window lets later calls finish while an earlier slow one runs
+        schedule(limit * 4)
+        try:
+            while in_flight:
+                parameters, task = in_flight.popleft()
+                result = await task
+                schedule(1)
+                yield parameters, result
+        finally:
+            for _, task in in_flight:
+                task.cancel()
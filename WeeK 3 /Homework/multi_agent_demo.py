@@ -9,52 +9,183 @@ without API costs.
 """
 
 import asyncio
-import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Iterable, Tuple
 
-# Import our MCP tools directly
-from main import (
-    check_inventory_status,
-    process_order,
-    get_customer_analytics,
-    generate_product_recommendations,
-    generate_sales_report
-)
+import workflows
+# MCP tools run in-process, over pooled stdio sessions or over HTTP (MCP_EXECUTOR)
+from mcp_executor import MCPToolExecutor
+from fast_path import ORDER_STATUS_MESSAGES
+from inventory_audit import LOW_STOCK, OUT_OF_STOCK, AuditProgress, stream_audit
+from prompt_encoding import parse_tool_result
+from rule_engine import RuleEngine
+from templates import render_many
+from tool_results import ToolOutput
 
+# Business rules behind SimulatedAgent.analyze (rules.json, or AGENT_RULES_PATH)
+ANALYSIS_RULES = RuleEngine.from_file()
 
-class MCPToolExecutor:
-    """Wrapper to execute MCP tools and format results."""
 
-    @staticmethod
-    async def execute_tool(tool_name: str, parameters: Dict[str, Any]) -> str:
-        """Execute an MCP tool and return the result."""
-        try:
-            if tool_name == "check_inventory_status":
-                return await check_inventory_status(parameters.get("sku", ""))
+# Emails and reports: plain f-string render functions over the tool results' fields
+def audit_row(row: Dict) -> str:
+    return f"\n{row['sku']}: {row['result']}"
 
-            elif tool_name == "process_order":
-                return await process_order(
-                    parameters.get("order_id", ""),
-                    parameters.get("action", "")
-                )
 
-            elif tool_name == "get_customer_analytics":
-                return await get_customer_analytics(parameters.get("customer_id", ""))
+def audit_report(rows: List[Dict], audited: int, critical: List[str], low_stock: List[str]) -> str:
+    report = f"""📋 INVENTORY AUDIT REPORT
+============================================================{render_many(audit_row, rows, separator="\n")}
 
-            elif tool_name == "generate_product_recommendations":
-                return await generate_product_recommendations(
-                    parameters.get("customer_id", ""),
-                    parameters.get("category")
-                )
+============================================================
 
-            elif tool_name == "generate_sales_report":
-                return await generate_sales_report(parameters.get("period", "week"))
+📊 SUMMARY:
+• Total products audited: {audited}
+• Critical (Out of Stock): {len(critical)}
+• Warning (Low Stock): {len(low_stock)}"""
+    if critical:
+        report += f"\n\n⚠️  CRITICAL: {', '.join(critical)} - Immediate action required"
+    if low_stock:
+        report += f"\n⚠️  WARNING: {', '.join(low_stock)} - Restock soon"
+    return report
 
-            else:
-                return f"❌ Unknown tool: {tool_name}"
 
-        except Exception as e:
-            return f"❌ Error executing {tool_name}: {str(e)}"
+def order_inquiry_email(order: Dict, status_message: str) -> str:
+    return f"""
+📧 CUSTOMER EMAIL RESPONSE
+==========================
+
+Dear Valued Customer,
+
+Thank you for contacting us regarding your order {order.get('order_id')}.
+
+Order Details:
+• Order ID: {order.get('order_id')}
+• Status: {str(order.get('status')).upper()}
+• Total: {order.get('total_amount')}
+• Items: {order.get('item_count')} item(s)
+• Order Date: {order.get('order_date')}
+
+Your order is currently {order.get('status')}.
+{status_message}
+
+If you have any questions, please don't hesitate to contact us.
+
+Best regards,
+Customer Service Team
+"""
+
+
+def recommendations_email(customer: Dict, recommendations: Optional[List[Dict]]) -> str:
+    items = "".join([f"""
+{idx}. {rec.get('product_name')}
+   Price: {rec.get('price')}
+   Match Score: {rec.get('relevance_score')}
+   Why: {rec.get('reason')}
+""" for idx, rec in enumerate(recommendations or (), 1)])
+    return f"""
+📧 PERSONALIZED PRODUCT RECOMMENDATIONS
+========================================
+
+Dear {customer.get('name')},
+
+As one of our valued {customer.get('customer_segment')} customers, we've handpicked
+some exclusive recommendations just for you:
+
+{items}
+These selections are based on your purchase history and preferences.
+Shop now and enjoy your {customer.get('customer_segment')} benefits!
+
+Best regards,
+Your Personal Shopping Team
+"""
+
+
+def shipment_notification(order_id: str, result: ToolOutput) -> str:
+    return f"""
+📧 SHIPMENT NOTIFICATION
+========================
+
+Your order {order_id} has been shipped! 🚚
+
+{result}
+
+Track your package: https://tracking.example.com/{order_id}
+
+Estimated delivery: 3-5 business days
+
+Thank you for shopping with us!
+"""
+
+
+def business_report(data: Dict, out_of_stock: int, low_stock: int) -> str:
+    metrics = data.get("sales_metrics") or {}
+    top = data.get("top_selling_product") or {}
+    insights = "".join([f"• {insight}\n" for insight in data.get("insights") or ()])
+    alerts = ""
+    if out_of_stock:
+        alerts += f"\n⚠️  URGENT: {out_of_stock} items out of stock"
+    if low_stock:
+        alerts += f"\n⚠️  Warning: {low_stock} items low on stock"
+    return f"""
+📊 EXECUTIVE BUSINESS SUMMARY
+==============================
+Report Period: {data.get('report_period')}
+Generated: {data.get('generated_at')}
+
+KEY METRICS:
+• Total Revenue: {metrics.get('total_revenue')}
+• Total Orders: {metrics.get('total_orders')}
+• Average Order Value: {metrics.get('average_order_value')}
+
+TOP PERFORMER:
+• {top.get('name')} ({top.get('units_sold')} units)
+
+OPERATIONAL INSIGHTS:
+{insights}{alerts}
+
+✅ RECOMMENDATIONS:
+• Continue current sales strategies
+• Address inventory shortages immediately
+• Focus on top-performing product categories
+"""
+
+
+def segment_analysis(data: Dict, action_items: List[str]) -> str:
+    items = "".join([f"• {item}\n" for item in action_items])
+    return f"""
+📊 CUSTOMER SEGMENT ANALYSIS
+=============================
+
+Customer: {data.get('name')} ({data.get('customer_id')})
+Segment: {data.get('customer_segment')}
+Engagement: {data.get('engagement_level')}
+
+METRICS:
+• Lifetime Value: {data.get('lifetime_value')}
+• Total Orders: {data.get('total_orders')}
+
+STRATEGIC RECOMMENDATION:
+{data.get('recommendation')}
+
+ACTION ITEMS:
+{items}"""
+
+
+SEGMENT_ACTION_ITEMS = {
+    "VIP": [
+        "Assign dedicated account manager",
+        "Offer exclusive early access to new products",
+        "Provide white-glove customer service",
+    ],
+    "Gold": [
+        "Send quarterly appreciation gifts",
+        "Offer loyalty program benefits",
+        "Personalized email campaigns",
+    ],
+}
+DEFAULT_ACTION_ITEMS = [
+    "Engage with targeted promotions",
+    "Encourage repeat purchases",
+    "Build brand loyalty",
+]
 
 
 class SimulatedAgent:
@@ -68,21 +199,10 @@ class SimulatedAgent:
         """Log agent activity."""
         print(f"\n🤖 [{self.name}] {message}")
 
-    def analyze(self, context: str, data: str) -> str:
-        """Simulated analysis based on data patterns."""
-        # Simple rule-based responses
-        if "Out of Stock" in data:
-            return f"⚠️  ALERT: Item is out of stock. Immediate restocking required."
-        elif "Low Stock" in data:
-            return f"⚠️  WARNING: Stock levels are low. Recommend restocking within 48 hours."
-        elif "VIP" in data:
-            return f"💎 VIP Customer: Prioritize service and offer premium recommendations."
-        elif "lifetime_value" in data and "4500" in data:
-            return f"📈 High-value customer ($4500+ LTV). Excellent retention candidate."
-        elif "total_revenue" in data:
-            return f"📊 Strong sales performance. Revenue trending positive."
-        else:
-            return f"✅ Status nominal. Continue monitoring."
+    def analyze(self, context: str, data: ToolOutput) -> str:
+        """Simulated analysis: the highest-priority business rule matching the tool result's fields."""
+        fields = parse_tool_result(data) or {}  # text results (errors) have no fields
+        return ANALYSIS_RULES.evaluate(fields, default="✅ Status nominal. Continue monitoring.")
 
 
 class InventoryAgent(SimulatedAgent):
@@ -108,42 +228,37 @@ class InventoryAgent(SimulatedAgent):
             "analysis": analysis
         }
 
-    async def audit_inventory(self, skus: List[str]) -> str:
+    async def stream_inventory_status(self, skus: Iterable[str],
+                                      max_concurrency: Optional[int] = None) -> AsyncIterator[Tuple[str, ToolOutput]]:
+        """Yield (sku, inventory result) pairs in input order while checks run concurrently."""
+        async for parameters, result in MCPToolExecutor.execute_many(
+            "check_inventory_status",
+            ({"sku": sku} for sku in skus),
+            max_concurrency
+        ):
+            yield parameters["sku"], result
+
+    def stream_audit(self, skus: Iterable[str], max_concurrency: Optional[int] = None) -> AsyncIterator[AuditProgress]:
+        """Audit SKUs as a stream: each SKU's finding with the running totals (constant memory)."""
+        return stream_audit(self.stream_inventory_status(skus, max_concurrency))
+
+    async def audit_inventory(self, skus: List[str], max_concurrency: Optional[int] = None) -> str:
         """Perform inventory audit across multiple products."""
         self.log(f"Performing inventory audit for {len(skus)} products")
 
-        results = []
+        rows = []
         critical_items = []
         low_stock_items = []
 
-        for sku in skus:
-            result = await MCPToolExecutor.execute_tool(
-                "check_inventory_status",
-                {"sku": sku}
-            )
-
-            if "Out of Stock" in result:
-                critical_items.append(sku)
-            elif "Low Stock" in result:
-                low_stock_items.append(sku)
+        async for progress in self.stream_audit(skus, max_concurrency):
+            if progress.kind == OUT_OF_STOCK:
+                critical_items.append(progress.sku)
+            elif progress.kind == LOW_STOCK:
+                low_stock_items.append(progress.sku)
 
-            results.append(f"\n{sku}: {result}")
+            rows.append({"sku": progress.sku, "result": progress.result})
 
-        # Generate audit report
-        report = "📋 INVENTORY AUDIT REPORT\n" + "="*60
-        report += "\n".join(results)
-        report += "\n\n" + "="*60
-        report += "\n\n📊 SUMMARY:"
-        report += f"\n• Total products audited: {len(skus)}"
-        report += f"\n• Critical (Out of Stock): {len(critical_items)}"
-        report += f"\n• Warning (Low Stock): {len(low_stock_items)}"
-
-        if critical_items:
-            report += f"\n\n⚠️  CRITICAL: {', '.join(critical_items)} - Immediate action required"
-        if low_stock_items:
-            report += f"\n⚠️  WARNING: {', '.join(low_stock_items)} - Restock soon"
-
-        return report
+        return audit_report(rows, len(skus), critical_items, low_stock_items)
 
 
 class CustomerServiceAgent(SimulatedAgent):
@@ -161,46 +276,16 @@ class CustomerServiceAgent(SimulatedAgent):
             {"order_id": order_id, "action": "retrieve"}
         )
 
-        # Parse the data
-        try:
-            data = json.loads(order_data)
-            response = f"""
-📧 CUSTOMER EMAIL RESPONSE
-==========================
+        # The typed result is read directly; a text result means the lookup failed
+        data = parse_tool_result(order_data)
+        if data is None:
+            return f"Order data: {order_data}"
 
-Dear Valued Customer,
-
-Thank you for contacting us regarding your order {data.get('order_id')}.
-
-Order Details:
-• Order ID: {data.get('order_id')}
-• Status: {data.get('status').upper()}
-• Total: {data.get('total_amount')}
-• Items: {data.get('item_count')} item(s)
-• Order Date: {data.get('order_date')}
-
-Your order is currently {data.get('status')}.
-{self._get_status_message(data.get('status'))}
-
-If you have any questions, please don't hesitate to contact us.
-
-Best regards,
-Customer Service Team
-"""
-        except:
-            response = f"Order data: {order_data}"
-
-        return response
+        return order_inquiry_email(data, self._get_status_message(data.get("status")))
 
     def _get_status_message(self, status: str) -> str:
-        """Get appropriate message based on order status."""
-        messages = {
-            "shipped": "You should receive tracking information shortly.",
-            "delivered": "Your order has been successfully delivered!",
-            "pending": "We're preparing your order for shipment.",
-            "processing": "Your order is being processed by our warehouse team."
-        }
-        return messages.get(status, "We're working on your order.")
+        """Get appropriate message based on order status (the fast path's table)."""
+        return ORDER_STATUS_MESSAGES.get(str(status).lower(), "We're working on your order.")
 
     async def recommend_products(self, customer_id: str, category: Optional[str] = None) -> str:
         """Generate personalized product recommendations."""
@@ -218,39 +303,12 @@ Customer Service Team
             {"customer_id": customer_id, "category": category}
         )
 
-        try:
-            cust = json.loads(customer_data)
-            recs = json.loads(recommendations)
-
-            email = f"""
-📧 PERSONALIZED PRODUCT RECOMMENDATIONS
-========================================
-
-Dear {cust.get('name')},
-
-As one of our valued {cust.get('customer_segment')} customers, we've handpicked
-some exclusive recommendations just for you:
-
-"""
-            for idx, rec in enumerate(recs.get('recommendations', []), 1):
-                email += f"""
-{idx}. {rec.get('product_name')}
-   Price: {rec.get('price')}
-   Match Score: {rec.get('relevance_score')}
-   Why: {rec.get('reason')}
-"""
-
-            email += f"""
-These selections are based on your purchase history and preferences.
-Shop now and enjoy your {cust.get('customer_segment')} benefits!
+        cust = parse_tool_result(customer_data)
+        recs = parse_tool_result(recommendations)
+        if cust is None or recs is None:
+            return f"Customer: {customer_data}\n\nRecommendations: {recommendations}"
 
-Best regards,
-Your Personal Shopping Team
-"""
-        except:
-            email = f"Customer: {customer_data}\n\nRecommendations: {recommendations}"
-
-        return email
+        return recommendations_email(cust, recs.get("recommendations"))
 
     async def ship_order(self, order_id: str) -> str:
         """Process order shipment."""
@@ -261,21 +319,7 @@ Your Personal Shopping Team
             {"order_id": order_id, "action": "ship"}
         )
 
-        notification = f"""
-📧 SHIPMENT NOTIFICATION
-========================
-
-Your order {order_id} has been shipped! 🚚
-
-{result}
-
-Track your package: https://tracking.example.com/{order_id}
-
-Estimated delivery: 3-5 business days
-
-Thank you for shopping with us!
-"""
-        return notification
+        return shipment_notification(order_id, result)
 
 
 class AnalyticsAgent(SimulatedAgent):
@@ -293,44 +337,13 @@ class AnalyticsAgent(SimulatedAgent):
             {"period": period}
         )
 
-        try:
-            data = json.loads(report_data)
-            metrics = data.get('sales_metrics', {})
+        data = parse_tool_result(report_data)
+        if data is None:
+            return f"Report data: {report_data}"
 
-            summary = f"""
-📊 EXECUTIVE BUSINESS SUMMARY
-==============================
-Report Period: {data.get('report_period')}
-Generated: {data.get('generated_at')}
-
-KEY METRICS:
-• Total Revenue: {metrics.get('total_revenue')}
-• Total Orders: {metrics.get('total_orders')}
-• Average Order Value: {metrics.get('average_order_value')}
-
-TOP PERFORMER:
-• {data.get('top_selling_product', {}).get('name')} ({data.get('top_selling_product', {}).get('units_sold')} units)
-
-OPERATIONAL INSIGHTS:
-"""
-            for insight in data.get('insights', []):
-                summary += f"• {insight}\n"
-
-            alerts = data.get('inventory_alerts', {})
-            if alerts.get('out_of_stock_items'):
-                summary += f"\n⚠️  URGENT: {len(alerts['out_of_stock_items'])} items out of stock"
-            if alerts.get('low_stock_items'):
-                summary += f"\n⚠️  Warning: {len(alerts['low_stock_items'])} items low on stock"
-
-            summary += "\n\n✅ RECOMMENDATIONS:\n"
-            summary += "• Continue current sales strategies\n"
-            summary += "• Address inventory shortages immediately\n"
-            summary += "• Focus on top-performing product categories\n"
-
-        except:
-            summary = f"Report data: {report_data}"
-
-        return summary
+        alerts = data.get("inventory_alerts", {})
+        return business_report(data, len(alerts.get("out_of_stock_items") or ()),
+                               len(alerts.get("low_stock_items") or ()))
 
     async def analyze_customer_segment(self, customer_id: str) -> str:
         """Analyze customer segment."""
@@ -341,66 +354,23 @@ OPERATIONAL INSIGHTS:
             {"customer_id": customer_id}
         )
 
-        try:
-            data = json.loads(analytics)
-
-            insights = f"""
-📊 CUSTOMER SEGMENT ANALYSIS
-=============================
-
-Customer: {data.get('name')} ({data.get('customer_id')})
-Segment: {data.get('customer_segment')}
-Engagement: {data.get('engagement_level')}
+        data = parse_tool_result(analytics)
+        if data is None:
+            return f"Analytics: {analytics}"
 
-METRICS:
-• Lifetime Value: {data.get('lifetime_value')}
-• Total Orders: {data.get('total_orders')}
+        return segment_analysis(data, SEGMENT_ACTION_ITEMS.get(data.get("customer_segment"), DEFAULT_ACTION_ITEMS))
 
-STRATEGIC RECOMMENDATION:
-{data.get('recommendation')}
 
-ACTION ITEMS:
-"""
-            if data.get('customer_segment') == 'VIP':
-                insights += "• Assign dedicated account manager\n"
-                insights += "• Offer exclusive early access to new products\n"
-                insights += "• Provide white-glove customer service\n"
-            elif data.get('customer_segment') == 'Gold':
-                insights += "• Send quarterly appreciation gifts\n"
-                insights += "• Offer loyalty program benefits\n"
-                insights += "• Personalized email campaigns\n"
-            else:
-                insights += "• Engage with targeted promotions\n"
-                insights += "• Encourage repeat purchases\n"
-                insights += "• Build brand loyalty\n"
-
-        except:
-            insights = f"Analytics: {analytics}"
-
-        return insights
-
-
-# Workflow Scenarios
+# Workflow Scenarios (DAGs in workflows.py; independent steps run concurrently)
 async def workflow_vip_customer_order():
     """Scenario: Handle VIP customer order and upsell."""
     print("\n" + "="*70)
     print("SCENARIO 1: VIP Customer Order Processing & Upsell")
     print("="*70)
 
-    cs_agent = CustomerServiceAgent()
-    analytics_agent = AnalyticsAgent()
-
-    print("\n📦 Step 1: Check Order Status")
-    order_status = await cs_agent.handle_order_inquiry("ORD001")
-    print(order_status)
-
-    print("\n📊 Step 2: Analyze Customer Profile")
-    customer_insights = await analytics_agent.analyze_customer_segment("CUST001")
-    print(customer_insights)
-
-    print("\n💡 Step 3: Generate Product Recommendations")
-    recommendations = await cs_agent.recommend_products("CUST001", "Electronics")
-    print(recommendations)
+    await workflows.run_in_terminal(
+        workflows.vip_customer_upsell(CustomerServiceAgent(), AnalyticsAgent())
+    )
 
 
 async def workflow_inventory_alert():
@@ -409,12 +379,7 @@ async def workflow_inventory_alert():
     print("SCENARIO 2: Inventory Alert & Restocking Analysis")
     print("="*70)
 
-    inv_agent = InventoryAgent()
-
-    print("\n📦 Performing Inventory Audit")
-    skus = ["PROD001", "PROD002", "PROD003", "PROD004", "PROD005"]
-    audit_report = await inv_agent.audit_inventory(skus)
-    print(audit_report)
+    await workflows.run_in_terminal(workflows.inventory_audit(InventoryAgent()))
 
 
 async def workflow_daily_business_review():
@@ -423,17 +388,9 @@ async def workflow_daily_business_review():
     print("SCENARIO 3: Daily Business Review")
     print("="*70)
 
-    analytics_agent = AnalyticsAgent()
-    inv_agent = InventoryAgent()
-
-    print("\n📈 Step 1: Sales Performance")
-    sales_report = await analytics_agent.generate_business_report("week")
-    print(sales_report)
-
-    print("\n📦 Step 2: Critical Inventory Check")
-    critical_check = await inv_agent.check_stock("PROD004")
-    print(f"\nData: {critical_check['data']}")
-    print(f"\n{critical_check['analysis']}")
+    await workflows.run_in_terminal(
+        workflows.daily_business_review(AnalyticsAgent(), InventoryAgent())
+    )
 
 
 async def workflow_order_fulfillment():
@@ -442,25 +399,9 @@ async def workflow_order_fulfillment():
     print("SCENARIO 4: Order Fulfillment Workflow")
     print("="*70)
 
-    cs_agent = CustomerServiceAgent()
-    inv_agent = InventoryAgent()
-
-    order_id = "ORD002"
-
-    print(f"\n📦 Step 1: Review Order {order_id}")
-    order_data = await MCPToolExecutor.execute_tool(
-        "process_order",
-        {"order_id": order_id, "action": "retrieve"}
+    await workflows.run_in_terminal(
+        workflows.order_fulfillment(CustomerServiceAgent(), InventoryAgent(), MCPToolExecutor)
     )
-    print(order_data)
-
-    print("\n📦 Step 2: Verify Inventory")
-    inv_check = await inv_agent.check_stock("PROD003")
-    print(f"\n{inv_check['analysis']}")
-
-    print("\n🚚 Step 3: Process Shipment")
-    shipment = await cs_agent.ship_order(order_id)
-    print(shipment)
 
 
 async def main_menu():
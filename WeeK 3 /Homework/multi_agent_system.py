@@ -16,60 +16,89 @@ to perform e-commerce tasks.
 import asyncio
 import json
 import os
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Iterable, Tuple
 from dotenv import load_dotenv
-from openai import OpenAI
-
-# Import our MCP tools directly for this demo
-from main import (
-    check_inventory_status,
-    process_order,
-    get_customer_analytics,
-    generate_product_recommendations,
-    generate_sales_report
-)
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from openai.types import CompletionUsage
+import httpx
+
+from conversation_memory import conversation_context
+from deadlines import DeadlineExceeded, iterate_within_deadline, within_deadline
+from fast_path import router_from_env
+from inventory_audit import AuditProgress, stream_audit
+from llm_cache import LLMResponseCache, cache_from_env
+from llm_cassette import CASSETTE_MODE, cassette_from_env
+# MCP tools run in-process, over pooled stdio sessions or over HTTP (MCP_EXECUTOR)
+from mcp_executor import MCPToolExecutor, tool_flight
+from prompt_encoding import INVENTORY_COLUMNS, encode_table, estimate_tokens, parse_tool_result
+from rate_limiter import rate_limiter_from_env
+from single_flight import SingleFlight
+from streaming import muted_tokens, token_sink
+from telemetry import current_workflow, telemetry_from_env
+from tool_results import ToolOutput, to_text
+import workflows
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL = os.getenv("MODEL_NAME", "gpt-3.5-turbo")
+LLM_BASE_URL = os.getenv("OPENAI_BASE_URL")  # e.g. http://127.0.0.1:8000/v1 for a local fake endpoint
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_PARAMS = {"temperature": 0.7, "max_tokens": 500}
+
+# Model <-> tool round trips the coordinator may take before it must answer
+COORDINATOR_MAX_ITERATIONS = int(os.getenv("COORDINATOR_MAX_ITERATIONS", "5"))
+
+# SKUs per map-reduce chunk for large inventory audits
+AUDIT_CHUNK_SIZE = int(os.getenv("AUDIT_CHUNK_SIZE", "200"))
+
+# Repeated prompts (e.g. the VIP workflow always analyzing CUST001) are served
+# from a memory + disk cache instead of paying another LLM round trip.
+response_cache = cache_from_env()
+
+# Clear-cut inventory/order checks are answered by rules; only ambiguous ones reach the LLM
+inference_router = router_from_env()
+
+# Per-call tokens, latency, retries and cache hits (query with `python telemetry.py summary`)
+llm_telemetry = telemetry_from_env()
+
+# Concurrent identical LLM requests (same model, prompts and parameters) share one call
+llm_flight = SingleFlight("LLM")
+
+# Initialize one shared async OpenAI client so every agent reuses the same
+# keep-alive connection pool instead of blocking the event loop per request.
+# The SDK's own retries are off: llm_limiter retries with shared backoff state.
+llm_limits = httpx.Limits(max_connections=LLM_MAX_CONCURRENCY, max_keepalive_connections=LLM_MAX_CONCURRENCY)
+
+# LLM_CASSETTE_MODE=record|replay: capture LLM traffic to a cassette or serve it
+# from one offline (proxy environment variables don't apply while it is active)
+llm_cassette = cassette_from_env(httpx.AsyncHTTPTransport(limits=llm_limits))
+
+client = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY") or ("cassette-replay" if CASSETTE_MODE == "replay" else None),
+    base_url=LLM_BASE_URL,
+    timeout=LLM_TIMEOUT,
+    max_retries=0,
+    http_client=(
+        DefaultAsyncHttpxClient(limits=llm_limits) if llm_cassette is None
+        else DefaultAsyncHttpxClient(transport=llm_cassette, trust_env=False)
+    )
+)
 
+# One limiter for all agents: RPM/TPM buckets (LLM_RPM, LLM_TPM), retries with
+# backoff that honour Retry-After, and an in-flight cap (at most
+# LLM_MAX_CONCURRENCY) that shrinks when the provider answers 429.
+llm_limiter = rate_limiter_from_env(LLM_MAX_CONCURRENCY)
 
-class MCPToolExecutor:
-    """Wrapper to execute MCP tools and format results for AI agents."""
-
-    @staticmethod
-    async def execute_tool(tool_name: str, parameters: Dict[str, Any]) -> str:
-        """Execute an MCP tool and return the result."""
-        try:
-            if tool_name == "check_inventory_status":
-                return await check_inventory_status(parameters.get("sku", ""))
-
-            elif tool_name == "process_order":
-                return await process_order(
-                    parameters.get("order_id", ""),
-                    parameters.get("action", "")
-                )
-
-            elif tool_name == "get_customer_analytics":
-                return await get_customer_analytics(parameters.get("customer_id", ""))
-
-            elif tool_name == "generate_product_recommendations":
-                return await generate_product_recommendations(
-                    parameters.get("customer_id", ""),
-                    parameters.get("category")
-                )
-
-            elif tool_name == "generate_sales_report":
-                return await generate_sales_report(parameters.get("period", "week"))
-
-            else:
-                return f"❌ Unknown tool: {tool_name}"
 
-        except Exception as e:
-            return f"❌ Error executing {tool_name}: {str(e)}"
+def request_tokens(messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> int:
+    """Tokens a request may consume (prompt estimate + completion budget), charged against LLM_TPM."""
+    prompt = estimate_tokens(json.dumps(messages, default=str))
+    if tools:
+        prompt += estimate_tokens(json.dumps(tools))
+    return prompt + LLM_PARAMS["max_tokens"]
 
 
 class BaseAgent:
@@ -79,27 +108,163 @@ class BaseAgent:
         self.name = name
         self.role = role
         self.system_prompt = system_prompt
-        self.conversation_history: List[Dict[str, str]] = []
 
-    def call_llm(self, user_message: str) -> str:
-        """Call OpenAI API with the agent's system prompt."""
-        messages = [
+    def _messages(self, user_message: str, context: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        """System prompt, conversation context (summary + recent turns, if any), then the new message."""
+        return [
             {"role": "system", "content": self.system_prompt},
+            *(context or []),
             {"role": "user", "content": user_message}
         ]
 
+    def _prompt_key(self, user_message: str, context: List[Dict[str, str]]) -> str:
+        """Cache/single-flight key over everything sent besides the system prompt."""
+        key_message = json.dumps([context, user_message]) if context else user_message
+        return LLMResponseCache.make_key(MODEL, self.system_prompt, key_message, LLM_PARAMS)
+
+    async def _cache_lookup(self, user_message: str,
+                      context: Optional[List[Dict[str, str]]] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Return (cache key, cached response) for a prompt; both None when caching is off."""
+        if response_cache is None:
+            return None, None
+        cache_key = self._prompt_key(user_message, context or [])
+        cached = await response_cache.get(cache_key, agent=self.name)
+        if cached is not None:
+            llm_telemetry.record(self.name, MODEL, cache_hit=True)
+        return cache_key, cached
+
+    def _record_call(self, started: float, usage: Optional[CompletionUsage], retries: int,
+                     streamed: bool = False, error: Optional[str] = None):
+        """Add one provider round trip to the telemetry."""
+        llm_telemetry.record(
+            self.name,
+            MODEL,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            latency_s=time.perf_counter() - started,
+            retries=retries,
+            streamed=streamed,
+            error=error
+        )
+
+    async def call_llm(self, user_message: str) -> str:
+        """Call OpenAI API with the agent's system prompt.
+
+        The request is awaited on the shared async client, so other agents,
+        workflows and the web UI keep running while this one waits on the LLM.
+        Inside a TokenStream the completion is streamed and each delta is
+        forwarded to the stream as it arrives; the full text is still returned.
+        Inside a conversation (conversation_memory.remembering) its summary and
+        recent turns are sent as context. Raises DeadlineExceeded (after cancelling
+        the request) when the caller's deadline passes first.
+        """
+        emit = token_sink.get()
+        if emit is not None:
+            parts = []
+            async for delta in self.stream_llm(user_message):
+                parts.append(delta)
+                emit(delta)
+            return "".join(parts)
+
+        context = conversation_context()
+        cache_key, cached = await self._cache_lookup(user_message, context)
+        if cached is not None:
+            return cached
+
+        # Identical prompts already in flight (from any agent instance) share one request
+        flight_key = cache_key or self._prompt_key(user_message, context)
+        return await within_deadline(
+            llm_flight.do(flight_key, lambda: self._complete(user_message, cache_key, context))
+        )
+
+    async def _complete(self, user_message: str, cache_key: Optional[str],
+                        context: Optional[List[Dict[str, str]]] = None) -> str:
+        """One non-streaming chat completion round trip."""
+        started = time.perf_counter()
+        retries = []
         try:
-            response = client.chat.completions.create(
-                model=MODEL,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500
+            messages = self._messages(user_message, context)
+            response = await llm_limiter.call(
+                lambda: client.chat.completions.create(model=MODEL, messages=messages, **LLM_PARAMS),
+                request_tokens(messages),
+                on_retry=retries.append
             )
-            return response.choices[0].message.content
-
+            self._record_call(started, response.usage, len(retries))
+            content = response.choices[0].message.content
+            if cache_key is not None and content:
+                response_cache.set(cache_key, content, time.perf_counter() - started)
+            return content
+
+        except asyncio.CancelledError:
+            # Every caller gave up (deadline or disconnect): the request is abandoned, not failed
+            self._record_call(started, None, len(retries), error="cancelled")
+            raise
         except Exception as e:
+            self._record_call(started, None, len(retries), error=str(e))
             return f"❌ Error calling LLM: {str(e)}"
 
+    async def stream_llm(self, user_message: str) -> AsyncIterator[str]:
+        """Stream the completion for a prompt, yielding text deltas as they arrive."""
+        context = conversation_context()
+        cache_key, cached = await self._cache_lookup(user_message, context)
+        if cached is not None:
+            yield cached
+            return
+
+        started = time.perf_counter()
+        retries = []
+        stream = None
+        try:
+            parts = []
+            usage = None
+            messages = self._messages(user_message, context)
+            # Rate limits surface when the request is opened, so only that part is retried;
+            # the client's connection pool still caps how many streams are open at once.
+            stream = await within_deadline(llm_limiter.call(
+                lambda: client.chat.completions.create(
+                    model=MODEL, messages=messages, stream=True,
+                    stream_options={"include_usage": True}, **LLM_PARAMS
+                ),
+                request_tokens(messages),
+                on_retry=retries.append
+            ))
+            async for chunk in iterate_within_deadline(stream):
+                usage = chunk.usage or usage  # final chunk (servers that support include_usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+            if usage is None:
+                prompt_tokens = estimate_tokens(json.dumps(messages))
+                completion_tokens = estimate_tokens("".join(parts))
+                usage = CompletionUsage(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                        total_tokens=prompt_tokens + completion_tokens)
+            self._record_call(started, usage, len(retries), streamed=True)
+            if cache_key is not None and parts:
+                response_cache.set(cache_key, "".join(parts), time.perf_counter() - started)
+
+        except (DeadlineExceeded, asyncio.CancelledError, GeneratorExit) as e:
+            # Out of time or abandoned by the consumer: stop reading and let the caller handle it
+            self._record_call(started, None, len(retries), streamed=True,
+                              error="deadline exceeded" if isinstance(e, DeadlineExceeded) else "cancelled")
+            raise
+        except Exception as e:
+            self._record_call(started, None, len(retries), streamed=True, error=str(e))
+            yield f"❌ Error calling LLM: {str(e)}"
+        finally:
+            if stream is not None:
+                await stream.close()  # hand the connection back instead of draining the rest
+
+    async def answer(self, kind: str, data: ToolOutput, prompt: str) -> str:
+        """Tiered inference: a rule answers clear-cut `data`, anything else goes to the LLM with `prompt`."""
+        return await inference_router.route(self.name, kind, data, lambda: self.call_llm(prompt))
+
+    @property
+    def cache_stats(self) -> Dict[str, Any]:
+        """LLM cache hit rate and latency saved for this agent."""
+        if response_cache is None:
+            return {}
+        return response_cache.summary().get(self.name, {})
+
     def log(self, message: str):
         """Log agent activity."""
         print(f"\n🤖 [{self.name}] {message}")
@@ -131,8 +296,10 @@ Be concise and data-driven in your responses."""
             {"sku": sku}
         )
 
-        # Parse and analyze
-        analysis = self.call_llm(
+        # Parse and analyze (routine stock levels don't need the LLM)
+        analysis = await self.answer(
+            "inventory",
+            result,
             f"Analyze this inventory data and provide a brief assessment:\n{result}"
         )
 
@@ -142,25 +309,80 @@ Be concise and data-driven in your responses."""
             "analysis": analysis
         }
 
-    async def audit_inventory(self, skus: List[str]) -> str:
-        """Perform inventory audit across multiple products."""
+    async def stream_inventory_status(self, skus: Iterable[str],
+                                      max_concurrency: Optional[int] = None) -> AsyncIterator[Tuple[str, ToolOutput]]:
+        """Yield (sku, inventory result) pairs in input order while checks run concurrently."""
+        async for parameters, result in MCPToolExecutor.execute_many(
+            "check_inventory_status",
+            ({"sku": sku} for sku in skus),
+            max_concurrency
+        ):
+            yield parameters["sku"], result
+
+    def stream_audit(self, skus: Iterable[str], max_concurrency: Optional[int] = None) -> AsyncIterator[AuditProgress]:
+        """Audit SKUs as a stream: each SKU's finding with the running totals (constant memory)."""
+        return stream_audit(self.stream_inventory_status(skus, max_concurrency))
+
+    async def audit_inventory(self, skus: List[str], max_concurrency: Optional[int] = None,
+                              chunk_size: Optional[int] = None) -> str:
+        """Perform inventory audit across multiple products.
+
+        Tool results go into the prompt as a compact table instead of indented
+        JSON. Audits larger than ``chunk_size`` SKUs are map-reduced: each chunk
+        is analyzed by its own LLM call as soon as its rows arrive (in parallel
+        with the remaining tool calls), then the partial findings are reduced
+        into one summary.
+        """
         self.log(f"Performing inventory audit for {len(skus)} products")
+        chunk_size = max(1, chunk_size or AUDIT_CHUNK_SIZE)
 
-        results = []
-        for sku in skus:
-            result = await MCPToolExecutor.execute_tool(
-                "check_inventory_status",
-                {"sku": sku}
-            )
-            results.append(f"SKU {sku}: {result}")
-
-        # Get LLM analysis
-        combined_data = "\n\n".join(results)
-        analysis = self.call_llm(
-            f"Review this inventory audit and identify critical issues:\n{combined_data}"
-        )
+        rows: List[Dict[str, Any]] = []
+        chunk_tasks: List[asyncio.Task] = []
+        try:
+            async for progress in self.stream_audit(skus, max_concurrency):
+                data = parse_tool_result(progress.result)
+                row = {column: (data or {}).get(column) for column in INVENTORY_COLUMNS}
+                row["sku"] = progress.sku
+                if data is None:
+                    row["status"] = progress.result
+                rows.append(row)
+
+                if len(skus) > chunk_size and len(rows) == chunk_size:
+                    chunk_tasks.append(asyncio.create_task(self._analyze_audit_chunk(rows, len(chunk_tasks) + 1)))
+                    rows = []
+
+            if not chunk_tasks:
+                return await self.call_llm(
+                    f"Review this inventory audit and identify critical issues:\n"
+                    f"{encode_table(rows, INVENTORY_COLUMNS)}"
+                )
 
-        return analysis
+            # Map: one analysis per chunk; Reduce: merge the partial findings
+            if rows:
+                chunk_tasks.append(asyncio.create_task(self._analyze_audit_chunk(rows, len(chunk_tasks) + 1)))
+            findings = await asyncio.gather(*chunk_tasks)
+
+            partials = "\n\n".join(f"Part {i}:\n{finding}" for i, finding in enumerate(findings, 1))
+            return await self.call_llm(
+                f"These are findings from {len(findings)} parts of one inventory audit.\n"
+                f"Totals: {progress.audited} SKUs audited, {progress.out_of_stock} out of stock, "
+                f"{progress.low_stock} low stock, {progress.errors} lookup errors.\n\n"
+                f"{partials}\n\n"
+                f"Merge them into one audit summary that identifies the critical issues and restocking priorities."
+            )
+        finally:
+            for task in chunk_tasks:
+                task.cancel()  # a timed-out or abandoned audit stops its outstanding chunk analyses
+
+    async def _analyze_audit_chunk(self, rows: List[Dict[str, Any]], part: int) -> str:
+        """Map step of a chunked audit: list the issues in one slice of the catalog."""
+        # Chunks run in parallel; only the final reduce step streams to the caller
+        with muted_tokens():
+            return await self.call_llm(
+                f"Inventory audit part {part}. List only the SKUs with problems "
+                f"(out of stock, low stock, errors) and why, one line each:\n"
+                f"{encode_table(rows, INVENTORY_COLUMNS)}"
+            )
 
 
 class CustomerServiceAgent(BaseAgent):
@@ -190,8 +412,10 @@ Be helpful, empathetic, and efficient."""
             {"order_id": order_id, "action": "retrieve"}
         )
 
-        # Generate customer-friendly response
-        response = self.call_llm(
+        # Generate customer-friendly response (standard order states use a fixed reply)
+        response = await self.answer(
+            "order",
+            order_data,
             f"A customer is asking about their order. Here's the data:\n{order_data}\n\n"
             f"Provide a friendly response explaining the order status."
         )
@@ -215,7 +439,7 @@ Be helpful, empathetic, and efficient."""
         )
 
         # Generate personalized message
-        response = self.call_llm(
+        response = await self.call_llm(
             f"Customer profile:\n{customer_data}\n\n"
             f"Recommendations:\n{recommendations}\n\n"
             f"Write a personalized email suggesting these products to the customer."
@@ -233,7 +457,7 @@ Be helpful, empathetic, and efficient."""
         )
 
         # Generate confirmation message
-        response = self.call_llm(
+        response = await self.call_llm(
             f"Order shipment result:\n{result}\n\n"
             f"Generate a customer notification email about the shipment."
         )
@@ -269,7 +493,7 @@ Be analytical, insightful, and focused on actionable insights."""
         )
 
         # Generate executive summary
-        summary = self.call_llm(
+        summary = await self.call_llm(
             f"Analyze this sales report and provide an executive summary with key insights and recommendations:\n{report_data}"
         )
 
@@ -284,7 +508,7 @@ Be analytical, insightful, and focused on actionable insights."""
             {"customer_id": customer_id}
         )
 
-        insights = self.call_llm(
+        insights = await self.call_llm(
             f"Analyze this customer data and provide strategic insights:\n{analytics}\n\n"
             f"Focus on: retention strategies, upsell opportunities, and engagement tactics."
         )
@@ -313,27 +537,168 @@ Be organized, efficient, and ensure all aspects of the request are addressed."""
         self.customer_service_agent = CustomerServiceAgent()
         self.analytics_agent = AnalyticsAgent()
 
-    async def handle_complex_request(self, user_request: str) -> str:
-        """Handle complex multi-step requests."""
+    def _agent_functions(self) -> Dict[str, Tuple[Dict[str, Any], Any]]:
+        """Sub-agent capabilities exposed to the model next to the raw MCP tools."""
+
+        def schema(name: str, description: str, properties: Dict[str, Any], required: List[str]):
+            return {
+                "type": "function",
+                "function": {
+                    "name": name,
+                    "description": description,
+                    "parameters": {"type": "object", "properties": properties, "required": required}
+                }
+            }
+
+        string = {"type": "string"}
+        return {
+            "audit_inventory": (
+                schema("audit_inventory", "Inventory Agent: audit several SKUs and summarize critical stock issues.",
+                       {"skus": {"type": "array", "items": string}}, ["skus"]),
+                lambda args: self.inventory_agent.audit_inventory(args["skus"])
+            ),
+            "write_order_update": (
+                schema("write_order_update", "Customer Service Agent: write a customer-friendly order status reply.",
+                       {"order_id": string}, ["order_id"]),
+                lambda args: self.customer_service_agent.handle_order_inquiry(args["order_id"])
+            ),
+            "write_recommendation_email": (
+                schema("write_recommendation_email",
+                       "Customer Service Agent: write a personalized product recommendation email.",
+                       {"customer_id": string, "category": string}, ["customer_id"]),
+                lambda args: self.customer_service_agent.recommend_products(args["customer_id"], args.get("category"))
+            ),
+            "write_business_report": (
+                schema("write_business_report", "Analytics Agent: executive summary of sales (period: day, week, month).",
+                       {"period": string}, ["period"]),
+                lambda args: self.analytics_agent.generate_business_report(args["period"])
+            ),
+            "analyze_customer_segment": (
+                schema("analyze_customer_segment",
+                       "Analytics Agent: retention, upsell and engagement insights for a customer.",
+                       {"customer_id": string}, ["customer_id"]),
+                lambda args: self.analytics_agent.analyze_customer_segment(args["customer_id"])
+            ),
+        }
+
+    async def _run_tool_call(self, tool_call, agent_functions: Dict[str, Tuple[Dict[str, Any], Any]]) -> str:
+        """Execute one function call from the model against a sub-agent or MCP tool."""
+        name = tool_call.function.name
+        try:
+            arguments = json.loads(tool_call.function.arguments or "{}")
+        except ValueError:
+            return f"❌ Error: invalid arguments for {name}: {tool_call.function.arguments}"
+
+        self.log(f"→ {name}({', '.join(f'{k}={v}' for k, v in arguments.items())})")
+        try:
+            if name in agent_functions:
+                # Sub-agent output is an intermediate result; only the final answer streams
+                with muted_tokens():
+                    return str(await agent_functions[name][1](arguments))
+            return to_text(await MCPToolExecutor.execute_tool(name, arguments))  # tool messages are text
+        except DeadlineExceeded:
+            raise  # the whole request is out of time, not just this call
+        except Exception as e:
+            return f"❌ Error executing {name}: {str(e)}"
+
+    async def handle_complex_request(self, user_request: str,
+                                     max_iterations: Optional[int] = None) -> str:
+        """Handle complex multi-step requests.
+
+        The model gets the MCP tools and the sub-agents as functions. Every
+        function call in a turn is executed concurrently (e.g. five SKU lookups
+        cost one round trip, not five) and the results are fed back until the
+        model answers without calling anything.
+        """
         self.log(f"Processing request: {user_request}")
 
-        # Analyze request and plan workflow
-        plan = self.call_llm(
-            f"User request: {user_request}\n\n"
-            f"Available agents:\n"
-            f"- Inventory Agent (check stock, audit inventory)\n"
-            f"- Customer Service Agent (orders, recommendations)\n"
-            f"- Analytics Agent (reports, insights)\n\n"
-            f"Identify which agents should be involved and what tasks they should perform. "
-            f"Be specific and concise."
+        agent_functions = self._agent_functions()
+        tools = await MCPToolExecutor.tool_schemas() + [entry[0] for entry in agent_functions.values()]
+        messages: List[Dict[str, Any]] = self._messages(
+            f"{user_request}\n\n"
+            f"Use the available functions to gather the facts you need. Request independent "
+            f"lookups together in one turn, then answer concisely.",
+            conversation_context()
         )
 
-        print(f"\n📋 Workflow Plan:\n{plan}\n")
+        # Sub-agent calls made on the model's behalf are attributed to this request
+        workflow = current_workflow.set(current_workflow.get() or "Coordinator Request")
+        try:
+            for iteration in range(max(1, max_iterations or COORDINATOR_MAX_ITERATIONS)):
+                message = await self._tool_round(messages, tools)
+                if not message.tool_calls:
+                    return self._final_answer(message.content or "")
+
+                messages.append(message.model_dump(exclude_none=True))
+                self.log(f"Round {iteration + 1}: running {len(message.tool_calls)} call(s) in parallel")
+                results = await asyncio.gather(
+                    *(self._run_tool_call(tool_call, agent_functions) for tool_call in message.tool_calls)
+                )
+                messages.extend(
+                    {"role": "tool", "tool_call_id": tool_call.id, "content": result}
+                    for tool_call, result in zip(message.tool_calls, results)
+                )
+
+            # Out of round trips: answer with what has been gathered so far
+            message = await self._tool_round(messages, tools, tool_choice="none")
+            return self._final_answer(message.content or "")
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            return f"❌ Error calling LLM: {str(e)}"
+        finally:
+            current_workflow.reset(workflow)
+
+    async def _tool_round(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], **options):
+        """One function-calling completion; returns the assistant message."""
+        started = time.perf_counter()
+        retries = []
+        try:
+            response = await within_deadline(llm_limiter.call(
+                lambda: client.chat.completions.create(
+                    model=MODEL, messages=messages, tools=tools, **options, **LLM_PARAMS
+                ),
+                request_tokens(messages, tools),
+                on_retry=retries.append
+            ))
+        except asyncio.CancelledError:
+            self._record_call(started, None, len(retries), error="cancelled")
+            raise
+        except Exception as e:
+            self._record_call(started, None, len(retries), error=str(e))
+            raise
+        self._record_call(started, response.usage, len(retries))
+        return response.choices[0].message
+
+    @staticmethod
+    def _final_answer(content: str) -> str:
+        emit = token_sink.get()
+        if emit is not None and content:
+            emit(content)
+        return content
+
+
+# Folds chat turns that slid out of a conversation's memory window into its rolling summary
+memory_summarizer = BaseAgent(
+    name="Memory Summarizer",
+    role="Conversation Summarizer",
+    system_prompt="""You maintain a running summary of a conversation between a user and e-commerce agents.
+Keep IDs (SKUs, orders, customers), figures, decisions and open requests. Drop pleasantries."""
+)
 
-        return plan
 
+async def summarize_turns(summary: str, turns: List[Dict[str, str]], max_tokens: int) -> str:
+    """ConversationMemory summarizer backed by the LLM (runs in the background)."""
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    return await memory_summarizer.call_llm(
+        f"Current summary:\n{summary or '(empty)'}\n\n"
+        f"New turns:\n{transcript}\n\n"
+        f"Return the updated summary in at most {max_tokens * 3 // 4} words."
+    )
 
-# Predefined Workflow Scenarios
+
+# Predefined Workflow Scenarios (DAGs in workflows.py; independent steps run concurrently)
 async def workflow_vip_customer_order():
     """Scenario: Handle VIP customer order and upsell opportunity."""
     print("\n" + "="*70)
@@ -341,23 +706,10 @@ async def workflow_vip_customer_order():
     print("="*70)
 
     coordinator = CoordinatorAgent()
-    cs_agent = coordinator.customer_service_agent
-    analytics_agent = coordinator.analytics_agent
-
-    # Step 1: Check order status
-    print("\n📦 Step 1: Check Order Status")
-    order_status = await cs_agent.handle_order_inquiry("ORD001")
-    print(order_status)
-
-    # Step 2: Analyze customer for upsell
-    print("\n📊 Step 2: Analyze Customer Profile")
-    customer_insights = await analytics_agent.analyze_customer_segment("CUST001")
-    print(customer_insights)
-
-    # Step 3: Generate recommendations
-    print("\n💡 Step 3: Generate Product Recommendations")
-    recommendations = await cs_agent.recommend_products("CUST001", "Electronics")
-    print(recommendations)
+    await workflows.run_in_terminal(workflows.vip_customer_upsell(
+        coordinator.customer_service_agent,
+        coordinator.analytics_agent
+    ))
 
 
 async def workflow_inventory_alert():
@@ -367,13 +719,7 @@ async def workflow_inventory_alert():
     print("="*70)
 
     coordinator = CoordinatorAgent()
-    inv_agent = coordinator.inventory_agent
-
-    # Audit all products
-    print("\n📦 Performing Inventory Audit")
-    skus = ["PROD001", "PROD002", "PROD003", "PROD004", "PROD005"]
-    audit_report = await inv_agent.audit_inventory(skus)
-    print(audit_report)
+    await workflows.run_in_terminal(workflows.inventory_audit(coordinator.inventory_agent))
 
 
 async def workflow_daily_business_review():
@@ -383,19 +729,10 @@ async def workflow_daily_business_review():
     print("="*70)
 
     coordinator = CoordinatorAgent()
-    analytics_agent = coordinator.analytics_agent
-    inv_agent = coordinator.inventory_agent
-
-    # Step 1: Generate sales report
-    print("\n📈 Step 1: Sales Performance")
-    sales_report = await analytics_agent.generate_business_report("week")
-    print(sales_report)
-
-    # Step 2: Check critical inventory
-    print("\n📦 Step 2: Critical Inventory Check")
-    critical_check = await inv_agent.check_stock("PROD004")  # Out of stock item
-    print(f"\nData: {critical_check['data']}")
-    print(f"\nAnalysis: {critical_check['analysis']}")
+    await workflows.run_in_terminal(workflows.daily_business_review(
+        coordinator.analytics_agent,
+        coordinator.inventory_agent
+    ))
 
 
 async def workflow_order_fulfillment():
@@ -405,28 +742,40 @@ async def workflow_order_fulfillment():
     print("="*70)
 
     coordinator = CoordinatorAgent()
-    cs_agent = coordinator.customer_service_agent
-    inv_agent = coordinator.inventory_agent
-
-    order_id = "ORD002"
-
-    # Step 1: Check order details
-    print(f"\n📦 Step 1: Review Order {order_id}")
-    order_data = await MCPToolExecutor.execute_tool(
-        "process_order",
-        {"order_id": order_id, "action": "retrieve"}
-    )
-    print(order_data)
-
-    # Step 2: Verify inventory for items (PROD003)
-    print("\n📦 Step 2: Verify Inventory")
-    inv_check = await inv_agent.check_stock("PROD003")
-    print(f"\nAnalysis: {inv_check['analysis']}")
-
-    # Step 3: Ship the order
-    print("\n🚚 Step 3: Process Shipment")
-    shipment = await cs_agent.ship_order(order_id)
-    print(shipment)
+    await workflows.run_in_terminal(workflows.order_fulfillment(
+        coordinator.customer_service_agent,
+        coordinator.inventory_agent,
+        MCPToolExecutor
+    ))
+
+
+def print_cache_stats():
+    """Print per-agent LLM cache hit rates, fast-path escalation, coalesced calls and rate limiting."""
+    for flight in (tool_flight, llm_flight):
+        stats = flight.stats()
+        if stats["coalesced"]:
+            print(f"\n🔗 Coalesced {flight.name} calls: {stats['coalesced']} of {stats['calls']}")
+
+    for agent, stats in inference_router.summary().items():
+        print(f"\n⚡ {agent}: {stats['rules']} answered by rules, {stats['escalated']} escalated to the LLM "
+              f"({stats['escalation_rate']:.0%} escalation)")
+
+    if llm_cassette is not None:
+        stats = llm_cassette.stats()
+        print(f"\n📼 LLM cassette ({stats['mode']}): {stats['recorded']} recorded, {stats['replayed']} replayed, "
+              f"{stats['misses']} not found")
+
+    limits = llm_limiter.stats()
+    if limits["retries"] or limits["throttled_s"]:
+        print(f"\n🚦 LLM rate limiting: {limits['rate_limited']} x 429, {limits['retries']} retries, "
+              f"{limits['throttled_s']:.1f}s queued, concurrency {limits['concurrency_limit']}/{limits['max_concurrency']}")
+
+    if response_cache is None or not response_cache.stats:
+        return
+    print("\n🗄️  LLM Cache:")
+    for agent, stats in response_cache.summary().items():
+        print(f"   {agent}: {stats['hits']} hits / {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%}), {stats['latency_saved_s']:.2f}s saved")
 
 
 async def main_menu():
@@ -440,9 +789,10 @@ async def main_menu():
     print("3. Daily Business Review")
     print("4. Order Fulfillment Workflow")
     print("5. Run All Scenarios")
+    print("6. Ask the Coordinator (free-form request)")
     print("0. Exit")
 
-    choice = input("\nSelect scenario (0-5): ").strip()
+    choice = input("\nSelect scenario (0-6): ").strip()
 
     if choice == "1":
         await workflow_vip_customer_order()
@@ -458,6 +808,10 @@ async def main_menu():
         await workflow_inventory_alert()
         await workflow_daily_business_review()
         await workflow_order_fulfillment()
+    elif choice == "6":
+        request = input("\nYour request: ").strip()
+        answer = await CoordinatorAgent().handle_complex_request(request)
+        print(f"\n📋 Coordinator:\n{answer}")
     elif choice == "0":
         print("\n👋 Goodbye!")
         return
@@ -465,6 +819,8 @@ async def main_menu():
         print("\n❌ Invalid choice")
         await main_menu()
 
+    print_cache_stats()
+
     # Ask if user wants to continue
     again = input("\n\nRun another scenario? (y/n): ").strip().lower()
     if again == 'y':
@@ -476,7 +832,13 @@ async def main_menu():
 if __name__ == "__main__":
     print("\n🔧 Initializing Multi-Agent System...")
     print(f"📡 Using OpenAI Model: {MODEL}")
-    print(f"🔑 API Key: {os.getenv('OPENAI_API_KEY')[:20]}...")
+    if LLM_BASE_URL:
+        print(f"🌐 LLM Endpoint: {LLM_BASE_URL}")
+    print(f"🚦 Max concurrent LLM calls: {LLM_MAX_CONCURRENCY}")
+    if llm_cassette is not None:
+        print(f"📼 LLM cassette: {llm_cassette.mode} {llm_cassette.path}")
+    if os.getenv("OPENAI_API_KEY"):
+        print(f"🔑 API Key: {os.getenv('OPENAI_API_KEY')[:20]}...")
 
     try:
         asyncio.run(main_menu())
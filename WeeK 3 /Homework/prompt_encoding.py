@@ -0,0 +1,65 @@
+"""
+Prompt Encoding Helpers
+=======================
+Compact encodings of tool results for LLM prompts.
+
+Tool results serialize to indented JSON, which repeats every key name (plus quotes, braces
+and indentation) for every record. When many records of the same shape go into
+one prompt, a header row followed by one pipe-separated line per record carries
+the same information in a fraction of the tokens.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+_LEADING_SYMBOLS = re.compile(r"^[^\w$]+")
+
+# check_inventory_status fields, in the order they are tabulated for audits
+INVENTORY_COLUMNS = ["sku", "product_name", "stock_quantity", "price", "category", "warehouse_location", "status"]
+
+
+def parse_tool_result(result: Any) -> Optional[Dict[str, Any]]:
+    """Fields of a tool result (typed or JSON text); returns None for plain-text results such as errors."""
+    if isinstance(result, dict):
+        return result  # typed result from an in-process tool: nothing to parse
+    try:
+        data = json.loads(result)
+    except (TypeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ",".join(_cell(v) for v in value)
+    text = str(value).replace("|", "/").replace("\n", " ")
+    # Status values carry decorative emoji ("⛔ Out of Stock") that cost tokens but add nothing
+    return _LEADING_SYMBOLS.sub("", text).strip()
+
+
+def encode_table(records: Sequence[Dict[str, Any]], columns: Optional[List[str]] = None) -> str:
+    """
+    Encode same-shaped records as a header line plus one pipe-separated row each.
+
+    Args:
+        records: Parsed tool results (dicts)
+        columns: Columns to keep, in order (default: keys of the first record)
+
+    Returns:
+        Compact table text, e.g. "sku|stock|status\\nPROD001|45|In Stock"
+    """
+    if not records:
+        return ""
+    columns = columns or list(records[0].keys())
+    lines = ["|".join(columns)]
+    lines.extend("|".join(_cell(record.get(column)) for column in columns) for record in records)
+    return "\n".join(lines)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English/JSON text)."""
+    return max(1, len(text) // 4) if text else 0
+
@@ -0,0 +1,239 @@
+"""
+LLM Rate Limiter
+================
+Client-side throttling and retries shared by every agent's LLM calls.
+
+- Token buckets for requests-per-minute and tokens-per-minute, so bursts from
+  parallel workflows queue up locally instead of tripping provider limits
+- Retries with jittered exponential backoff on 429s, 5xx responses and
+  connection errors, honouring the server's Retry-After header
+- Adaptive concurrency (AIMD): the in-flight limit halves when the provider
+  returns 429 and creeps back up with every success, settling just under quota
+
+Usage:
+    limiter = RateLimiter(rpm=500, tpm=90_000, max_concurrency=8)
+    response = await limiter.call(lambda: client.chat.completions.create(...), estimated_tokens=800)
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from openai import APIConnectionError, APIStatusError
+
+# Transient statuses worth another attempt (everything else is the caller's bug)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait according to Retry-After / retry-after-ms headers (None if absent)."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Continuously refilling budget of `per_minute` units."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` now and return how many seconds to wait before using it.
+
+        The balance may go negative, which queues later callers behind earlier
+        ones without locks (FIFO by reservation order).
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= min(amount, self.capacity)  # a request larger than the bucket must still run eventually
+        return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount: float):
+        """Return over-estimated units (or charge more when `amount` is negative)."""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdaptiveConcurrency:
+    """In-flight limit that halves on rate limiting and grows back additively (AIMD)."""
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        self._decreased_at = 0.0
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # a slot was handed over just as we gave up
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def on_success(self):
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def on_rate_limited(self, started: float):
+        # Requests already in flight when we backed off report the same overload; count it once
+        if started >= self._decreased_at:
+            self.limit = max(1.0, self.limit / 2)
+            self._decreased_at = time.monotonic()
+
+
+class RateLimiter:
+    """RPM/TPM buckets + adaptive concurrency + retries around LLM requests."""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, max_concurrency: int = 8, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 60.0):
+        """
+        Args:
+            rpm: Requests per minute (0 = unlimited)
+            tpm: Tokens per minute (0 = unlimited)
+            max_concurrency: Upper bound for the adaptive in-flight limit
+            max_retries: Extra attempts after a retryable failure
+            base_delay: First backoff step in seconds (doubles per attempt, fully jittered)
+            max_delay: Cap on any single wait, including Retry-After
+        """
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.throttled_s = 0.0
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Backoff before the next attempt, or None when the error is not worth retrying."""
+        retry_after = None
+        if isinstance(error, APIStatusError):
+            if error.status_code not in RETRYABLE_STATUS and error.status_code < 500:
+                return None
+            retry_after = parse_retry_after(error.response.headers)
+        elif not isinstance(error, APIConnectionError):  # includes timeouts
+            return None
+
+        if retry_after is not None:
+            # Small jitter keeps every waiting request from retrying in the same instant
+            return min(self.max_delay, retry_after + random.uniform(0, self.base_delay))
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], estimated_tokens: int = 0,
+                   on_retry: Optional[Callable[[Exception], None]] = None) -> Any:
+        """
+        Run `fn()` (one LLM request) within the limits, retrying transient failures.
+
+        `estimated_tokens` is charged to the TPM bucket once, up front, however
+        many attempts the call takes (a failed request consumes no tokens); if
+        the result carries `usage.total_tokens` the difference is settled
+        afterwards, and a call that fails for good gets the estimate back.
+        Every attempt counts against RPM. `on_retry` is called with the error
+        before each retry.
+        """
+        self.calls += 1
+        for attempt in range(self.max_retries + 1):
+            wait = max(
+                self.requests.reserve(1) if self.requests else 0.0,
+                self.tokens.reserve(estimated_tokens) if self.tokens and attempt == 0 else 0.0
+            )
+            if wait:
+                self.throttled_s += wait
+                await asyncio.sleep(wait)
+
+            await self.concurrency.acquire()
+            started = time.monotonic()
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if isinstance(e, APIStatusError) and e.status_code == 429:
+                    self.rate_limited += 1
+                    self.concurrency.on_rate_limited(started)
+                if delay is None or attempt == self.max_retries:
+                    self.failures += 1
+                    if self.tokens:
+                        self.tokens.refund(estimated_tokens)
+                    raise
+                self.retries += 1
+                if on_retry is not None:
+                    on_retry(e)
+            else:
+                self.concurrency.on_success()
+                usage = getattr(result, "usage", None)
+                if self.tokens and usage is not None and getattr(usage, "total_tokens", None):
+                    self.tokens.refund(estimated_tokens - usage.total_tokens)
+                return result
+            finally:
+                self.concurrency.release()
+
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "throttled_s": round(self.throttled_s, 2),
+            "concurrency_limit": int(self.concurrency.limit),
+            "max_concurrency": self.concurrency.max_limit,
+        }
+
+
+def rate_limiter_from_env(max_concurrency: int) -> RateLimiter:
+    """Build the limiter configured by LLM_RPM / LLM_TPM / LLM_MAX_RETRIES / LLM_RETRY_* variables."""
+    return RateLimiter(
+        rpm=float(os.getenv("LLM_RPM", "0")),
+        tpm=float(os.getenv("LLM_TPM", "0")),
+        max_concurrency=max_concurrency,
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "5")),
+        base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+        max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "60")),
+    )
@@ -0,0 +1,217 @@
+"""
+Business Rule Engine
+====================
+Declarative rules over the fields of tool results, loaded from a JSON config
+(rules.json by default) instead of an if/elif chain in code.
+
+A rule names the fields it tests, a priority and the message to produce:
+
+    {"name": "out_of_stock", "priority": 100,
+     "when": {"status": "⛔ Out of Stock"},
+     "then": "⚠️  ALERT: {{product_name}} is out of stock. Immediate restocking required."}
+
+Conditions in "when" must all hold. A plain value means equality; an object
+gives an operator: {"in": [...]}, {"ne": x}, {"startswith": "..."},
+{"contains": "..."}, {"gt"|"gte"|"lt"|"lte": n} or {"present": true|false}.
+Dotted names reach into nested fields ("sales_metrics.total_revenue"). A rule
+without conditions always matches (use it, at priority 0, as the default).
+"then" may use {{field}} placeholders (see templates.Template), filled from the record.
+
+Rules are indexed when the engine is built: each one is filed under one of its
+conditions, by field and value for equality ("status" -> "⛔ Out of Stock") or
+by field for the other operators. For a record the engine looks up its
+fields' values in the index and checks only the rules found there, highest
+priority first, so evaluation cost depends on how many rules could apply
+rather than on how many exist.
+
+Usage:
+    engine = RuleEngine.from_file("rules.json")
+    message = engine.evaluate(parse_tool_result(result))
+"""
+
+import json
+import operator
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from templates import Template
+
+RULES_PATH = os.getenv("AGENT_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json"))
+
+_MISSING = object()
+
+# Operator name -> test(field value, operand); a missing field fails every test except present: false
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "in": lambda value, options: value in options,
+    "startswith": lambda value, prefix: str(value).startswith(prefix),
+    "contains": lambda value, text: text in str(value),
+    "gt": lambda value, limit: isinstance(value, (int, float)) and value > limit,
+    "gte": lambda value, limit: isinstance(value, (int, float)) and value >= limit,
+    "lt": lambda value, limit: isinstance(value, (int, float)) and value < limit,
+    "lte": lambda value, limit: isinstance(value, (int, float)) and value <= limit,
+    "present": lambda value, expected: expected,
+}
+
+# Operators that can only hold when the field exists, so a rule can be indexed under them
+_INDEXABLE = {"eq", "in", "startswith", "contains", "gt", "gte", "lt", "lte"}
+
+
+class RuleError(ValueError):
+    """A rule that cannot be loaded (unknown operator, missing message)."""
+
+
+def _resolve(record: Any, path: Tuple[str, ...]) -> Any:
+    for key in path:
+        if not isinstance(record, dict) or key not in record:
+            return _MISSING
+        record = record[key]
+    return record
+
+
+@dataclass
+class Condition:
+    """One test on one (possibly nested) field."""
+
+    path: Tuple[str, ...]
+    op: str
+    operand: Any
+
+    def holds(self, record: Any) -> bool:
+        value = _resolve(record, self.path)
+        if value is _MISSING:
+            return self.op == "present" and not self.operand
+        if self.op == "present":
+            return bool(self.operand)
+        try:
+            return OPERATORS[self.op](value, self.operand)
+        except TypeError:  # e.g. an unhashable value tested with "in"
+            return False
+
+
+@dataclass
+class Rule:
+    """A named, prioritized set of conditions and the message produced when they all hold."""
+
+    name: str
+    then: str
+    priority: int = 0
+    conditions: List[Condition] = field(default_factory=list)
+    order: int = 0  # position in the config; breaks priority ties
+    template: Optional[Template] = field(default=None, repr=False)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], order: int = 0) -> "Rule":
+        name = config.get("name") or f"rule_{order}"
+        if not isinstance(config.get("then"), str):
+            raise RuleError(f"Rule '{name}': 'then' must be a message string")
+
+        conditions = []
+        for key, test in (config.get("when") or {}).items():
+            tests = test.items() if isinstance(test, dict) else [("eq", test)]
+            for op, operand in tests:
+                if op not in OPERATORS:
+                    raise RuleError(f"Rule '{name}': unknown operator '{op}' for '{key}'")
+                if op == "in":
+                    operand = list(operand)
+                conditions.append(Condition(tuple(key.split(".")), op, operand))
+
+        then = config["then"]
+        return cls(
+            name=name,
+            then=then,
+            priority=int(config.get("priority", 0)),
+            conditions=conditions,
+            order=order,
+            template=Template(then, name) if "{{" in then else None,
+        )
+
+    def matches(self, record: Any) -> bool:
+        return all(condition.holds(record) for condition in self.conditions)
+
+    def render(self, record: Any) -> str:
+        return self.template.render(record) if self.template is not None else self.then
+
+    @property
+    def rank(self) -> Tuple[int, int]:
+        return (-self.priority, self.order)
+
+
+class RuleEngine:
+    """Rules indexed by field and value; only the rules a record could satisfy are checked."""
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = sorted(rules, key=lambda rule: rule.rank)
+        # path -> value -> rules anchored on that equality
+        self._by_value: Dict[Tuple[str, ...], Dict[Hashable, List[Rule]]] = {}
+        # path -> rules anchored on another test that needs the field to exist
+        self._by_field: Dict[Tuple[str, ...], List[Rule]] = {}
+        # rules with nothing to index (no conditions, or only ne / present: false)
+        self._always: List[Rule] = []
+
+        for rule in self.rules:  # in rank order, so every index list is already sorted
+            anchor = self._anchor(rule)
+            if anchor is None:
+                self._always.append(rule)
+            elif anchor.op in ("eq", "in"):
+                values = dict.fromkeys(anchor.operand) if anchor.op == "in" else [anchor.operand]
+                by_value = self._by_value.setdefault(anchor.path, {})
+                for value in values:
+                    by_value.setdefault(value, []).append(rule)
+            else:
+                self._by_field.setdefault(anchor.path, []).append(rule)
+
+    @staticmethod
+    def _anchor(rule: Rule) -> Optional[Condition]:
+        """The condition to file a rule under: an equality if it has one (most selective)."""
+        indexable = [c for c in rule.conditions if c.op in _INDEXABLE or (c.op == "present" and c.operand)]
+        equalities = [c for c in indexable if c.op in ("eq", "in") and all(
+            isinstance(value, Hashable) for value in (c.operand if c.op == "in" else [c.operand]))]
+        return (equalities or indexable or [None])[0]
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RuleEngine":
+        return cls(Rule.from_config(rule, order) for order, rule in enumerate(config.get("rules", [])))
+
+    @classmethod
+    def from_file(cls, path: str = RULES_PATH) -> "RuleEngine":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_config(json.load(f))
+
+    def candidates(self, record: Any) -> List[Rule]:
+        """Rules that could apply to `record` (found through the index), best rank first."""
+        found = list(self._always)
+        for path, by_value in self._by_value.items():
+            value = _resolve(record, path)
+            if value is _MISSING:
+                continue
+            try:
+                found.extend(by_value.get(value, ()))
+            except TypeError:  # unhashable field value: no equality rule can match it
+                pass
+        for path, rules in self._by_field.items():
+            if _resolve(record, path) is not _MISSING:
+                found.extend(rules)
+        found.sort(key=lambda rule: rule.rank)
+        return found
+
+    def match(self, record: Any) -> Optional[Rule]:
+        """Highest-priority rule whose conditions all hold for `record`."""
+        for rule in self.candidates(record):
+            if rule.matches(record):
+                return rule
+        return None
+
+    def match_all(self, record: Any) -> List[Rule]:
+        """Every matching rule, highest priority first."""
+        return [rule for rule in self.candidates(record) if rule.matches(record)]
+
+    def evaluate(self, record: Any, default: Optional[str] = None) -> Optional[str]:
+        """Message of the best matching rule, or `default`."""
+        rule = self.match(record)
+        return rule.render(record) if rule is not None else default
+
+    def __len__(self) -> int:
+        return len(self.rules)
@@ -0,0 +1,65 @@
+"""
+Single-Flight Call Coalescing
+=============================
+Collapses concurrent identical calls into one in-flight execution.
+
+When several callers ask for the same thing at the same time (e.g. multiple
+web UI users clicking "Daily Business Review"), the first caller runs the work
+and everyone else awaits the same future. Once it finishes the key is released,
+so later calls run fresh (caching is a separate concern).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Share one in-flight future per key between concurrent callers."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+        self._inflight: Dict[Tuple[int, Hashable], list] = {}  # key -> [future, waiter count]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn()` unless an identical call (same key) is already in flight; return its result."""
+        # Futures belong to one event loop, so never share them across loops
+        flight_key = (id(asyncio.get_running_loop()), key)
+        self.calls += 1
+
+        flight = self._inflight.get(flight_key)
+        if flight is None:
+            self.executed += 1
+            future = asyncio.ensure_future(fn())
+            flight = self._inflight[flight_key] = [future, 0]
+            future.add_done_callback(lambda _: self._release(flight_key, future))
+        else:
+            self.coalesced += 1
+
+        future = flight[0]
+        flight[1] += 1
+        try:
+            # Shield so one caller giving up doesn't cancel the work for the others
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if flight[1] == 1 and not future.done():
+                future.cancel()  # last interested caller left: stop the work
+            raise
+        finally:
+            flight[1] -= 1
+
+    def _release(self, flight_key: Tuple[int, Hashable], future: asyncio.Future):
+        flight = self._inflight.get(flight_key)
+        if flight is not None and flight[0] is future:
+            del self._inflight[flight_key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls seen, calls actually executed, and calls served by joining an in-flight one."""
+        return {
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
@@ -0,0 +1,66 @@
+"""
+Token Streaming Helpers
+=======================
+Lets callers watch LLM tokens arrive while an agent method is still running.
+
+Agent methods keep returning their final result. While one runs inside a
+TokenStream, BaseAgent.call_llm switches to a streaming completion and forwards
+each delta to the stream through a context variable, so existing methods (and
+the workflows built from them) stream without a second code path.
+
+Usage:
+    stream = TokenStream(inventory_agent.check_stock("PROD001"))
+    async for delta in stream:
+        print(delta, end="")
+    result = stream.result
+"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+# Callback receiving streamed LLM deltas for the current task (None = not streaming)
+token_sink: ContextVar[Optional[Callable[[str], None]]] = ContextVar("token_sink", default=None)
+
+_DONE = object()
+
+
+@contextmanager
+def muted_tokens():
+    """Stop forwarding tokens inside this block (e.g. parallel map calls whose output would interleave)."""
+    reset = token_sink.set(None)
+    try:
+        yield
+    finally:
+        token_sink.reset(reset)
+
+
+class TokenStream:
+    """Run an agent coroutine and iterate over the LLM tokens it produces."""
+
+    def __init__(self, awaitable: Awaitable[Any]):
+        self._awaitable = awaitable
+        self.result: Any = None
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+
+        # The task copies the current context, so set the sink just around its creation
+        reset = token_sink.set(queue.put_nowait)
+        try:
+            task = asyncio.ensure_future(self._awaitable)
+        finally:
+            token_sink.reset(reset)
+        task.add_done_callback(lambda _: queue.put_nowait(_DONE))
+
+        try:
+            while True:
+                delta = await queue.get()
+                if delta is _DONE:
+                    break
+                yield delta
+            self.result = task.result()
+        finally:
+            if not task.done():
+                task.cancel()
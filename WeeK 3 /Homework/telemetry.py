@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+LLM Call Telemetry
+==================
+Structured per-call records for every agent LLM request, so it is visible which
+agents and workflows drive token spend and latency.
+
+Each record carries the agent, the workflow it ran in, prompt/completion
+tokens, latency, retries, whether the response came from the cache, and an
+estimated cost. Records are kept in memory (for the web UI panel). Setting
+LLM_TELEMETRY_PATH also appends them to a JSONL file in the background (for the
+CLI below and for other processes), rotated at LLM_TELEMETRY_MAX_MB (default 10).
+
+Usage:
+    python telemetry.py summary [--by agent|workflow|model] [--since 60]
+    python telemetry.py calls [--last 20] [--agent "Inventory Agent"]
+"""
+
+import argparse
+import atexit
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+# Name of the workflow the current task is running in (set by the workflow engine)
+current_workflow: ContextVar[Optional[str]] = ContextVar("current_workflow", default=None)
+
+# USD per 1M tokens (prompt, completion); list prices, override via LLM_PRICE_PROMPT/LLM_PRICE_COMPLETION
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of one call (0 for unknown models without an override)."""
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    prompt_price = float(os.getenv("LLM_PRICE_PROMPT", prompt_price))
+    completion_price = float(os.getenv("LLM_PRICE_COMPLETION", completion_price))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+@dataclass
+class LLMCallRecord:
+    """One LLM call as seen by an agent."""
+
+    timestamp: float
+    agent: str
+    workflow: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_s: float = 0.0
+    retries: int = 0
+    cache_hit: bool = False
+    streamed: bool = False
+    error: Optional[str] = None
+    cost_usd: float = 0.0
+
+
+class Telemetry:
+    """
+    In-memory ring of recent call records plus an optional JSONL sink.
+
+    record() only appends to memory. With a path set, a background thread
+    writes the new records every `flush_interval` seconds in one append, and
+    rotates the file to `<path>.1` once it passes `max_file_bytes`, so the
+    event loop never touches the file and the disk use stays bounded.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_records: int = 10_000,
+                 flush_interval: float = 1.0, max_file_bytes: int = 10 * 1024 * 1024):
+        self.path = path
+        self.records: deque = deque(maxlen=max_records)
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.Lock()
+        self._pending: List[LLMCallRecord] = []
+        self._write_lock = threading.Lock()  # one writer at a time (background thread or flush())
+        if path:
+            self._stop = threading.Event()
+            threading.Thread(target=self._flush_loop, name="telemetry-writer", daemon=True).start()
+            atexit.register(self.flush)
+
+    def record(self, agent: str, model: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+               latency_s: float = 0.0, retries: int = 0, cache_hit: bool = False, streamed: bool = False,
+               error: Optional[str] = None) -> LLMCallRecord:
+        """Record one call, tagged with the workflow of the calling task."""
+        entry = LLMCallRecord(
+            timestamp=time.time(),
+            agent=agent,
+            workflow=current_workflow.get() or "ad hoc",
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_s=round(latency_s, 4),
+            retries=retries,
+            cache_hit=cache_hit,
+            streamed=streamed,
+            error=error,
+            cost_usd=call_cost(model, prompt_tokens, completion_tokens)
+        )
+        with self._lock:
+            self.records.append(entry)
+            if self.path:
+                self._pending.append(entry)
+        return entry
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Append the records buffered since the last flush to the JSONL file."""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending or not self.path:
+                return
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_file_bytes:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(asdict(entry)) + "\n" for entry in pending))
+            except OSError:
+                self.path = None  # telemetry must never break an agent call
+
+    def summary(self, by: str = "agent", since: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Aggregate the in-memory records (see `summarize`)."""
+        with self._lock:
+            records = list(self.records)
+        return summarize(records, by, since)
+
+
+def summarize(records: Iterable[LLMCallRecord], by: str = "agent",
+              since: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Aggregate call records per agent, workflow or model.
+
+    Args:
+        records: Call records
+        by: Record field to group on ("agent", "workflow" or "model")
+        since: Only include records newer than this UNIX timestamp
+
+    Returns:
+        {group: {calls, cache_hits, errors, retries, prompt_tokens, completion_tokens,
+                 cost_usd, avg_latency_s, p95_latency_s}}, most expensive groups first
+    """
+    groups: Dict[str, List[LLMCallRecord]] = {}
+    for entry in records:
+        if since is None or entry.timestamp >= since:
+            groups.setdefault(getattr(entry, by), []).append(entry)
+
+    summary = {}
+    for key, entries in groups.items():
+        # Cache hits cost no time on the provider side, so latency covers real calls only
+        latencies = sorted(e.latency_s for e in entries if not e.cache_hit)
+        summary[key] = {
+            "calls": len(entries),
+            "cache_hits": sum(e.cache_hit for e in entries),
+            "errors": sum(e.error is not None for e in entries),
+            "retries": sum(e.retries for e in entries),
+            "prompt_tokens": sum(e.prompt_tokens for e in entries),
+            "completion_tokens": sum(e.completion_tokens for e in entries),
+            "cost_usd": round(sum(e.cost_usd for e in entries), 6),
+            "avg_latency_s": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p95_latency_s": latencies[math.ceil(0.95 * len(latencies)) - 1] if latencies else 0.0,
+        }
+    return dict(sorted(summary.items(), key=lambda item: (-item[1]["cost_usd"], -item[1]["calls"])))
+
+
+def load_records(path: str) -> List[LLMCallRecord]:
+    """Read records from a JSONL telemetry file (skipping damaged lines)."""
+    records = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(LLMCallRecord(**json.loads(line)))
+                except (TypeError, ValueError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def telemetry_from_env() -> Telemetry:
+    """Build the recorder configured by LLM_TELEMETRY_* (no LLM_TELEMETRY_PATH = memory only)."""
+    return Telemetry(
+        path=os.getenv("LLM_TELEMETRY_PATH") or None,
+        max_records=int(os.getenv("LLM_TELEMETRY_MAX_RECORDS", "10000")),
+        max_file_bytes=int(float(os.getenv("LLM_TELEMETRY_MAX_MB", "10")) * 1024 * 1024)
+    )
+
+
+def print_summary(summary: Dict[str, Dict[str, Any]], by: str):
+    print(f"{by:<26} | {'calls':>5} | {'hits':>4} | {'err':>3} | {'retry':>5} | "
+          f"{'prompt':>8} | {'compl.':>7} | {'avg s':>6} | {'p95 s':>6} | {'cost $':>8}")
+    print("-" * 110)
+    for key, stats in summary.items():
+        print(f"{str(key)[:26]:<26} | {stats['calls']:>5} | {stats['cache_hits']:>4} | {stats['errors']:>3} | "
+              f"{stats['retries']:>5} | {stats['prompt_tokens']:>8} | {stats['completion_tokens']:>7} | "
+              f"{stats['avg_latency_s']:>6.2f} | {stats['p95_latency_s']:>6.2f} | {stats['cost_usd']:>8.4f}")
+    if not summary:
+        print("(no LLM calls recorded)")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Query recorded agent LLM calls")
+    parser.add_argument("--path", default=os.getenv("LLM_TELEMETRY_PATH") or ".llm_telemetry.jsonl")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summary = subparsers.add_parser("summary", help="aggregate tokens, latency, cache hits and cost")
+    summary.add_argument("--by", choices=["agent", "workflow", "model"], default="agent")
+    summary.add_argument("--since", type=float, help="only the last N minutes")
+
+    calls = subparsers.add_parser("calls", help="list recent calls")
+    calls.add_argument("--last", type=int, default=20)
+    calls.add_argument("--agent")
+    calls.add_argument("--workflow")
+
+    args = parser.parse_args()
+    records = load_records(args.path)
+
+    if args.command == "summary":
+        since = time.time() - args.since * 60 if args.since else None
+        print_summary(summarize(records, args.by, since), args.by)
+    elif args.command == "calls":
+        selected = [r for r in records
+                    if (args.agent is None or r.agent == args.agent)
+                    and (args.workflow is None or r.workflow == args.workflow)]
+        for r in selected[-args.last:]:
+            status = "cache" if r.cache_hit else (f"❌ {r.error[:40]}" if r.error else "ok")
+            print(f"{time.strftime('%H:%M:%S', time.localtime(r.timestamp))} {r.agent:<24} {r.workflow[:24]:<24} "
+                  f"{r.prompt_tokens:>6}+{r.completion_tokens:<5} {r.latency_s:>6.2f}s "
+                  f"retries={r.retries} {status}")
+
+
+if __name__ == "__main__":
+    try:
+        main_cli()
+        sys.exit(0)
+    except Exception as e:
+        print(f"❌ Telemetry query failed with error: {e}")
+        sys.exit(1)
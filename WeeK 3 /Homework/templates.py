@@ -0,0 +1,111 @@
+"""
+Email & Report Rendering
+========================
+Helpers for the agents' emails and reports.
+
+The emails themselves are plain f-string render functions (see
+multi_agent_demo.py): one function per email, taking the tool result's fields
+and returning the text. This module adds what they share:
+
+- render_many / stream: render a batch of records with one join at the end,
+  or lazily in ~64 KB chunks, so a large export never grows one string email
+  by email (quadratic copying) or holds the whole output in memory
+- Template: {{field}} placeholders for message text that comes from config
+  rather than code (the "then" messages in rules.json)
+
+Template syntax:
+    {{name}}                  field of the data (dots reach into nested dicts: {{metrics.total_revenue}})
+    {{status|upper}}          field passed through a filter (see FILTERS)
+
+Values are rendered with str(), like an f-string would.
+
+Usage:
+    text = render_many(order_email, orders)                 # many records into one buffer
+    for chunk in stream(order_email, orders):               # big outputs, chunk by chunk
+        out.write(chunk)
+    ALERT = Template("{{product_name}} is {{status|lower}}")
+    ALERT.render(result)
+"""
+
+import html
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+FILTERS: Dict[str, Callable[[Any], Any]] = {
+    "upper": lambda value: str(value).upper(),
+    "lower": lambda value: str(value).lower(),
+    "title": lambda value: str(value).title(),
+    "len": len,
+    "html": lambda value: html.escape(str(value)),
+}
+
+# Bytes of output collected before stream() hands a chunk to the caller
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_TAG = re.compile(r"\{\{\s*([\w.]+)\s*(?:\|\s*(\w+)\s*)?\}\}")
+
+
+class TemplateError(ValueError):
+    """A template that cannot be parsed (unknown filter)."""
+
+
+def render_many(render: Callable[[Any], str], records: Iterable[Any], separator: str = "") -> str:
+    """Render every record into one buffer, joined once at the end."""
+    return separator.join(map(render, records))
+
+
+def stream(render: Callable[[Any], str], records: Iterable[Any], separator: str = "",
+           chunk_size: Optional[int] = None) -> Iterator[str]:
+    """Render records lazily, yielding output in chunks of about `chunk_size` characters."""
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+    parts: List[str] = []
+    size = 0
+    for i, record in enumerate(records):
+        text = render(record)
+        if i and separator:
+            parts.append(separator)
+            size += len(separator)
+        parts.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            yield "".join(parts)
+            parts.clear()
+            size = 0
+    if parts:
+        yield "".join(parts)
+
+
+def _lookup(data: Any, path: Tuple[str, ...]) -> Any:
+    for key in path:
+        data = data.get(key) if isinstance(data, dict) else None
+    return data
+
+
+class Template:
+    """A message with {{field}} placeholders, parsed once into literal and field parts."""
+
+    def __init__(self, source: str, name: str = "template"):
+        self.source = source
+        self.name = name
+        # Alternating literals and (path, filter) fields
+        self._parts: List[Any] = []
+        position = 0
+        for match in _TAG.finditer(source):
+            path, filter_name = match.groups()
+            if filter_name and filter_name not in FILTERS:
+                raise TemplateError(f"{name}: unknown filter '{filter_name}'")
+            self._parts.append(source[position:match.start()])
+            self._parts.append((tuple(path.split(".")), FILTERS.get(filter_name)))
+            position = match.end()
+        self._parts.append(source[position:])
+
+    def render(self, data: Any) -> str:
+        out = []
+        for part in self._parts:
+            if isinstance(part, str):
+                out.append(part)
+            else:
+                path, apply = part
+                value = _lookup(data, path)
+                out.append(str(apply(value) if apply else value))
+        return "".join(out)
@@ -0,0 +1,47 @@
+"""
+Tests for keeping downsampled chart series within their point budget.
+
+Run with: python -m pytest test_downsample.py
+"""
+
+import random
+
+import pytest
+
+import downsample
+
+
+def noisy_series(n: int) -> list:
+    rng = random.Random(3)
+    return [{"period": i, "revenue": rng.uniform(0, 1000)} for i in range(n)]
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+@pytest.mark.parametrize("budget", [1, 2, 3, 4, 5, 6, 7, 10])
+def test_small_budgets_are_respected(method, budget):
+    series = noisy_series(500)
+
+    result = downsample.downsample(series, "revenue", points=budget, method=method)
+
+    assert 1 <= len(result) <= budget
+    assert result[0] is series[0]
+    if budget > 1:
+        assert result[-1] is series[-1]
+
+
+@pytest.mark.parametrize("max_points", [1, 3, 4])
+def test_point_budget_is_at_least_min_points(max_points):
+    budget = downsample.point_budget(width=1200, max_points=max_points)
+
+    assert budget == downsample.MIN_POINTS
+    assert len(downsample.downsample(noisy_series(500), "revenue", points=budget, method="minmax")) <= budget
+
+
+def test_minmax_keeps_each_buckets_extremes():
+    series = noisy_series(1000)
+    values = [bucket["revenue"] for bucket in series]
+
+    result = downsample.downsample(series, "revenue", points=4, method="minmax")
+
+    assert [bucket["revenue"] for bucket in result] == sorted(
+        {values[0], values[-1], min(values), max(values)}, key=values.index)
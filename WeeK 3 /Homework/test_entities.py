@@ -0,0 +1,36 @@
+"""
+Tests for finding store IDs in chat messages.
+
+Run with: python -m pytest test_entities.py
+"""
+
+import pytest
+
+from entities import extract_entities
+
+
+@pytest.mark.parametrize("message, sku", [
+    ("prod 14", "PROD014"),
+    ("PROD014", "PROD014"),
+    ("prod-4", "PROD004"),
+    ("Prod_0004", "PROD004"),
+    ("PROD1234", "PROD1234"),
+])
+def test_ids_are_normalized_to_the_store_form(message, sku):
+    assert extract_entities(message).skus == [sku]
+
+
+def test_spellings_of_one_id_count_once():
+    found = extract_entities("Is ORD001 shipped? Also check prod 4 and PROD004")
+
+    assert found.orders == ["ORD001"]
+    assert found.skus == ["PROD004"]
+    assert len(found) == 2
+
+
+def test_kinds_in_order_of_first_mention():
+    found = extract_entities("cust 2 asked about prod 14, ord-3 and PROD001; WORD12 and BENCH-ORD3 are not IDs")
+
+    assert found.customers == ["CUST002"]
+    assert found.orders == ["ORD003"]
+    assert found.skus == ["PROD014", "PROD001"]
@@ -0,0 +1,42 @@
+"""
+Tests for the two-tier LLM response cache.
+
+Run with: python -m pytest test_llm_cache.py
+"""
+
+import asyncio
+
+from llm_cache import LLMResponseCache
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = LLMResponseCache(path=path)
+    cache.set("k", "cached answer", latency=1.5)
+    cache.flush()
+
+    reopened = LLMResponseCache(path=path)
+    assert asyncio.run(reopened.get("k", agent="a")) == "cached answer"
+    assert reopened.stats["a"].hits == 1
+    assert reopened.stats["a"].latency_saved == 1.5
+
+
+def test_set_does_not_wait_for_the_disk(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    with cache._db_lock:  # the writer thread is stuck behind this lock
+        cache.set("k", "answer", latency=0.1)
+        assert asyncio.run(cache.get("k")) == "answer"  # served from memory
+    cache.flush()
+
+
+def test_expired_and_cleared_entries_miss(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.sqlite3"), ttl=-1)
+    cache.set("old", "stale", latency=0.1)
+    assert asyncio.run(cache.get("old")) is None
+
+    cache = LLMResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    cache.set("k", "answer", latency=0.1)
+    cache.clear()
+    cache.flush()
+    assert asyncio.run(cache.get("k")) is None
+    assert cache.stats["default"].misses == 1
@@ -0,0 +1,64 @@
+"""
+Tests for the LLM rate limiter's token-per-minute accounting across retries.
+
+Run with: python -m pytest test_rate_limiter.py
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from openai import InternalServerError
+
+from rate_limiter import RateLimiter
+
+
+def server_error() -> InternalServerError:
+    request = httpx.Request("POST", "http://127.0.0.1/v1/chat/completions")
+    return InternalServerError("boom", response=httpx.Response(500, request=request), body=None)
+
+
+def flaky(failures: int):
+    """Request that fails with a 500 `failures` times, then succeeds."""
+    attempts = []
+
+    async def fn():
+        attempts.append(1)
+        if len(attempts) <= failures:
+            raise server_error()
+        return "ok"
+
+    return fn, attempts
+
+
+def test_retries_charge_tpm_once():
+    limiter = RateLimiter(tpm=600, max_retries=3, base_delay=0.001)
+    fn, attempts = flaky(failures=2)
+
+    assert asyncio.run(limiter.call(fn, estimated_tokens=100)) == "ok"
+
+    assert len(attempts) == 3
+    assert limiter.retries == 2
+    # One estimate taken (the bucket refills 10 tokens/s, so allow a little drift)
+    assert 500 <= limiter.tokens.tokens < 510
+
+
+def test_failed_call_refunds_its_estimate():
+    limiter = RateLimiter(tpm=600, max_retries=2, base_delay=0.001)
+    fn, attempts = flaky(failures=10)
+
+    with pytest.raises(InternalServerError):
+        asyncio.run(limiter.call(fn, estimated_tokens=100))
+
+    assert len(attempts) == 3
+    assert limiter.failures == 1
+    assert limiter.tokens.tokens == 600
+
+
+def test_every_attempt_counts_against_rpm():
+    limiter = RateLimiter(rpm=60, max_retries=3, base_delay=0.001)
+    fn, _ = flaky(failures=2)
+
+    asyncio.run(limiter.call(fn))
+
+    assert 57 <= limiter.requests.tokens < 58
@@ -0,0 +1,83 @@
+"""
+Tests for keeping the sales rollup in sync with order changes.
+
+Run with: python -m pytest test_sales_rollup.py
+"""
+
+import asyncio
+import copy
+
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def fresh_store(monkeypatch):
+    """Private copies of the orders and the rollup built from them."""
+    orders = copy.deepcopy(main.ORDERS_DB)
+    rollup = main.SalesRollup()
+    for order in orders.values():
+        if order["status"] != "cancelled":
+            rollup.add_order(order)
+    monkeypatch.setattr(main, "ORDERS_DB", orders)
+    monkeypatch.setattr(main, "SALES_ROLLUP", rollup)
+
+
+def day_bucket(day: str) -> dict:
+    return main.SALES_ROLLUP.query(day, day)[0]
+
+
+def test_cancel_twice_backs_order_out_once():
+    before = main.SALES_ROLLUP.totals()
+
+    first = asyncio.run(main.process_order("ORD002", "cancel"))
+    second = asyncio.run(main.process_order("ORD002", "cancel"))
+
+    assert first.startswith("✅")
+    assert "already been cancelled" in second
+    assert main.SALES_ROLLUP.totals() == {
+        "revenue": round(before["revenue"] - 12.99, 2),
+        "orders": before["orders"] - 1,
+        "units": before["units"] - 1,
+    }
+    assert day_bucket("2025-09-28") == {"period": "2025-09-28", "revenue": 0.0, "orders": 0, "units": 0}
+
+
+def test_cancelled_order_cannot_be_shipped():
+    asyncio.run(main.process_order("ORD002", "cancel"))
+    result = asyncio.run(main.process_order("ORD002", "ship"))
+
+    assert result.startswith("❌")
+    assert main.ORDERS_DB["ORD002"]["status"] == "cancelled"
+
+
+def test_replacing_an_order_replaces_its_contribution():
+    before = main.SALES_ROLLUP.totals()
+    replacement = {**main.ORDERS_DB["ORD002"], "total": 50.0, "items": ["PROD003", "PROD005"]}
+
+    main.record_order(replacement)
+
+    assert main.SALES_ROLLUP.totals() == {
+        "revenue": round(before["revenue"] - 12.99 + 50.0, 2),
+        "orders": before["orders"],
+        "units": before["units"] + 1,
+    }
+    assert day_bucket("2025-09-28")["revenue"] == 50.0
+
+
+def test_replacing_a_cancelled_order_adds_it_back_once():
+    before = main.SALES_ROLLUP.totals()
+    asyncio.run(main.process_order("ORD002", "cancel"))
+
+    main.record_order({**main.ORDERS_DB["ORD002"], "status": "pending"})
+
+    assert main.SALES_ROLLUP.totals() == before
+
+
+def test_timeseries_reports_the_requested_range():
+    result = asyncio.run(main.get_sales_timeseries("2025-09-22", "2025-09-30", "month"))
+
+    assert (result["start_date"], result["end_date"]) == ("2025-09-22", "2025-09-30")
+    assert result["series"][0]["period"] == "2025-09-01"
+    assert result["totals"] == {"revenue": "$55.97", "orders": 2, "units": 3}
@@ -0,0 +1,38 @@
+"""
+Tests for LLM call telemetry and its JSONL sink.
+
+Run with: python -m pytest test_telemetry.py
+"""
+
+import os
+
+from telemetry import Telemetry, load_records, telemetry_from_env
+
+
+def test_file_sink_is_opt_in(monkeypatch):
+    monkeypatch.delenv("LLM_TELEMETRY_PATH", raising=False)
+    assert telemetry_from_env().path is None
+
+
+def test_records_are_buffered_until_flushed(tmp_path):
+    path = str(tmp_path / "calls.jsonl")
+    telemetry = Telemetry(path=path, flush_interval=3600)
+    telemetry.record("Inventory Agent", "gpt-4o-mini", prompt_tokens=100, completion_tokens=20, latency_s=0.5)
+
+    assert not os.path.exists(path)
+    assert telemetry.summary()["Inventory Agent"]["calls"] == 1
+
+    telemetry.flush()
+    assert [r.agent for r in load_records(path)] == ["Inventory Agent"]
+
+
+def test_file_rotates_at_the_size_cap(tmp_path):
+    path = str(tmp_path / "calls.jsonl")
+    telemetry = Telemetry(path=path, flush_interval=3600, max_file_bytes=1)
+    telemetry.record("A", "gpt-4o-mini")
+    telemetry.flush()
+    telemetry.record("B", "gpt-4o-mini")
+    telemetry.flush()
+
+    assert [r.agent for r in load_records(path + ".1")] == ["A"]
+    assert [r.agent for r in load_records(path)] == ["B"]
@@ -0,0 +1,152 @@
+"""
+Typed Tool Results
+==================
+Structured results of the MCP tools in main.py.
+
+Tool functions return these objects, so agents, workflows and the web UI that
+run in the same process read fields directly instead of parsing JSON (or
+searching it as text). JSON is produced only where text is actually needed:
+
+- the MCP server answering a client (main.mcp_tool serializes once)
+- an LLM prompt or a UI/CLI display: str() and f-strings give the same
+  indented JSON the tools always returned, so prompts, cache keys and LLM
+  cassettes are unchanged
+
+Remote backends (stdio / http) turn the JSON text back into the same types at
+the client edge. Failures and confirmations ("❌ Order 'X' not found",
+"✅ Order shipped") stay plain strings.
+
+Results may be shared between callers (see SingleFlight), so treat them as
+read-only.
+"""
+
+import json
+from typing import Any, Dict, List, Type, Union
+
+
+class ToolResult(dict):
+    """A tool's structured result: fields as a dict, indented JSON when text is needed."""
+
+    __slots__ = ("_json",)
+
+    def to_json(self) -> str:
+        """The JSON text MCP clients receive (built once per result)."""
+        try:
+            return self._json
+        except AttributeError:
+            self._json = json.dumps(self, indent=2)
+            return self._json
+
+    __str__ = to_json
+
+
+class InventoryStatus(ToolResult):
+    """check_inventory_status"""
+
+    __slots__ = ()
+    product_name: str
+    sku: str
+    stock_quantity: int
+    price: str
+    category: str
+    warehouse_location: str
+    status: str  # "✅ In Stock", "⚠️  Low Stock" or "⛔ Out of Stock"
+
+
+class OrderDetails(ToolResult):
+    """process_order(action="retrieve")"""
+
+    __slots__ = ()
+    order_id: str
+    customer_id: str
+    items: List[str]
+    item_count: int
+    total_amount: str
+    status: str
+    order_date: str
+
+
+class CustomerAnalytics(ToolResult):
+    """get_customer_analytics"""
+
+    __slots__ = ()
+    customer_id: str
+    name: str
+    email: str
+    total_orders: int
+    lifetime_value: str
+    customer_segment: str
+    engagement_level: str
+    recommendation: str
+
+
+class ProductRecommendations(ToolResult):
+    """generate_product_recommendations"""
+
+    __slots__ = ()
+    customer: str
+    customer_id: str
+    recommendations: List[Dict[str, str]]
+    total_recommendations: int
+
+
+class SalesReport(ToolResult):
+    """generate_sales_report"""
+
+    __slots__ = ()
+    report_period: str
+    generated_at: str
+    sales_metrics: Dict[str, Any]
+    order_status_breakdown: Dict[str, int]
+    top_selling_product: Dict[str, Any]
+    inventory_alerts: Dict[str, List[str]]
+    insights: List[str]
+
+
+class SalesSeries(ToolResult):
+    """get_sales_timeseries"""
+
+    __slots__ = ()
+    granularity: str
+    category: str
+    start_date: str
+    end_date: str
+    totals: Dict[str, Any]
+    series: List[Dict[str, Any]]
+
+
+# What a tool call returns: a typed result, or a text message (errors, confirmations)
+ToolOutput = Union[ToolResult, str]
+
+# Tool name -> type of its structured result
+RESULT_TYPES: Dict[str, Type[ToolResult]] = {
+    "check_inventory_status": InventoryStatus,
+    "process_order": OrderDetails,
+    "get_customer_analytics": CustomerAnalytics,
+    "generate_product_recommendations": ProductRecommendations,
+    "generate_sales_report": SalesReport,
+    "get_sales_timeseries": SalesSeries,
+}
+
+
+def to_text(result: ToolOutput) -> str:
+    """Serialize a tool result for an MCP response."""
+    return result.to_json() if isinstance(result, ToolResult) else result
+
+
+def from_text(tool_name: str, text: str) -> ToolOutput:
+    """Rebuild the typed result from a remote tool's text (plain-text results pass through)."""
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return text
+    if not isinstance(data, dict):
+        return text
+    result = RESULT_TYPES.get(tool_name, ToolResult)(data)
+    result._json = text  # already serialized by the server
+    return result
+
+
+def is_error(result: ToolOutput) -> bool:
+    """True for a tool's failure message ("❌ ...")."""
+    return isinstance(result, str) and result.startswith("❌")
@@ -18,19 +18,51 @@ Launch: python web_ui.py
 import gradio as gr
 import asyncio
 import json
+import os
+import time
+from collections import deque
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Set, Tuple, TypeVar
 
 # Import our multi-agent system
-from multi_agent_demo import (
-    InventoryAgent,
-    CustomerServiceAgent,
-    AnalyticsAgent,
-    MCPToolExecutor
-)
+# AGENT_BACKEND=demo (default) uses simulated agents; AGENT_BACKEND=llm uses the
+# OpenAI-backed agents, whose responses stream token by token into the UI.
+from main import INVENTORY_DB, LOW_STOCK_LEVEL, SALES_ROLLUP, STORE_CHANGES, STORE_STATS
+from conversation_memory import ConversationMemory, remembering
+from deadlines import REQUEST_TIMEOUT, DeadlineExceeded, run_with_deadline
+from downsample import downsample
+from entities import extract_entities
+from inventory_audit import iter_catalog_skus
+from streaming import TokenStream, muted_tokens
+import workflows
+
+AGENT_BACKEND = os.getenv("AGENT_BACKEND", "demo").lower()
+
+if AGENT_BACKEND == "llm":
+    from multi_agent_system import (
+        InventoryAgent,
+        CustomerServiceAgent,
+        AnalyticsAgent,
+        MCPToolExecutor,
+        inference_router,
+        llm_telemetry,
+        summarize_turns
+    )
+else:
+    from multi_agent_demo import (
+        InventoryAgent,
+        CustomerServiceAgent,
+        AnalyticsAgent,
+        MCPToolExecutor
+    )
+    llm_telemetry = None  # simulated agents make no LLM calls
+    inference_router = None
+    summarize_turns = None  # ConversationMemory falls back to its extractive summary
 
 # Initialize agents globally
 inventory_agent = InventoryAgent()
@@ -96,34 +128,35 @@ def format_timestamp():
     return datetime.now().strftime("%H:%M:%S")
 
 
-def create_inventory_chart():
-    """Create inventory status visualization."""
-    products = {
-        "Laptop Pro 15": 45,
-        "Wireless Mouse": 150,
-        "USB-C Cable": 8,
-        "Ergonomic Keyboard": 0,
-        "Monitor 27\"": 22
+# Bar colors by stock status: out of stock (red), low (orange), in stock (green)
+STOCK_COLORSCALE = [[0, '#ef4444'], [0.5, '#f59e0b'], [1, '#10b981']]
+
+
+def inventory_bars(names: List[str], stocks: List[int]) -> dict:
+    """Bar trace data for the inventory chart."""
+    # Arrays rather than lists: Plotly validates them in bulk, which keeps large catalogs fast
+    stock = np.asarray(stocks, dtype=int)
+    return {
+        "x": np.asarray(names, dtype=object),
+        "y": stock,
+        "marker": {"color": np.where(stock == 0, 0, np.where(stock < LOW_STOCK_LEVEL, 1, 2))},
     }
 
-    colors = []
-    for qty in products.values():
-        if qty == 0:
-            colors.append('#ef4444')  # Red
-        elif qty < 10:
-            colors.append('#f59e0b')  # Orange
-        else:
-            colors.append('#10b981')  # Green
+
+def create_inventory_chart(names: List[str] = None, stocks: List[int] = None):
+    """Create inventory status visualization (stock per product, from the inventory store by default)."""
+    if names is None:
+        names = [product["name"] for product in INVENTORY_DB.values()]
+        stocks = [product["stock"] for product in INVENTORY_DB.values()]
 
     fig = go.Figure(data=[
         go.Bar(
-            x=list(products.keys()),
-            y=list(products.values()),
-            marker_color=colors,
-            text=list(products.values()),
+            texttemplate='%{y}',
             textposition='auto',
         )
     ])
+    fig.data[0].update(inventory_bars(names, stocks))
+    fig.data[0].marker.update(colorscale=STOCK_COLORSCALE, cmin=0, cmax=2)
 
     fig.update_layout(
         title="📦 Current Inventory Status",
@@ -137,24 +170,34 @@ def create_inventory_chart():
     return fig
 
 
-def create_sales_chart():
-    """Create sales performance visualization."""
-    data = {
-        'Date': ['Sep 15', 'Sep 20', 'Sep 28', 'Sep 29'],
-        'Revenue': [1329.98, 349.99, 12.99, 42.98],
-        'Orders': [1, 1, 1, 1]
+def sales_series(granularity: str = "day", start_date: str = None, end_date: str = None) -> List[dict]:
+    """Sales rollup buckets for the chart, downsampled to the points its width can show."""
+    return downsample(SALES_ROLLUP.query(start_date, end_date, granularity), "revenue")
+
+
+def sales_line(series: List[dict]) -> dict:
+    """Revenue trace data for the sales chart."""
+    return {
+        "x": [bucket['period'] for bucket in series],
+        "y": [bucket['revenue'] for bucket in series],
+        "customdata": [[bucket['orders'], bucket['units']] for bucket in series],
+        "marker": {"size": 10 if len(series) <= 60 else 0},
     }
 
+
+def create_sales_chart(granularity: str = "day", start_date: str = None, end_date: str = None):
+    """Create sales performance visualization from the server's sales rollup."""
+    series = sales_series(granularity, start_date, end_date)
+
     fig = go.Figure()
 
     fig.add_trace(go.Scatter(
-        x=data['Date'],
-        y=data['Revenue'],
+        hovertemplate="%{x}<br>Revenue: $%{y:,.2f}<br>Orders: %{customdata[0]}<br>Units: %{customdata[1]}<extra></extra>",
         mode='lines+markers',
         name='Revenue',
         line=dict(color='#667eea', width=3),
-        marker=dict(size=10)
     ))
+    fig.data[0].update(sales_line(series))
 
     fig.update_layout(
         title="📈 Sales Performance",
@@ -167,22 +210,21 @@ def create_sales_chart():
     return fig
 
 
-def create_customer_segment_chart():
-    """Create customer segmentation pie chart."""
-    segments = {
-        'VIP': 1,
-        'Gold': 1,
-        'Regular': 1
-    }
+def segment_slices() -> dict:
+    """Pie trace data from the store's running segment counts."""
+    segments = {segment: count for segment, count in STORE_STATS.segments.items() if count}
+    return {"labels": list(segments.keys()), "values": list(segments.values())}
 
+
+def create_customer_segment_chart():
+    """Create customer segmentation pie chart from the store's running segment counts."""
     colors = ['#667eea', '#764ba2', '#9b87f5']
 
     fig = go.Figure(data=[go.Pie(
-        labels=list(segments.keys()),
-        values=list(segments.values()),
         marker=dict(colors=colors),
         hole=0.4
     )])
+    fig.data[0].update(segment_slices())
 
     fig.update_layout(
         title="👥 Customer Segmentation",
@@ -193,189 +235,564 @@ def create_customer_segment_chart():
     return fig
 
 
+def metric_card(title: str, value: str, note: str, color: str) -> str:
+    return f"""
+        <div class="metric-card">
+            <h3>{title}</h3>
+            <h2 style="color: {color};">{value}</h2>
+            <p>{note}</p>
+        </div>
+    """
+
+
+def create_metric_cards() -> Tuple[str, str, str, str]:
+    """Revenue, orders, customers and stock alerts from the store's running aggregates."""
+    sales = SALES_ROLLUP.totals()
+    segments = STORE_STATS.segments
+    stock = STORE_STATS.stock_status
+    return (
+        metric_card("💰 Total Revenue", f"${sales['revenue']:,.2f}", f"{sales['units']:,} units sold", "#667eea"),
+        metric_card("📦 Total Orders", f"{sales['orders']:,}", "Excluding cancelled", "#10b981"),
+        metric_card("👥 Active Customers", f"{sum(segments.values()):,}",
+                    ", ".join(f"{count:,} {segment}" for segment, count in segments.items() if count), "#764ba2"),
+        metric_card("⚠️ Stock Alerts", f"{stock['out_of_stock'] + stock['low_stock']:,}",
+                    f"{stock['out_of_stock']:,} critical, {stock['low_stock']:,} warning", "#ef4444"),
+    )
+
+
+class LiveView:
+    """
+    A dashboard element cached against the data store's change feed.
+
+    `current()` returns the cached value while its tables are unchanged (a few
+    version comparisons). After writes it is patched when the view supports it
+    (ChartView), otherwise rebuilt, in both cases from the store's running
+    aggregates rather than by scanning tables.
+    """
+
+    tables: Tuple[str, ...] = ()
+    incremental = False  # whether patch() can apply changed records
+
+    def __init__(self, build=None, tables: Tuple[str, ...] = None):
+        self._build = build
+        self.tables = tables or self.tables
+        self.value = None
+        self.versions = None
+        self.rebuilds = 0
+        self.patches = 0
+
+    def build(self):
+        return self._build()
+
+    def patch(self, changed: Set[str]):
+        """Value updated for the changed keys of the first table, or None to rebuild."""
+        return None
+
+    def current(self) -> Tuple[object, Tuple[int, ...]]:
+        versions = tuple(STORE_CHANGES.version(table) for table in self.tables)
+        if versions != self.versions:
+            value = None
+            if self.incremental and self.versions is not None:
+                changed = STORE_CHANGES.changes_since(self.tables[0], self.versions[0])
+                if changed is not None and versions[1:] == self.versions[1:]:
+                    value = self.patch(changed)
+            if value is None:
+                value = self.build()
+                self.rebuilds += 1
+            else:
+                self.patches += 1
+            self.value, self.versions = value, versions
+        return self.value, self.versions
+
+
+class ChartView(LiveView):
+    """
+    A chart whose cached figure is updated in place: only its trace data is
+    recomputed (`trace`), which skips rebuilding the figure, layout and template.
+    """
+
+    incremental = True
+
+    def __init__(self, build, trace, tables: Tuple[str, ...]):
+        super().__init__(build, tables)
+        self._trace = trace
+
+    def patch(self, changed: Set[str]):
+        self.value.data[0].update(self._trace())
+        return self.value
+
+
+class InventoryChartView(ChartView):
+    """Stock per product; a stock change updates that product's bar instead of rescanning the catalog."""
+
+    def __init__(self):
+        super().__init__(None, None, ("inventory",))
+
+    def build(self):
+        self.positions = {}
+        self.names = []
+        self.stocks = []
+        for sku, product in INVENTORY_DB.items():
+            self.positions[sku] = len(self.names)
+            self.names.append(product["name"])
+            self.stocks.append(product["stock"])
+        return create_inventory_chart(self.names, self.stocks)
+
+    def patch(self, changed: Set[str]):
+        for sku in changed:
+            product = INVENTORY_DB.get(sku)
+            if product is None:
+                return None  # removed: rebuild
+            position = self.positions.get(sku)
+            if position is None:
+                self.positions[sku] = len(self.names)
+                self.names.append(product["name"])
+                self.stocks.append(product["stock"])
+            else:
+                self.names[position] = product["name"]
+                self.stocks[position] = product["stock"]
+        self.value.data[0].update(inventory_bars(self.names, self.stocks))
+        return self.value
+
+
+# Dashboard elements in output order; each re-renders only when its tables change
+DASHBOARD_VIEWS = {
+    "metrics": LiveView(create_metric_cards, ("orders", "customers", "inventory")),
+    "inventory": InventoryChartView(),
+    "sales": ChartView(create_sales_chart, lambda: sales_line(sales_series()), ("orders",)),
+    "segments": ChartView(create_customer_segment_chart, segment_slices, ("customers",)),
+}
+
+# Seconds between dashboard refresh checks (unchanged views cost a version comparison)
+DASHBOARD_REFRESH = float(os.getenv("UI_DASHBOARD_REFRESH", "5"))
+
+
+async def refresh_dashboard(seen: Optional[dict]) -> list:
+    """
+    Dashboard timer tick: send each view whose data changed since this browser last got it.
+
+    Runs on the event loop (async), like the tools that write to the store, so a
+    view never reads a table mid-write. Views are shared by all browsers; `seen`
+    holds the versions this browser already shows.
+    """
+    seen = dict(seen or {})
+    updates = []
+    for name, view in DASHBOARD_VIEWS.items():
+        value, versions = view.current()
+        fresh = seen.get(name) != versions
+        seen[name] = versions
+        values = value if isinstance(value, tuple) else (value,)
+        updates.extend(values if fresh else [gr.skip()] * len(values))
+    return [*updates, seen]
+
+
 # =============================================================================
 # AGENT INTERACTION FUNCTIONS
 # =============================================================================
 
-async def chat_with_agent(message: str, agent_type: str, history: List) -> Tuple[List, str]:
-    """Chat interface with selected agent."""
+STREAM_CURSOR = " ▌"
+
+# Seconds without output after which a handler re-renders anyway (see with_heartbeat)
+HEARTBEAT_INTERVAL = float(os.getenv("UI_HEARTBEAT_INTERVAL", "1.0"))
+
+T = TypeVar("T")
+
+
+async def with_heartbeat(updates: AsyncIterator[T], interval: float = HEARTBEAT_INTERVAL) -> AsyncIterator[Optional[T]]:
+    """
+    Re-yield `updates`, plus None whenever `interval` seconds pass without one.
+
+    Gradio only notices that a browser tab went away (or Stop was pressed) when
+    the handler yields. The heartbeat keeps handlers yielding during long silent
+    waits, so an abandoned request is closed within `interval` and the agent
+    calls, tool calls and LLM requests behind it are cancelled.
+    """
+    updates = updates.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(updates))
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            finished, pending = pending, None
+            try:
+                update = finished.result()
+            except StopAsyncIteration:
+                return
+            yield update
+    finally:
+        if pending is not None:
+            # Cancelling the pending step runs the producer's cleanup before it is closed
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        await updates.aclose()
+
+
+# Streaming audit panel: findings kept on screen, and seconds between re-renders
+AUDIT_UI_LINES = int(os.getenv("UI_AUDIT_LINES", "20"))
+AUDIT_UI_REFRESH = float(os.getenv("UI_AUDIT_REFRESH", "0.25"))
+
+
+def timed_out_note(elapsed: float) -> str:
+    return f"⏱️ **Timed out** after {elapsed:.0f}s (budget {REQUEST_TIMEOUT:.0f}s, set with REQUEST_TIMEOUT)."
+
+
+async def stream_agent_response(awaitable, render=None) -> AsyncIterator[str]:
+    """
+    Yield progressively rendered text for an agent call.
+
+    LLM-backed agents stream tokens as they arrive (so the user sees the first
+    token instead of waiting for the whole completion); the last value yielded is
+    always the rendered final result. The call gets REQUEST_TIMEOUT seconds; when
+    they run out it is cancelled and the text streamed so far is kept.
+    """
+    stream = TokenStream(run_with_deadline(awaitable, REQUEST_TIMEOUT))
+    started = time.perf_counter()
+    text = ""
+    try:
+        async for delta in with_heartbeat(stream):
+            text += delta or ""
+            yield text + STREAM_CURSOR
+    except DeadlineExceeded:
+        yield (text + "\n\n" if text else "") + timed_out_note(time.perf_counter() - started)
+        return
+    yield render(stream.result) if render else stream.result
+
+
+def new_chat_memory() -> ConversationMemory:
+    """Per-session chat memory: recent turns verbatim, older ones summarized in the background."""
+    return ConversationMemory(summarize_turns) if summarize_turns else ConversationMemory()
+
+
+# Most lookups one chat message may start (they run concurrently)
+CHAT_MAX_LOOKUPS = int(os.getenv("UI_CHAT_MAX_LOOKUPS", "20"))
+
+
+@dataclass
+class ChatLookup:
+    """One agent call a chat message asked for, and how to show its result."""
+
+    title: str
+    call: Awaitable[Any]
+    render: Callable[[Any], str] = str
+
+    def section(self, result: Any) -> str:
+        return f"**{self.title}**\n\n{self.render(result)}"
+
+
+def inventory_text(result: dict) -> str:
+    return f"{result['analysis']}\n\n```json\n{result['data']}\n```"
+
+
+def chat_lookups(message: str, agent_type: str) -> Tuple[List[ChatLookup], str]:
+    """The agent calls for every ID in `message`, or ([], a hint) when there is nothing to look up."""
+    found = extract_entities(message)
+    text = message.lower()
+    lookups = []
+
+    if agent_type == "Inventory Agent":
+        lookups += [ChatLookup(f"Inventory Check for {sku}", inventory_agent.check_stock(sku), inventory_text)
+                    for sku in found.skus]
+        hint = "Please specify a product SKU (e.g., PROD001) to check inventory."
+
+    elif agent_type == "Customer Service Agent":
+        lookups += [ChatLookup(f"Order {order_id}", cs_agent.handle_order_inquiry(order_id))
+                    for order_id in found.orders]
+        if "recommend" in text or "suggest" in text:
+            lookups += [ChatLookup(f"Recommendations for {cust_id}", cs_agent.recommend_products(cust_id))
+                        for cust_id in found.customers]
+            hint = "Please specify a customer ID (e.g., CUST001) for recommendations."
+        else:
+            hint = "I can help with:\n- Order inquiries (mention order ID like ORD001)\n- Product recommendations (mention customer ID like CUST001)"
+
+    elif agent_type == "Analytics Agent":
+        if "report" in text:
+            period = "day" if "day" in text else "month" if "month" in text else "week"
+            lookups.append(ChatLookup(f"Business Report ({period})", analytics_agent.generate_business_report(period)))
+        lookups += [ChatLookup(f"Customer Analysis for {cust_id}", analytics_agent.analyze_customer_segment(cust_id))
+                    for cust_id in found.customers]
+        hint = "I can help with:\n- Sales reports (mention 'report' and period: day/week/month)\n- Customer analysis (mention customer ID like CUST001)"
+
+    else:
+        hint = "Please select an agent type first."
+
+    return lookups, hint
+
+
+async def run_lookups(lookups: List[ChatLookup]) -> str:
+    """Run the lookups concurrently (up to CHAT_MAX_LOOKUPS) and merge the results into one response, in the order asked."""
+    skipped = lookups[CHAT_MAX_LOOKUPS:]
+    lookups = lookups[:CHAT_MAX_LOOKUPS]
+    for lookup in skipped:
+        lookup.call.close()  # never started
+
+    # Token streams of parallel calls would interleave, so only the merged result is shown
+    with muted_tokens():
+        results = await asyncio.gather(*(lookup.call for lookup in lookups), return_exceptions=True)
+    sections = []
+    for lookup, result in zip(lookups, results):
+        if isinstance(result, (DeadlineExceeded, asyncio.CancelledError)):
+            raise result
+        if isinstance(result, Exception):
+            sections.append(f"**{lookup.title}**\n\n❌ Error: {str(result)}")
+        else:
+            sections.append(lookup.section(result))
+    if skipped:
+        sections.append(f"_{len(skipped)} more not looked up: {', '.join(lookup.title for lookup in skipped)} "
+                        f"(limit {CHAT_MAX_LOOKUPS} per message, set with UI_CHAT_MAX_LOOKUPS)._")
+    return "\n\n---\n\n".join(sections)
+
+
+async def chat_with_agent(message: str, agent_type: str, history: List,
+                          memory: ConversationMemory = None) -> AsyncIterator[Tuple[List, str, ConversationMemory]]:
+    """Chat interface with selected agent: every ID in the message is looked up, concurrently."""
+    if memory is None:
+        memory = new_chat_memory()
 
     if not message.strip():
-        return history, ""
+        yield history, "", memory
+        return
 
-    # Add user message
+    # Add user message and a placeholder for the streamed agent response
     history.append({"role": "user", "content": message})
+    history.append({"role": "assistant", "content": "⏳ Working on it..."})
+    yield history, "", memory
 
-    # Process based on agent type
     response = ""
-
     try:
-        if agent_type == "Inventory Agent":
-            # Extract SKU if mentioned
-            if "PROD" in message.upper():
-                sku = message.upper().split("PROD")[1][:3]
-                sku = f"PROD{sku}"
-                result = await inventory_agent.check_stock(sku)
-                response = f"**Inventory Check for {sku}**\n\n{result['analysis']}\n\n```json\n{result['data']}\n```"
-            else:
-                response = "Please specify a product SKU (e.g., PROD001) to check inventory."
-
-        elif agent_type == "Customer Service Agent":
-            # Check if it's an order inquiry
-            if "ORD" in message.upper():
-                order_id = message.upper().split("ORD")[1][:3]
-                order_id = f"ORD{order_id}"
-                response = await cs_agent.handle_order_inquiry(order_id)
-            elif "recommend" in message.lower() or "suggest" in message.lower():
-                # Extract customer ID
-                if "CUST" in message.upper():
-                    cust_id = message.upper().split("CUST")[1][:3]
-                    cust_id = f"CUST{cust_id}"
-                    response = await cs_agent.recommend_products(cust_id)
-                else:
-                    response = "Please specify a customer ID (e.g., CUST001) for recommendations."
-            else:
-                response = "I can help with:\n- Order inquiries (mention order ID like ORD001)\n- Product recommendations (mention customer ID like CUST001)"
-
-        elif agent_type == "Analytics Agent":
-            if "report" in message.lower():
-                period = "week"
-                if "day" in message.lower():
-                    period = "day"
-                elif "month" in message.lower():
-                    period = "month"
-                response = await analytics_agent.generate_business_report(period)
-            elif "CUST" in message.upper():
-                cust_id = message.upper().split("CUST")[1][:3]
-                cust_id = f"CUST{cust_id}"
-                response = await analytics_agent.analyze_customer_segment(cust_id)
+        lookups, response = chat_lookups(message, agent_type)
+        if lookups:
+            if len(lookups) == 1:
+                # A single call streams its LLM tokens as they arrive
+                call, render = lookups[0].call, lookups[0].section
             else:
-                response = "I can help with:\n- Sales reports (mention 'report' and period: day/week/month)\n- Customer analysis (mention customer ID like CUST001)"
-
-        else:
-            response = "Please select an agent type first."
+                call, render = run_lookups(lookups), None
+            # Earlier turns of this chat go along as context (bounded, see conversation_memory.py)
+            async for partial in stream_agent_response(remembering(memory, call), render):
+                history[-1]["content"] = partial
+                yield history, "", memory
+            memory.add_turn(message, history[-1]["content"])
+            return
 
     except Exception as e:
         response = f"❌ Error: {str(e)}"
 
     # Add agent response
-    history.append({"role": "assistant", "content": response})
+    history[-1]["content"] = response
+    memory.add_turn(message, response)
 
-    return history, ""
+    yield history, "", memory
 
 
-async def quick_inventory_check(sku: str) -> str:
+async def quick_inventory_check(sku: str) -> AsyncIterator[str]:
     """Quick inventory check function."""
     if not sku:
-        return "⚠️ Please enter a product SKU (e.g., PROD001)"
+        yield "⚠️ Please enter a product SKU (e.g., PROD001)"
+        return
 
-    try:
-        result = await inventory_agent.check_stock(sku.upper())
+    def render(result):
         output = f"## Inventory Status for {sku.upper()}\n\n"
         output += f"**Analysis:** {result['analysis']}\n\n"
         output += f"**Details:**\n```json\n{result['data']}\n```"
         return output
+
+    try:
+        async for partial in stream_agent_response(inventory_agent.check_stock(sku.upper()), render):
+            yield partial
+    except Exception as e:
+        yield f"❌ Error: {str(e)}"
+
+
+async def stream_inventory_audit(skus_text: str) -> AsyncIterator[str]:
+    """Audit the listed SKUs (blank = whole catalog), showing running totals and the latest findings.
+
+    Only the counts and the last AUDIT_UI_LINES findings are kept, so memory stays
+    constant however large the catalog; the display is refreshed every
+    AUDIT_UI_REFRESH seconds rather than once per SKU.
+    """
+    skus = [sku.strip().upper() for sku in skus_text.replace("\n", ",").split(",") if sku.strip()]
+    total = len(skus) or len(INVENTORY_DB)
+    findings = deque(maxlen=AUDIT_UI_LINES)
+    started = last_render = time.perf_counter()
+    latest = None
+
+    def render(done: bool = False) -> str:
+        audited = latest.audited if latest else 0
+        filled = int(20 * audited / total) if total else 20
+        output = f"## 📋 Inventory Audit {'✅ complete' if done else '⏳ running'}\n\n"
+        output += f"`{'█' * filled}{'░' * (20 - filled)}` {audited:,}/{total:,} SKUs "
+        output += f"({time.perf_counter() - started:.1f}s)\n\n"
+        if latest:
+            output += f"**{latest.summary()}**\n\n"
+        if findings:
+            output += f"### Needs attention (latest {len(findings)})\n\n" + "\n".join(findings)
+        elif done:
+            output += "All audited SKUs are in stock."
+        return output
+
+    yield render()
+    try:
+        async for progress in with_heartbeat(inventory_agent.stream_audit(skus or iter_catalog_skus())):
+            if progress is not None:
+                latest = progress
+                if progress.needs_attention:
+                    findings.append(f"- {progress.line}")
+            now = time.perf_counter()
+            if progress is None or now - last_render >= AUDIT_UI_REFRESH:
+                last_render = now
+                yield render()
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        yield render() + f"\n\n❌ **Error:** {str(e)}"
+        return
+    yield render(done=True)
 
 
-async def quick_order_lookup(order_id: str) -> str:
+async def quick_order_lookup(order_id: str) -> AsyncIterator[str]:
     """Quick order lookup function."""
     if not order_id:
-        return "⚠️ Please enter an order ID (e.g., ORD001)"
+        yield "⚠️ Please enter an order ID (e.g., ORD001)"
+        return
 
     try:
-        result = await cs_agent.handle_order_inquiry(order_id.upper())
-        return result
+        async for partial in stream_agent_response(cs_agent.handle_order_inquiry(order_id.upper())):
+            yield partial
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        yield f"❌ Error: {str(e)}"
 
 
-async def quick_customer_analysis(customer_id: str) -> str:
+async def quick_customer_analysis(customer_id: str) -> AsyncIterator[str]:
     """Quick customer analysis function."""
     if not customer_id:
-        return "⚠️ Please enter a customer ID (e.g., CUST001)"
+        yield "⚠️ Please enter a customer ID (e.g., CUST001)"
+        return
 
     try:
-        result = await analytics_agent.analyze_customer_segment(customer_id.upper())
-        return result
+        async for partial in stream_agent_response(analytics_agent.analyze_customer_segment(customer_id.upper())):
+            yield partial
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        yield f"❌ Error: {str(e)}"
 
 
-async def generate_report(period: str) -> str:
+async def generate_report(period: str) -> AsyncIterator[str]:
     """Generate sales report."""
     try:
-        result = await analytics_agent.generate_business_report(period.lower())
-        return result
+        async for partial in stream_agent_response(analytics_agent.generate_business_report(period.lower())):
+            yield partial
     except Exception as e:
-        return f"❌ Error: {str(e)}"
-
-
-async def run_workflow(workflow_name: str) -> str:
-    """Run a complete multi-agent workflow."""
-    output = f"# 🚀 Running Workflow: {workflow_name}\n\n"
-    output += f"**Started at:** {format_timestamp()}\n\n"
-    output += "---\n\n"
+        yield f"❌ Error: {str(e)}"
+
+
+def build_workflow(workflow_name: str):
+    """Map a UI workflow name to its DAG (see workflows.py)."""
+    if workflow_name == "VIP Customer Upsell":
+        return workflows.vip_customer_upsell(cs_agent, analytics_agent)
+    elif workflow_name == "Inventory Audit":
+        return workflows.inventory_audit(inventory_agent)
+    elif workflow_name == "Daily Business Review":
+        return workflows.daily_business_review(analytics_agent, inventory_agent)
+    elif workflow_name == "Order Fulfillment":
+        return workflows.order_fulfillment(cs_agent, inventory_agent, MCPToolExecutor)
+    return None
+
+
+async def run_workflow(workflow_name: str) -> AsyncIterator[str]:
+    """Run a complete multi-agent workflow, streaming each step's output.
+
+    Independent steps run concurrently, so several sections can fill in at once.
+    The run gets REQUEST_TIMEOUT seconds; steps still running then are cancelled
+    and the results of the finished ones are kept.
+    """
+    header = f"# 🚀 Running Workflow: {workflow_name}\n\n"
+    header += f"**Started at:** {format_timestamp()}\n\n"
+    header += "---\n\n"
+    yield header
+
+    workflow = build_workflow(workflow_name)
+    if workflow is None:
+        yield header + f"❌ **Error:** Unknown workflow '{workflow_name}'"
+        return
+
+    sections = {step.name: "⏳ Waiting..." for step in workflow.steps}
+
+    def render() -> str:
+        body = "\n\n---\n\n".join(
+            f"## Step {i}: {step.title}\n\n{sections[step.name]}"
+            for i, step in enumerate(workflow.steps, 1)
+        )
+        return header + body + "\n\n"
 
+    streamed = {}
+    timed_out = []
+    footer = ""
+    started = time.perf_counter()
     try:
-        if workflow_name == "VIP Customer Upsell":
-            output += "## Step 1: Check Order Status\n\n"
-            order = await cs_agent.handle_order_inquiry("ORD001")
-            output += order + "\n\n---\n\n"
-
-            output += "## Step 2: Analyze Customer Profile\n\n"
-            analysis = await analytics_agent.analyze_customer_segment("CUST001")
-            output += analysis + "\n\n---\n\n"
-
-            output += "## Step 3: Generate Recommendations\n\n"
-            recs = await cs_agent.recommend_products("CUST001", "Electronics")
-            output += recs + "\n\n"
-
-        elif workflow_name == "Inventory Audit":
-            output += "## Performing Complete Inventory Audit\n\n"
-            skus = ["PROD001", "PROD002", "PROD003", "PROD004", "PROD005"]
-            audit = await inventory_agent.audit_inventory(skus)
-            output += audit + "\n\n"
-
-        elif workflow_name == "Daily Business Review":
-            output += "## Step 1: Sales Performance\n\n"
-            sales = await analytics_agent.generate_business_report("week")
-            output += sales + "\n\n---\n\n"
-
-            output += "## Step 2: Critical Inventory Check\n\n"
-            inv = await inventory_agent.check_stock("PROD004")
-            output += f"**Analysis:** {inv['analysis']}\n\n"
-            output += f"**Data:** {inv['data']}\n\n"
-
-        elif workflow_name == "Order Fulfillment":
-            output += "## Step 1: Order Details\n\n"
-            order_data = await MCPToolExecutor.execute_tool(
-                "process_order",
-                {"order_id": "ORD002", "action": "retrieve"}
-            )
-            output += f"```json\n{order_data}\n```\n\n---\n\n"
-
-            output += "## Step 2: Inventory Verification\n\n"
-            inv = await inventory_agent.check_stock("PROD003")
-            output += f"{inv['analysis']}\n\n---\n\n"
-
-            output += "## Step 3: Process Shipment\n\n"
-            ship = await cs_agent.ship_order("ORD002")
-            output += ship + "\n\n"
-
-        output += f"\n\n**✅ Workflow completed at:** {format_timestamp()}"
+        async for event in with_heartbeat(workflow.stream(stream_tokens=True, timeout=REQUEST_TIMEOUT)):
+            if event is None:
+                yield render() + f"\n\n*⏱️ {time.perf_counter() - started:.0f}s elapsed*"
+                continue
+            name = event.step.name
+            if event.status == "started":
+                sections[name] = "⏳ Running..."
+            elif event.status == "token":
+                streamed[name] = streamed.get(name, "") + event.value
+                sections[name] = streamed[name] + STREAM_CURSOR
+            elif event.status == "completed":
+                sections[name] = event.step.render(event.value)
+            elif event.status == "failed":
+                sections[name] = f"❌ **Error:** {str(event.error)}"
+            elif event.status == "timed_out":
+                timed_out.append(name)
+                partial = streamed.get(name)
+                sections[name] = (partial + "\n\n" if partial else "") + "⏱️ **Timed out** before this step finished"
+            elif event.status == "skipped":
+                sections[name] = "⏭️ Skipped (a step it depends on failed or timed out)"
+            yield render()
+
+        elapsed = time.perf_counter() - started
+        if timed_out:
+            footer = f"\n\n{timed_out_note(elapsed)} Partial results above."
+        else:
+            footer = f"\n\n**✅ Workflow completed at:** {format_timestamp()} ({elapsed:.1f}s)"
 
     except Exception as e:
-        output += f"\n\n❌ **Error:** {str(e)}"
+        footer = f"\n\n❌ **Error:** {str(e)}"
 
-    return output
+    yield render() + footer
 
 
 # =============================================================================
 # CREATE GRADIO INTERFACE
 # =============================================================================
 
+def telemetry_tables(window: str) -> Tuple[str, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """LLM usage per agent and per workflow, plus fast-path escalation, for the telemetry panel."""
+    # This server's in-memory records; the demo backend makes no LLM calls (see `python telemetry.py` for files)
+    source = "this server" if llm_telemetry is not None else "demo backend, no LLM calls"
+    minutes = {"Last 15 minutes": 15, "Last hour": 60, "Last 24 hours": 1440}.get(window)
+    since = datetime.now().timestamp() - minutes * 60 if minutes else None
+
+    def frame(by: str) -> pd.DataFrame:
+        summary = llm_telemetry.summary(by, since) if llm_telemetry is not None else {}
+        rows = [{by.title(): key, **stats} for key, stats in summary.items()]
+        return pd.DataFrame(rows, columns=[by.title(), "calls", "cache_hits", "errors", "retries", "prompt_tokens",
+                                           "completion_tokens", "cost_usd", "avg_latency_s", "p95_latency_s"])
+
+    by_agent = frame("agent")
+    totals = (f"**{int(by_agent['calls'].sum())} calls** · "
+              f"{int(by_agent['prompt_tokens'].sum() + by_agent['completion_tokens'].sum())} tokens · "
+              f"${by_agent['cost_usd'].sum():.4f} · {int(by_agent['cache_hits'].sum())} cache hits · "
+              f"source: {source} · {format_timestamp()}")
+    fast_path = pd.DataFrame(
+        [{"Agent": agent, **stats, "escalation_rate": f"{stats['escalation_rate']:.0%}"}
+         for agent, stats in (inference_router.summary() if inference_router is not None else {}).items()],
+        columns=["Agent", "rules", "escalated", "escalation_rate"]
+    )
+    return totals, by_agent, frame("workflow"), fast_path
+
+
 def create_interface():
     """Create the main Gradio interface."""
 
@@ -398,52 +815,23 @@ def create_interface():
             with gr.Tab("📊 Dashboard"):
                 gr.Markdown("## Real-Time Business Metrics")
 
+                # Views are refreshed from the data store's change feed (see LiveView)
+                cards = DASHBOARD_VIEWS["metrics"].current()[0]
                 with gr.Row():
-                    with gr.Column(scale=1):
-                        gr.HTML("""
-                            <div class="metric-card">
-                                <h3>💰 Total Revenue</h3>
-                                <h2 style="color: #667eea;">$1,735.94</h2>
-                                <p>+12% vs last period</p>
-                            </div>
-                        """)
-
-                    with gr.Column(scale=1):
-                        gr.HTML("""
-                            <div class="metric-card">
-                                <h3>📦 Total Orders</h3>
-                                <h2 style="color: #10b981;">4</h2>
-                                <p>This week</p>
-                            </div>
-                        """)
-
-                    with gr.Column(scale=1):
-                        gr.HTML("""
-                            <div class="metric-card">
-                                <h3>👥 Active Customers</h3>
-                                <h2 style="color: #764ba2;">3</h2>
-                                <p>1 VIP, 1 Gold, 1 Regular</p>
-                            </div>
-                        """)
-
-                    with gr.Column(scale=1):
-                        gr.HTML("""
-                            <div class="metric-card">
-                                <h3>⚠️ Stock Alerts</h3>
-                                <h2 style="color: #ef4444;">2</h2>
-                                <p>1 critical, 1 warning</p>
-                            </div>
-                        """)
+                    metric_cards = []
+                    for card in cards:
+                        with gr.Column(scale=1):
+                            metric_cards.append(gr.HTML(card))
 
                 with gr.Row():
                     with gr.Column():
-                        inventory_plot = gr.Plot(value=create_inventory_chart())
+                        inventory_plot = gr.Plot(value=DASHBOARD_VIEWS["inventory"].current()[0])
                     with gr.Column():
-                        sales_plot = gr.Plot(value=create_sales_chart())
+                        sales_plot = gr.Plot(value=DASHBOARD_VIEWS["sales"].current()[0])
 
                 with gr.Row():
                     with gr.Column():
-                        segment_plot = gr.Plot(value=create_customer_segment_chart())
+                        segment_plot = gr.Plot(value=DASHBOARD_VIEWS["segments"].current()[0])
                     with gr.Column():
                         gr.Markdown("""
                         ### 📋 Quick Insights
@@ -466,6 +854,13 @@ def create_interface():
                         - Monitor PROD003 stock levels
                         """)
 
+                dashboard_seen = gr.State({})
+                dashboard_outputs = [*metric_cards, inventory_plot, sales_plot, segment_plot, dashboard_seen]
+                dashboard_timer = gr.Timer(DASHBOARD_REFRESH)
+                dashboard_timer.tick(fn=refresh_dashboard, inputs=[dashboard_seen], outputs=dashboard_outputs,
+                                     show_progress="hidden")
+                app.load(fn=refresh_dashboard, inputs=[dashboard_seen], outputs=dashboard_outputs)
+
             # ==================== AGENT CHAT TAB ====================
             with gr.Tab("💬 Chat with Agents"):
                 gr.Markdown("## Talk to Specialized AI Agents")
@@ -508,16 +903,17 @@ def create_interface():
                 - "Analyze customer CUST001"
                 """)
 
-                # Chat functionality
+                # Chat functionality (memory is per browser session)
+                chat_memory = gr.State(None)
                 send_btn.click(
                     fn=chat_with_agent,
-                    inputs=[msg, agent_selector, chatbot],
-                    outputs=[chatbot, msg]
+                    inputs=[msg, agent_selector, chatbot, chat_memory],
+                    outputs=[chatbot, msg, chat_memory]
                 )
                 msg.submit(
                     fn=chat_with_agent,
-                    inputs=[msg, agent_selector, chatbot],
-                    outputs=[chatbot, msg]
+                    inputs=[msg, agent_selector, chatbot, chat_memory],
+                    outputs=[chatbot, msg, chat_memory]
                 )
 
             # ==================== QUICK ACTIONS TAB ====================
@@ -590,6 +986,25 @@ def create_interface():
                             outputs=[report_output]
                         )
 
+                with gr.Row():
+                    with gr.Column():
+                        gr.Markdown("### 📋 Streaming Inventory Audit")
+                        audit_skus = gr.Textbox(
+                            label="SKUs (comma-separated; leave blank to audit the whole catalog)",
+                            placeholder="PROD001, PROD003, PROD004"
+                        )
+                        with gr.Row():
+                            audit_btn = gr.Button("Run Audit", variant="primary", scale=4)
+                            audit_stop_btn = gr.Button("⏹️ Stop", variant="stop", scale=1)
+                        audit_output = gr.Markdown()
+
+                        audit_event = audit_btn.click(
+                            fn=stream_inventory_audit,
+                            inputs=[audit_skus],
+                            outputs=[audit_output]
+                        )
+                        audit_stop_btn.click(fn=None, cancels=[audit_event])
+
             # ==================== WORKFLOWS TAB ====================
             with gr.Tab("🔄 Automated Workflows"):
                 gr.Markdown("## Multi-Agent Workflow Automation")
@@ -617,14 +1032,43 @@ def create_interface():
                 **Order Fulfillment:** Retrieve order → Verify inventory → Process shipment → Send notification
                 """)
 
-                workflow_btn = gr.Button("🚀 Run Workflow", variant="primary", size="lg")
+                with gr.Row():
+                    workflow_btn = gr.Button("🚀 Run Workflow", variant="primary", size="lg", scale=4)
+                    stop_btn = gr.Button("⏹️ Stop", variant="stop", size="lg", scale=1)
                 workflow_output = gr.Markdown()
 
-                workflow_btn.click(
+                workflow_event = workflow_btn.click(
                     fn=run_workflow,
                     inputs=[workflow_choice],
                     outputs=[workflow_output]
                 )
+                # Stopping cancels the steps still running (and their LLM/tool calls)
+                stop_btn.click(fn=None, cancels=[workflow_event])
+
+            # ==================== TELEMETRY TAB ====================
+            with gr.Tab("📈 LLM Telemetry"):
+                gr.Markdown("## LLM Usage by Agent and Workflow")
+
+                with gr.Row():
+                    telemetry_window = gr.Dropdown(
+                        choices=["Last 15 minutes", "Last hour", "Last 24 hours", "All time"],
+                        value="Last hour",
+                        label="Time Window"
+                    )
+                    telemetry_btn = gr.Button("🔄 Refresh", variant="primary")
+
+                telemetry_totals = gr.Markdown()
+                gr.Markdown("### 🤖 Per Agent")
+                telemetry_agents = gr.Dataframe(interactive=False)
+                gr.Markdown("### 🔄 Per Workflow")
+                telemetry_workflows = gr.Dataframe(interactive=False)
+                gr.Markdown("### ⚡ Fast Path (answered by rules vs. escalated to the LLM, since server start)")
+                telemetry_fast_path = gr.Dataframe(interactive=False)
+
+                telemetry_outputs = [telemetry_totals, telemetry_agents, telemetry_workflows, telemetry_fast_path]
+                telemetry_btn.click(fn=telemetry_tables, inputs=[telemetry_window], outputs=telemetry_outputs)
+                telemetry_window.change(fn=telemetry_tables, inputs=[telemetry_window], outputs=telemetry_outputs)
+                app.load(fn=telemetry_tables, inputs=[telemetry_window], outputs=telemetry_outputs)
 
             # ==================== ABOUT TAB ====================
             with gr.Tab("ℹ️ About"):
@@ -709,7 +1153,7 @@ def create_interface():
 
 if __name__ == "__main__":
     print("🚀 Launching E-commerce Multi-Agent System Web UI...")
-    print("📡 Initializing agents...")
+    print(f"📡 Initializing agents ({AGENT_BACKEND} backend)...")
     print("🎨 Building interface...")
     print()
 
@@ -0,0 +1,207 @@
+"""
+Workflow DAG Engine
+===================
+Runs multi-agent workflows declared as a DAG of steps.
+
+Each step names the steps it depends on. The executor starts every step whose
+dependencies are satisfied, runs independent branches concurrently, and hands
+each step the results of its dependencies. End-to-end latency therefore follows
+the critical path instead of the sum of all steps.
+
+A run can be given a time budget: every step inherits the deadline, steps still
+running when it expires are cancelled and reported as timed out, and the run
+returns the results that did finish.
+
+Usage:
+    workflow = Workflow("Daily Business Review", [
+        Step("sales", "Sales Performance", lambda inputs: analytics.generate_business_report("week")),
+        Step("stock", "Critical Inventory", lambda inputs: inventory.check_stock("PROD004")),
+        Step("notify", "Notify", lambda inputs: notify(inputs["sales"], inputs["stock"]), depends_on=("sales", "stock")),
+    ])
+    outcome = await workflow.run(timeout=60)  # outcome.results, outcome.timed_out, ...
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from deadlines import DeadlineExceeded, current_deadline, deadline_after
+from streaming import TokenStream
+from telemetry import current_workflow
+
+
+@dataclass
+class Step:
+    """One unit of work in a workflow."""
+
+    name: str
+    title: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]  # receives {dependency name: result}
+    depends_on: Tuple[str, ...] = ()
+    render: Callable[[Any], str] = str  # presentation of the result for CLI/UI output
+
+
+@dataclass
+class StepEvent:
+    """Progress notification emitted while a workflow runs."""
+
+    step: Step
+    status: str  # "started", "token", "completed", "failed", "timed_out" or "skipped"
+    value: Any = None  # token delta or step result
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+
+@dataclass
+class WorkflowRun:
+    """Outcome of a workflow run."""
+
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, BaseException] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+    timed_out: List[str] = field(default_factory=list)
+    durations: Dict[str, float] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+class Workflow:
+    """A named DAG of steps."""
+
+    def __init__(self, name: str, steps: Sequence[Step]):
+        self.name = name
+        self.steps: List[Step] = list(steps)
+        self._by_name: Dict[str, Step] = {}
+
+        for step in self.steps:
+            if step.name in self._by_name:
+                raise ValueError(f"Duplicate step '{step.name}' in workflow '{name}'")
+            self._by_name[step.name] = step
+        for step in self.steps:
+            for dependency in step.depends_on:
+                if dependency not in self._by_name:
+                    raise ValueError(f"Step '{step.name}' depends on unknown step '{dependency}'")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        remaining = {step.name: set(step.depends_on) for step in self.steps}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Workflow '{self.name}' has a dependency cycle: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    async def stream(self, stream_tokens: bool = False, timeout: Optional[float] = None) -> AsyncIterator[StepEvent]:
+        """
+        Run the workflow, yielding events as steps start, stream tokens and finish.
+
+        A step whose dependency failed or timed out is skipped; independent branches
+        keep going. When `timeout` seconds (or an enclosing deadline) run out, steps
+        still running are cancelled and reported as "timed_out". Closing the iterator
+        early cancels any steps still running.
+        """
+        ends = deadline_after(timeout)
+        events: asyncio.Queue = asyncio.Queue()
+        results: Dict[str, Any] = {}
+        waiting = {step.name: set(step.depends_on) for step in self.steps}
+        running: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: Step):
+            current_workflow.set(self.name)  # each step is its own task, so this tags only its calls
+            current_deadline.set(ends)  # agents, tools and LLM calls in the step share the budget
+            started = time.perf_counter()
+            events.put_nowait(StepEvent(step, "started"))
+            try:
+                inputs = {name: results[name] for name in step.depends_on}
+                if stream_tokens:
+                    stream = TokenStream(step.run(inputs))
+                    async for delta in stream:
+                        events.put_nowait(StepEvent(step, "token", delta))
+                    result = stream.result
+                else:
+                    result = await step.run(inputs)
+            except asyncio.CancelledError:
+                raise
+            except DeadlineExceeded as e:
+                events.put_nowait(StepEvent(step, "timed_out", error=e, elapsed=time.perf_counter() - started))
+            except Exception as e:
+                events.put_nowait(StepEvent(step, "failed", error=e, elapsed=time.perf_counter() - started))
+            else:
+                events.put_nowait(StepEvent(step, "completed", result, elapsed=time.perf_counter() - started))
+
+        def start_ready():
+            for name in [name for name, deps in waiting.items() if not deps]:
+                del waiting[name]
+                running[name] = asyncio.create_task(run_step(self._by_name[name]))
+
+        def skip_dependents(name: str) -> List[Step]:
+            skipped = []
+            for dependent, deps in list(waiting.items()):
+                if name in deps:
+                    del waiting[dependent]
+                    skipped.append(self._by_name[dependent])
+                    skipped.extend(skip_dependents(dependent))
+            return skipped
+
+        start_ready()
+        try:
+            while running:
+                try:
+                    left = None if ends is None else max(0.0, ends - time.monotonic())
+                    async with asyncio.timeout(left):
+                        event = await events.get()
+                except TimeoutError:
+                    # Out of budget: stop what is still running and report it; finished results stand
+                    tasks = list(running.items())
+                    running.clear()
+                    for _, task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*(task for _, task in tasks), return_exceptions=True)
+                    for name, _ in tasks:
+                        yield StepEvent(self._by_name[name], "timed_out", error=DeadlineExceeded(
+                            f"Step '{name}' did not finish within the workflow's time budget"))
+                    for step in [self._by_name[name] for name in waiting]:
+                        yield StepEvent(step, "skipped")
+                    waiting.clear()
+                    return
+                yield event
+
+                if event.status == "completed":
+                    del running[event.step.name]
+                    results[event.step.name] = event.value
+                    for deps in waiting.values():
+                        deps.discard(event.step.name)
+                    start_ready()
+                elif event.status in ("failed", "timed_out"):
+                    del running[event.step.name]
+                    for step in skip_dependents(event.step.name):
+                        yield StepEvent(step, "skipped")
+        finally:
+            for task in running.values():
+                task.cancel()
+
+    async def run(self, stream_tokens: bool = False,
+                  on_event: Optional[Callable[[StepEvent], None]] = None,
+                  timeout: Optional[float] = None) -> WorkflowRun:
+        """Run the workflow to completion (or its time budget) and collect results, errors and step timings."""
+        outcome = WorkflowRun()
+        started = time.perf_counter()
+        async for event in self.stream(stream_tokens, timeout):
+            if event.status == "completed":
+                outcome.results[event.step.name] = event.value
+                outcome.durations[event.step.name] = event.elapsed
+            elif event.status == "failed":
+                outcome.errors[event.step.name] = event.error
+                outcome.durations[event.step.name] = event.elapsed
+            elif event.status == "timed_out":
+                outcome.timed_out.append(event.step.name)
+                outcome.errors[event.step.name] = event.error
+            elif event.status == "skipped":
+                outcome.skipped.append(event.step.name)
+            if on_event is not None:
+                on_event(event)
+        outcome.elapsed = time.perf_counter() - started
+        return outcome
@@ -0,0 +1,108 @@
+"""
+Multi-Agent Workflow Definitions
+================================
+The business workflows, declared once as DAGs and shared by the CLI menus in
+multi_agent_demo.py / multi_agent_system.py and by the web UI.
+
+Builders take agent instances rather than importing them, so the same DAG runs
+with the simulated agents or the OpenAI-backed ones (their interfaces match).
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from deadlines import REQUEST_TIMEOUT
+from prompt_encoding import parse_tool_result
+from workflow_engine import Step, Workflow
+
+INVENTORY_AUDIT_SKUS = ["PROD001", "PROD002", "PROD003", "PROD004", "PROD005"]
+
+
+def render_stock_check(check: Dict[str, Any]) -> str:
+    return f"**Analysis:** {check['analysis']}\n\n**Data:** {check['data']}"
+
+
+def render_json(data: str) -> str:
+    return f"```json\n{data}\n```" if parse_tool_result(data) is not None else data
+
+
+def vip_customer_upsell(cs_agent, analytics_agent, order_id: str = "ORD001",
+                        customer_id: str = "CUST001") -> Workflow:
+    """Order status, customer profile and recommendations are independent, so all three run at once."""
+    return Workflow("VIP Customer Upsell", [
+        Step("order_status", "📦 Check Order Status",
+             lambda inputs: cs_agent.handle_order_inquiry(order_id)),
+        Step("customer_profile", "📊 Analyze Customer Profile",
+             lambda inputs: analytics_agent.analyze_customer_segment(customer_id)),
+        Step("recommendations", "💡 Generate Product Recommendations",
+             lambda inputs: cs_agent.recommend_products(customer_id, "Electronics")),
+    ])
+
+
+def inventory_audit(inventory_agent, skus: List[str] = None) -> Workflow:
+    """Single-step audit (the audit itself fans out per SKU)."""
+    skus = skus or INVENTORY_AUDIT_SKUS
+    return Workflow("Inventory Audit", [
+        Step("audit", "📦 Performing Inventory Audit",
+             lambda inputs: inventory_agent.audit_inventory(skus)),
+    ])
+
+
+def daily_business_review(analytics_agent, inventory_agent, critical_sku: str = "PROD004") -> Workflow:
+    """Sales report and critical stock check run side by side."""
+    return Workflow("Daily Business Review", [
+        Step("sales_report", "📈 Sales Performance",
+             lambda inputs: analytics_agent.generate_business_report("week")),
+        Step("critical_inventory", "📦 Critical Inventory Check",
+             lambda inputs: inventory_agent.check_stock(critical_sku),
+             render=render_stock_check),
+    ])
+
+
+def order_fulfillment(cs_agent, inventory_agent, executor, order_id: str = "ORD002") -> Workflow:
+    """Retrieve order -> verify stock for every item in it -> ship."""
+
+    async def verify_inventory(inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        order = parse_tool_result(inputs["order_details"]) or {}
+        return list(await asyncio.gather(*(inventory_agent.check_stock(sku) for sku in order.get("items", []))))
+
+    def render_verification(checks: List[Dict[str, Any]]) -> str:
+        if not checks:
+            return "⚠️  No items to verify"
+        return "\n\n".join(f"**{check['sku']}:** {check['analysis']}" for check in checks)
+
+    return Workflow("Order Fulfillment", [
+        Step("order_details", f"📦 Review Order {order_id}",
+             lambda inputs: executor.execute_tool("process_order", {"order_id": order_id, "action": "retrieve"}),
+             render=render_json),
+        Step("inventory", "📦 Verify Inventory", verify_inventory,
+             depends_on=("order_details",), render=render_verification),
+        Step("shipment", "🚚 Process Shipment",
+             lambda inputs: cs_agent.ship_order(order_id),
+             depends_on=("inventory",)),
+    ])
+
+
+async def run_in_terminal(workflow: Workflow, timeout: Optional[float] = REQUEST_TIMEOUT):
+    """Run a workflow, printing each step as it finishes (CLI menus), within `timeout` seconds."""
+    numbers = {step.name: i for i, step in enumerate(workflow.steps, 1)}
+
+    def print_event(event):
+        label = f"Step {numbers[event.step.name]}: {event.step.title}"
+        if event.status == "completed":
+            print(f"\n{label} ({event.elapsed:.2f}s)")
+            print(event.step.render(event.value))
+        elif event.status == "failed":
+            print(f"\n{label}\n❌ Error: {event.error}")
+        elif event.status == "timed_out":
+            print(f"\n{label}\n⏱️  Timed out: {event.error}")
+        elif event.status == "skipped":
+            print(f"\n{label}\n⏭️  Skipped (a step it depends on failed or timed out)")
+
+    outcome = await workflow.run(on_event=print_event, timeout=timeout)
+    sequential = sum(outcome.durations.values())
+    print(f"\n⏱️  Workflow finished in {outcome.elapsed:.2f}s (steps total {sequential:.2f}s)")
+    if outcome.timed_out:
+        print(f"⏱️  Partial results: {len(outcome.results)} of {len(workflow.steps)} steps finished "
+              f"before the time budget ran out")
+    return outcome